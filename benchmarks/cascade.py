@@ -0,0 +1,83 @@
+"""Benchmark of the small-to-large model cascade.
+
+Scores generated documents with a larger model fixture alone and with a cascade of a small fixture and
+the larger one. Scores of random fixtures are meaningless, so the band is centered on the median first-stage
+score and widened to escalate a given share of chunks. Reports escalation rate, time, speedup and agreement of
+chunk decisions (score above 0.5) with the larger model alone for every share.
+Runs offline on model fixtures of `benchmarks/fixtures.py` sharing one tokenizer.
+Quality of a real cascade is measured on labeled data with `generated-text-detector evaluate-cascade`.
+
+Usage: python benchmarks/cascade.py --texts 200 --escalation 0 0.1 0.25 0.5 1
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+from fixtures import DEFAULT_MODEL_CONFIG, build_fixture, make_text
+
+from generated_text_detector.utils.text_detector import GeneratedTextDetector
+
+
+LARGE_MODEL_CONFIG = {
+    **DEFAULT_MODEL_CONFIG,
+    "hidden_size": 256,
+    "num_hidden_layers": 6,
+    "num_attention_heads": 4,
+    "intermediate_size": 1024,
+}
+
+
+def measure(detector: GeneratedTextDetector, chunks: list, repeats: int) -> tuple[list[float], float]:
+    times = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        scores = detector.score_chunks(chunks)
+        times.append(time.perf_counter() - started_at)
+
+    return scores, min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default="/tmp/detector-fixture", help="Directory of the small model fixture")
+    parser.add_argument("--large-fixture", default="/tmp/detector-fixture-large", help="Directory of the larger model fixture")
+    parser.add_argument("--texts", type=int, default=200, help="Number of documents")
+    parser.add_argument("--chars", type=int, default=3000, help="Size of every document")
+    parser.add_argument("--escalation", type=float, nargs="+", default=[0, 0.1, 0.25, 0.5, 1], help="Shares of escalated chunks")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    small = build_fixture(args.fixture)
+    large = build_fixture(args.large_fixture, model_config=LARGE_MODEL_CONFIG)
+
+    rng = random.Random(args.seed)
+    texts = [make_text(rng, args.chars) for _ in range(args.texts)]
+
+    # Fixtures share the tokenizer, so chunks are the same for every detector
+    detector = GeneratedTextDetector(large, "cpu", warmup_passes=0)
+    chunks = [chunk for text in texts for chunk in detector.prepare(text)]
+    reference, reference_s = measure(detector, chunks, args.repeats)
+    first_stage_scores = GeneratedTextDetector(small, "cpu", warmup_passes=0).score_chunks(chunks)
+
+    print(f"{len(chunks)} chunks of {len(texts)} documents")
+    print(f"{'band':>16} {'escalated':>10} {'time, s':>8} {'speedup':>8} {'agreement':>10}")
+    print(f"{'model alone':>16} {'':>10} {reference_s:>8.2f} {1:>8.2f} {1:>10.3f}")
+    for share in args.escalation:
+        # Band around the median holding `share` of first-stage scores, its lower bound is exclusive
+        low, high = np.quantile(first_stage_scores, [0.5 - share / 2, 0.5 + share / 2])
+        if share > 0:
+            low = np.nextafter(low, -np.inf)
+
+        detector = GeneratedTextDetector(large, "cpu", warmup_passes=0, cascade_model=small, cascade_band=(low, high))
+        scores, cascade_s = measure(detector, chunks, args.repeats)
+
+        stats = detector.stats()["cascade"]
+        agreement = np.mean((np.array(scores) > 0.5) == (np.array(reference) > 0.5))
+        band = f"{low:.3f}..{high:.3f}"
+        print(f"{band:>16} {stats['escalation_rate']:>10.1%} {cascade_s:>8.2f} {reference_s / cascade_s:>8.2f} {agreement:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark of text chunking and tokenization.
+
+Compares the previous pipeline (slow tokenizer: whole text encoded, every sentence encoded
+again and every chunk encoded a third time with `batch_encode_plus`) with single-pass
+chunking on a fast tokenizer, where chunks are slices of token IDs passed straight to the model.
+The previous pipeline split sentences with NLTK Punkt, so the benchmark requires `nltk` with downloaded `punkt` data.
+
+Usage: python benchmarks/chunking.py --tokenizer SuperAnnotate/ai-detector
+"""
+import argparse
+import time
+
+from nltk.tokenize import sent_tokenize
+from transformers import RobertaTokenizer, RobertaTokenizerFast
+
+from generated_text_detector.utils.batching import pad_input_ids
+from generated_text_detector.utils.chunking import split_by_chunks
+
+
+SAMPLE_PARAGRAPH = (
+    "Large language models are trained on vast amounts of text collected from the internet. "
+    "They learn statistical patterns of language and can produce fluent continuations of a prompt. "
+    "Detecting such text is useful for data curation, education and content moderation. "
+    "However, the task becomes harder as models improve and as people edit the generated output! "
+    "Is it possible to tell them apart reliably? Detectors combine many weak signals to decide. "
+)
+INPUT_SIZES = (10_000, 25_000, 50_000, 100_000)
+
+
+def legacy_chunks(text: str, tokenizer: RobertaTokenizer, max_len: int) -> list[str]:
+    if len(tokenizer.encode(text)) < max_len:
+        return [text]
+
+    chunks = []
+    cur_chunk = ""
+    cur_count_tokens = 0
+
+    for sentence in sent_tokenize(text):
+        temp_count_tokens = len(tokenizer.encode(sentence))
+        if cur_count_tokens + temp_count_tokens > max_len:
+            chunks.append(cur_chunk.strip())
+            cur_chunk = sentence
+            cur_count_tokens = temp_count_tokens
+        else:
+            cur_count_tokens += temp_count_tokens
+            cur_chunk += " " + sentence
+
+    chunks.append(cur_chunk.strip())
+
+    return chunks
+
+
+def legacy_pipeline(text: str, tokenizer: RobertaTokenizer, max_len: int):
+    chunks = legacy_chunks(text, tokenizer, max_len)
+    return tokenizer.batch_encode_plus(
+        chunks,
+        add_special_tokens=True,
+        max_length=max_len,
+        padding='longest',
+        truncation=True,
+        return_token_type_ids=True,
+        return_tensors="pt"
+    )
+
+
+def single_pass_pipeline(text: str, tokenizer: RobertaTokenizerFast, max_len: int):
+    chunks = split_by_chunks(text, tokenizer, max_len)
+    input_ids = [tokenizer.build_inputs_with_special_tokens(chunk.input_ids) for chunk in chunks]
+    return pad_input_ids(input_ids, tokenizer.pad_token_id)
+
+
+def measure(func, *args, repeats: int) -> float:
+    func(*args)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(*args)
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of text chunking and tokenization")
+    parser.add_argument("--tokenizer", default="SuperAnnotate/ai-detector", help="Model ID or path with tokenizer files")
+    parser.add_argument("--max-len", default=512, type=int, help="Maximum number of tokens in one chunk")
+    parser.add_argument("--repeats", default=5, type=int, help="Number of measured runs per input size")
+    args = parser.parse_args()
+
+    slow_tokenizer = RobertaTokenizer.from_pretrained(args.tokenizer)
+    fast_tokenizer = RobertaTokenizerFast.from_pretrained(args.tokenizer)
+
+    print(f"{'chars':>8} {'legacy, ms':>12} {'single-pass, ms':>16} {'speedup':>8}")
+    for size in INPUT_SIZES:
+        text = (SAMPLE_PARAGRAPH * (size // len(SAMPLE_PARAGRAPH) + 1))[:size]
+        text = " ".join(text.split())
+
+        legacy = measure(legacy_pipeline, text, slow_tokenizer, args.max_len, repeats=args.repeats)
+        single_pass = measure(single_pass_pipeline, text, fast_tokenizer, args.max_len, repeats=args.repeats)
+
+        print(f"{size:>8} {legacy * 1000:>12.1f} {single_pass * 1000:>16.1f} {legacy / single_pass:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark of the Python client of the detection service.
+
+Sends the same texts to a running service in three ways: one `requests.post` per text with a new connection
+(as `etc/detection_code_for_editor.py` used to), concurrent single calls over the pooled keep-alive connections
+of `DetectorClient`, and `DetectorClient.detect_many` coalescing texts into concurrent batch calls.
+Reports throughput of every way. Every run prefixes texts with its own number, so report cache does not help.
+Start the service first, e.g. `uvicorn --port 8080 generated_text_detector.fastapi_app:app`.
+
+Usage: python benchmarks/client.py --url http://localhost:8080 --texts 200 --concurrency 8 --batch-size 16
+"""
+import argparse
+import random
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from fixtures import make_text
+
+from generated_text_detector.client import DetectorClient
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8080", help="URL of the service")
+    parser.add_argument("--texts", type=int, default=200, help="Number of texts")
+    parser.add_argument("--chars", type=int, default=600, help="Size of every text")
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of requests in flight")
+    parser.add_argument("--batch-size", type=int, default=16, help="Number of texts in one batch call")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = [make_text(rng, args.chars) for _ in range(args.texts)]
+    url = args.url.rstrip("/") + "/"
+
+    def post(text: str) -> dict:
+        response = requests.post(urllib.parse.urljoin(url, "detect"), json={"text": text})
+        if response.status_code != 200:
+            return {"error": response.text}
+        return response.json()
+
+    with DetectorClient(url, max_concurrency=args.concurrency, batch_size=args.batch_size) as client:
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            runs = (
+                ("requests.post", lambda batch: list(pool.map(post, batch))),
+                ("pooled", lambda batch: list(pool.map(client.detect, batch))),
+                ("detect_many", client.detect_many),
+            )
+
+            print(f"{'client':>14} {'time, s':>8} {'texts/s':>8} {'errors':>7}")
+            for run, (name, detect) in enumerate(runs):
+                batch = [f"{run} {text}" for text in texts]
+                started_at = time.perf_counter()
+                reports = detect(batch)
+                elapsed = time.perf_counter() - started_at
+
+                errors = sum("error" in report for report in reports)
+                print(f"{name:>14} {elapsed:>8.2f} {len(texts) / elapsed:>8.1f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Fuzz test and scaling benchmark of the code block scanner.
+
+Fuzz: random documents built from fences, backticks, languages, words and whitespace are split with
+`split_text_and_code_spans` and with the previous regex ```` ```(\\w+)?\\s*([\\s\\S]*?)\\s*``` ````.
+Results must be identical unless the document has a tilde fence or an unclosed fence at the start of a line,
+which the regex did not recognize. Exits with status 1 on any mismatch, or if no document was compared,
+before the scaling benchmark runs; `--fuzz-only` skips the benchmark to run the check as a regression test.
+
+Scaling: time of both on adversarial inputs (unclosed fences followed by long words or whitespace,
+many fences) of doubling size. The regex backtracks quadratically, the scanner stays linear.
+
+Usage: python benchmarks/code_blocks.py --fuzz 20000 --sizes 2500 5000 10000 20000 40000
+       python benchmarks/code_blocks.py --fuzz 100000 --fuzz-only
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+from generated_text_detector.utils.aggregated_detector import split_text_and_code_spans
+from generated_text_detector.utils.code_blocks import scan_code_blocks
+
+
+CODE_BLOCK_PATTERN = re.compile(r"```(\w+)?\s*([\s\S]*?)\s*```")
+FUZZ_PIECES = ("```", "```", "`", "``", "~~~", "~", "python", "js", "a", "word", " ", "  ", "\n", "\n\n", "\t", "\n  ```")
+ADVERSARIAL_INPUTS = {
+    "unclosed, long word": lambda n: "text ```" + "a" * n,
+    "unclosed, whitespace": lambda n: "text ```" + " " * n + "x",
+    "many fences": lambda n: "```a b ``` " * (n // 11) + "text ```x",
+    "unclosed tilde fences": lambda n: "~~~~\n~~~\n" * (n // 9),
+}
+
+
+def regex_split_text_and_code_spans(text: str) -> tuple[list[tuple[int, int]], str]:
+    """`split_text_and_code_spans` before the scanner."""
+    code_blocks = []
+    pieces = []
+    position = 0
+    for match in CODE_BLOCK_PATTERN.finditer(text):
+        code_blocks.append(match.group(2))
+        pieces.append((position, match.start()))
+        pieces.extend(match.span(group) for group in (1, 2) if match.group(group) is not None)
+        position = match.end()
+    pieces.append((position, len(text)))
+
+    spans = []
+    for start, end in pieces:
+        piece = text[start:end]
+        stripped = piece.strip()
+        if stripped:
+            start += len(piece) - len(piece.lstrip())
+            spans.append((start, start + len(stripped)))
+
+    return spans, "\n\n".join(code_blocks)
+
+
+def fuzz(rng: random.Random, iterations: int) -> tuple[int, int]:
+    """Compare the scanner with the regex on random documents.
+
+    :return: Number of compared documents and number of mismatches
+    """
+    compared = mismatches = 0
+    for _ in range(iterations):
+        text = "".join(rng.choice(FUZZ_PIECES) for _ in range(rng.randint(0, 40)))
+        if "~~~" in text or not all(block.closed for block in scan_code_blocks(text)):
+            continue
+
+        compared += 1
+        if split_text_and_code_spans(text) != regex_split_text_and_code_spans(text):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"mismatch: {text!r}")
+
+    return compared, mismatches
+
+
+def measure(function, text: str) -> float:
+    started_at = time.perf_counter()
+    function(text)
+    return time.perf_counter() - started_at
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fuzz", type=int, default=20000, help="Number of random documents")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2500, 5000, 10000, 20000, 40000], help="Sizes of adversarial inputs")
+    parser.add_argument("--regex-timeout", type=float, default=5.0, help="Skip larger inputs for the regex after a run this long")
+    parser.add_argument("--fuzz-only", action="store_true", help="Run only the fuzz check")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    compared, mismatches = fuzz(random.Random(args.seed), args.fuzz)
+    print(f"fuzz: {compared} documents compared with the regex, {mismatches} mismatches")
+    if mismatches:
+        sys.exit(f"scanner differs from the regex on {mismatches} of {compared} documents")
+    if compared == 0:
+        sys.exit("fuzz compared no documents")
+    if args.fuzz_only:
+        return
+
+    print(f"{'input':>24} {'chars':>8} {'regex, ms':>10} {'scanner, ms':>12}")
+    for name, make_input in ADVERSARIAL_INPUTS.items():
+        regex_skipped = False
+        for size in args.sizes:
+            text = make_input(size)
+            scanner = measure(split_text_and_code_spans, text)
+            regex = None
+            if not regex_skipped:
+                regex = measure(regex_split_text_and_code_spans, text)
+                regex_skipped = regex > args.regex_timeout
+            regex_ms = "skipped" if regex is None else f"{regex * 1000:.1f}"
+            print(f"{name:>24} {len(text):>8} {regex_ms:>10} {scanner * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
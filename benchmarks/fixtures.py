@@ -0,0 +1,127 @@
+"""Offline model fixture for benchmarks.
+
+Builds a directory loadable as `model_name_or_path` of `GeneratedTextDetector`: a byte-level BPE
+tokenizer trained on a generated English-like corpus and a small randomly initialized `RobertaClassifier`.
+Nothing is downloaded and the same seed always produces the same fixture, so timings of different
+releases are comparable. Scores of the fixture model are meaningless.
+
+Usage: python benchmarks/fixtures.py /tmp/detector-fixture
+"""
+import argparse
+import os
+import random
+
+import torch
+from tokenizers import ByteLevelBPETokenizer
+from transformers import RobertaTokenizerFast
+
+from generated_text_detector.utils.model.roberta_classifier import RobertaClassifier
+
+
+SPECIAL_TOKENS = ["<s>", "<pad>", "</s>", "<unk>", "<mask>"]
+WORDS = (
+    "the a of and to in is that it for on with as was by this be are from at or an have not they which "
+    "model language text data training detection generated human written large network neural token "
+    "sentence paragraph chunk score result report value process system method approach study research "
+    "however therefore moreover furthermore although because while since during between within across "
+    "important significant different various several particular specific general common possible "
+    "use make provide include consider show find develop improve require describe explain suggest"
+).split()
+PUNCTUATION = (".", ".", ".", "!", "?")
+
+# Encoder size is chosen so that one model pass takes milliseconds on CPU
+DEFAULT_MODEL_CONFIG = {
+    "hidden_size": 128,
+    "num_hidden_layers": 2,
+    "num_attention_heads": 2,
+    "intermediate_size": 256,
+    "max_position_embeddings": 514,
+}
+
+
+def make_sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 24))]
+    words[0] = words[0].capitalize()
+    if rng.random() < 0.3:
+        words[rng.randrange(1, len(words))] += ","
+
+    return " ".join(words) + rng.choice(PUNCTUATION)
+
+
+def make_text(rng: random.Random, num_chars: int) -> str:
+    """Generate text of about `num_chars` characters split into paragraphs."""
+    paragraphs = []
+    size = 0
+    while size < num_chars:
+        paragraph = " ".join(make_sentence(rng) for _ in range(rng.randint(2, 6)))
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+
+    return "\n\n".join(paragraphs)[:num_chars]
+
+
+def build_fixture(path: str, seed: int = 0, vocab_size: int = 2000, model_config: dict | None = None) -> str:
+    """Build tokenizer and randomly initialized classifier in `path` unless they are already there.
+
+    :param path: Directory of the fixture
+    :type path: str
+    :param seed: Seed of the corpus and of model weights, defaults to 0
+    :type seed: int, optional
+    :param vocab_size: Size of the tokenizer vocabulary, defaults to 2000
+    :type vocab_size: int, optional
+    :param model_config: Keyword arguments of `RobertaConfig`, defaults to `DEFAULT_MODEL_CONFIG`
+    :type model_config: dict, optional
+    :return: Path to the fixture
+    :rtype: str
+    """
+    if os.path.exists(os.path.join(path, "model.safetensors")):
+        return path
+
+    os.makedirs(path, exist_ok=True)
+    rng = random.Random(seed)
+
+    bpe = ByteLevelBPETokenizer()
+    bpe.train_from_iterator(
+        (make_text(rng, 2000) for _ in range(200)),
+        vocab_size=vocab_size,
+        min_frequency=2,
+        special_tokens=SPECIAL_TOKENS,
+        show_progress=False,
+    )
+    bpe.save_model(path)
+    tokenizer = RobertaTokenizerFast(
+        vocab_file=os.path.join(path, "vocab.json"),
+        merges_file=os.path.join(path, "merges.txt"),
+    )
+    tokenizer.save_pretrained(path)
+
+    torch.manual_seed(seed)
+    model = RobertaClassifier({
+        "roberta_config": {
+            **(model_config or DEFAULT_MODEL_CONFIG),
+            "vocab_size": len(tokenizer),
+            "pad_token_id": tokenizer.pad_token_id,
+            "bos_token_id": tokenizer.bos_token_id,
+            "eos_token_id": tokenizer.eos_token_id,
+        },
+        "classifier_dropout": 0.1,
+        "num_labels": 1,
+        "label_smoothing": 0.1,
+    })
+    model.save_pretrained(path)
+
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Directory of the fixture")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--vocab-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(build_fixture(args.path, args.seed, args.vocab_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark of incremental re-scoring of edited documents.
+
+Scores a long generated document, applies a one-line edit at a random position and compares
+the latency of scoring the edited version from scratch with incremental re-scoring by document ID,
+which sends only chunks changed by the edit to the model. Also reports how many chunks were reused
+and the difference between incremental and from-scratch scores caused by content-defined chunk boundaries.
+Runs offline on the model fixture of `benchmarks/fixtures.py`.
+
+Usage: python benchmarks/incremental.py --chars 100000 --edits 20
+"""
+import argparse
+import random
+import statistics
+import time
+
+from fixtures import build_fixture, make_sentence, make_text
+
+from generated_text_detector.utils.aggregated_detector import AggregatedDetector
+
+
+def edit_line(rng: random.Random, text: str) -> str:
+    """Replace one sentence of a random paragraph with a new one."""
+    paragraphs = text.split("\n\n")
+    i = rng.randrange(len(paragraphs))
+    sentences = paragraphs[i].split(". ")
+    sentences[rng.randrange(len(sentences))] = make_sentence(rng).rstrip(".!?")
+    paragraphs[i] = ". ".join(sentences)
+
+    return "\n\n".join(paragraphs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default="/tmp/detector-fixture", help="Directory of the model fixture")
+    parser.add_argument("--chars", type=int, default=100000, help="Size of the document")
+    parser.add_argument("--edits", type=int, default=20, help="Number of consecutive edits")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    detector = AggregatedDetector(
+        build_fixture(args.fixture),
+        device="cpu",
+        document_store_size=16,
+    )
+    text_detector = detector.text_detector
+
+    rng = random.Random(args.seed)
+    text = make_text(rng, args.chars)
+    detector.detect_report(text, document_id="doc")
+
+    full_times, incremental_times, differences = [], [], []
+    reused = total = 0
+
+    for _ in range(args.edits):
+        text = edit_line(rng, text)
+
+        started_at = time.perf_counter()
+        full = detector.detect_report(text)
+        full_times.append(time.perf_counter() - started_at)
+
+        stats_before = text_detector.stats()["incremental"]
+        started_at = time.perf_counter()
+        incremental = detector.detect_report(text, document_id="doc")
+        incremental_times.append(time.perf_counter() - started_at)
+        stats_after = text_detector.stats()["incremental"]
+
+        reused += stats_after["reused_chunks"] - stats_before["reused_chunks"]
+        total += (
+            stats_after["reused_chunks"] + stats_after["scored_chunks"]
+            - stats_before["reused_chunks"] - stats_before["scored_chunks"]
+        )
+        differences.append(abs(full["generated_score"] - incremental["generated_score"]))
+
+    full_ms = statistics.median(full_times) * 1000
+    incremental_ms = statistics.median(incremental_times) * 1000
+
+    print(f"document: {len(text)} characters, {len(text_detector.prepare(text))} greedy chunks, "
+          f"{len(text_detector.prepare(text, content_defined=True))} content-defined chunks")
+    print(f"reused chunks: {reused}/{total} ({reused / total:.1%})")
+    print(f"from scratch: {full_ms:.1f} ms, incremental: {incremental_ms:.1f} ms, speedup: {full_ms / incremental_ms:.1f}x")
+    print(f"score difference: max {max(differences):.4f}, mean {statistics.mean(differences):.4f}")
+
+
+if __name__ == "__main__":
+    main()
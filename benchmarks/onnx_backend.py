@@ -0,0 +1,129 @@
+"""Parity check and benchmark of inference backends.
+
+Scores the same chunks with the PyTorch model, the ONNX model and the int8-quantized ONNX model,
+reports the maximum score difference against PyTorch and whether it changes the predicted author,
+then latency of single-chunk passes, throughput of full batches and peak RSS of every backend.
+Exits with an error if the difference of the ONNX model exceeds `--tolerance`
+or the difference of the quantized model exceeds `--int8-tolerance`.
+Every backend runs in its own process, so RSS is not shared between them.
+
+Usage: python benchmarks/onnx_backend.py --model SuperAnnotate/ai-detector --onnx-dir /tmp/onnx
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import statistics
+import time
+
+from generated_text_detector.utils.text_detector import GeneratedTextDetector
+
+
+SAMPLE_PARAGRAPH = (
+    "Large language models are trained on vast amounts of text collected from the internet. "
+    "They learn statistical patterns of language and can produce fluent continuations of a prompt. "
+    "Detecting such text is useful for data curation, education and content moderation. "
+    "However, the task becomes harder as models improve and as people edit the generated output! "
+    "Is it possible to tell them apart reliably? Detectors combine many weak signals to decide. "
+)
+AUTHOR_THRESHOLDS = (0.1, 0.3, 0.7, 0.9)
+
+
+def make_texts(count: int) -> list[str]:
+    sentences = SAMPLE_PARAGRAPH.split(". ")
+    return [
+        ". ".join(sentences[i % len(sentences):] + sentences[:i % len(sentences)]) * (1 + i % 4)
+        for i in range(count)
+    ]
+
+
+def run_backend(name: str, detector_kwargs: dict, texts: list[str], repeats: int, queue) -> None:
+    detector = GeneratedTextDetector(device="cpu", **detector_kwargs)
+    chunks = [chunk for text in texts for chunk in detector.prepare(text)]
+    scores = detector.score_chunks(chunks)
+
+    latencies = []
+    for _ in range(repeats):
+        for chunk in chunks[:16]:
+            started_at = time.perf_counter()
+            detector.score_chunks([chunk])
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    for _ in range(repeats):
+        detector.score_chunks(chunks)
+    throughput = repeats * len(chunks) / (time.perf_counter() - started_at)
+
+    queue.put({
+        "name": name,
+        "scores": scores,
+        "latency_ms": statistics.median(latencies) * 1000,
+        "throughput": throughput,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+
+def author_bucket(score: float) -> int:
+    return sum(score > threshold for threshold in AUTHOR_THRESHOLDS)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="SuperAnnotate/ai-detector")
+    parser.add_argument("--onnx-dir", default="onnx")
+    parser.add_argument("--texts", type=int, default=64)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--num-threads", type=int, default=None)
+    parser.add_argument("--tolerance", type=float, default=1e-4, help="Allowed score difference of fp32 ONNX model")
+    parser.add_argument("--int8-tolerance", type=float, default=0.05, help="Allowed score difference of int8 ONNX model")
+    args = parser.parse_args()
+
+    backends = {
+        "torch": {"backend": "torch"},
+        "onnx": {"backend": "onnx", "onnx_path": os.path.join(args.onnx_dir, "model.onnx")},
+        "onnx-int8": {
+            "backend": "onnx",
+            "onnx_path": os.path.join(args.onnx_dir, "model.int8.onnx"),
+            "onnx_quantize": True,
+        },
+    }
+
+    texts = make_texts(args.texts)
+    context = multiprocessing.get_context("spawn")
+    results = {}
+
+    for name, backend_kwargs in backends.items():
+        if backend_kwargs["backend"] == "onnx":
+            backend_kwargs["num_threads"] = args.num_threads
+
+        queue = context.Queue()
+        process = context.Process(
+            target=run_backend,
+            args=(name, {"model_name_or_path": args.model, **backend_kwargs}, texts, args.repeats, queue)
+        )
+        process.start()
+        results[name] = queue.get()
+        process.join()
+
+    reference = results["torch"]["scores"]
+    print(f"{'backend':>10} {'max diff':>10} {'author flips':>13} {'latency ms':>11} {'chunks/s':>10} {'RSS MB':>8}")
+    for name, res in results.items():
+        diffs = [abs(score - ref) for score, ref in zip(res["scores"], reference)]
+        flips = sum(author_bucket(score) != author_bucket(ref) for score, ref in zip(res["scores"], reference))
+        print(
+            f"{name:>10} {max(diffs):>10.2e} {flips:>13} {res['latency_ms']:>11.2f} "
+            f"{res['throughput']:>10.1f} {res['rss_mb']:>8.1f}"
+        )
+
+    failures = []
+    for name, tolerance in (("onnx", args.tolerance), ("onnx-int8", args.int8_tolerance)):
+        max_diff = max(abs(score - ref) for score, ref in zip(results[name]["scores"], reference))
+        if max_diff > tolerance:
+            failures.append(f"{name} scores differ from PyTorch by {max_diff:.2e} > {tolerance:.0e}")
+
+    if failures:
+        raise SystemExit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
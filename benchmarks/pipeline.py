@@ -0,0 +1,346 @@
+"""Reproducible offline benchmark of the detection pipeline.
+
+Runs on CPU against the fixture built by `benchmarks/fixtures.py` (small random `RobertaClassifier`
+and local tokenizer), so no Hub download is needed. Measures every stage per input-size tier:
+preprocessing, tokenization, chunking (tokenization and sentence split), model pass and
+end-to-end `AggregatedDetector.detect_report`. Then load-tests the FastAPI app served by uvicorn
+in a subprocess with concurrent keep-alive clients and reports p50/p95/p99 latency and req/s.
+
+Results are written as JSON. With `--compare` the median of every stage and the HTTP p50 latency
+and throughput are compared with a previous run; the run fails if any of them regressed by more than `--tolerance`.
+
+Usage: python benchmarks/pipeline.py --output results.json [--compare baseline.json]
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import torch
+from fixtures import build_fixture, make_text
+
+from generated_text_detector.utils.aggregated_detector import AggregatedDetector
+from generated_text_detector.utils.chunking import split_by_chunks
+from generated_text_detector.utils.preprocessing import normalize_text
+
+
+TIERS = {"1k": 1_000, "10k": 10_000, "50k": 50_000, "100k": 100_000}
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Percentile with linear interpolation between closest ranks."""
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(seconds: list[float]) -> dict:
+    ms = [s * 1000 for s in seconds]
+    return {
+        "runs": len(ms),
+        "median_ms": statistics.median(ms),
+        "p95_ms": percentile(ms, 95),
+        "min_ms": min(ms),
+    }
+
+
+def time_runs(function, repeats: int, min_time_s: float) -> list[float]:
+    """Run function at least `repeats` times and at least `min_time_s` seconds after one warmup call."""
+    function()
+
+    times = []
+    started_at = time.perf_counter()
+    while len(times) < repeats or time.perf_counter() - started_at < min_time_s:
+        run_started_at = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - run_started_at)
+
+    return times
+
+
+def benchmark_stages(detector: AggregatedDetector, texts: dict[str, str], repeats: int, min_time_s: float) -> dict:
+    text_detector = detector.text_detector
+    tokenizer = text_detector.tokenizer
+
+    results = {}
+    for tier, text in texts.items():
+        normalized = normalize_text(text, text_detector.preprocessing)
+        chunks = split_by_chunks(normalized, tokenizer, text_detector.max_len)
+
+        stages = {
+            "preprocessing": lambda: normalize_text(text, text_detector.preprocessing),
+            "tokenization": lambda: tokenizer(normalized, add_special_tokens=False, return_offsets_mapping=True),
+            "chunking": lambda: split_by_chunks(normalized, tokenizer, text_detector.max_len),
+            "model_pass": lambda: text_detector.score_chunks(chunks),
+            "detect_report": lambda: detector.detect_report(text),
+        }
+
+        results[tier] = {
+            "chars": len(text),
+            "chunks": len(chunks),
+            "tokens": sum(len(chunk.input_ids) for chunk in chunks),
+            **{name: summarize(time_runs(stage, repeats, min_time_s)) for name, stage in stages.items()},
+        }
+        print(
+            f"{tier:>5} " + " ".join(
+                f"{name}={results[tier][name]['median_ms']:.2f}ms" for name in stages
+            ),
+            flush=True,
+        )
+
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(config_path: str, port: int, threads: int | None) -> subprocess.Popen:
+    env = {**os.environ, "DETECTOR_CONFIG_PATH": config_path, "PYTHONPATH": REPO_ROOT}
+    if threads is not None:
+        env["OMP_NUM_THREADS"] = str(threads)
+
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "generated_text_detector.fastapi_app:app",
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=REPO_ROOT,
+        env=env,
+    )
+
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/readiness")
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+
+    server.terminate()
+    raise RuntimeError("Server did not become ready in 120 seconds")
+
+
+def load_test(port: int, bodies: list[bytes], concurrency: int, duration_s: float) -> dict:
+    """Send `/detect` requests from `concurrency` keep-alive clients for `duration_s` seconds."""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration_s
+
+    def client(worker: int) -> None:
+        nonlocal errors
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        i = worker
+        while time.monotonic() < deadline:
+            body = bodies[i % len(bodies)]
+            i += concurrency
+            started_at = time.perf_counter()
+            try:
+                connection.request("POST", "/detect", body, {"Content-Type": "application/json"})
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                ok = False
+            elapsed = time.perf_counter() - started_at
+
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    started_at = time.perf_counter()
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started_at
+
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "concurrency": concurrency,
+        "duration_s": elapsed,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(ms, 50) if ms else None,
+        "p95_ms": percentile(ms, 95) if ms else None,
+        "p99_ms": percentile(ms, 99) if ms else None,
+    }
+
+
+def benchmark_http(
+    fixture: str,
+    detector_params: dict,
+    bodies: list[bytes],
+    concurrency: int,
+    duration_s: float,
+    threads: int | None
+) -> dict:
+    config = {
+        "text_detector_model": fixture,
+        "code_default_probability": 0.5,
+        "detector_params": detector_params["detector_params"],
+        "text_detector_params": detector_params["text_detector_params"],
+        "executor": {"max_workers": concurrency, "max_pending": concurrency * 4},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "detector_config.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+
+        port = free_port()
+        server = start_server(config_path, port, threads)
+        try:
+            load_test(port, bodies, concurrency, min(duration_s, 2.0))
+            return load_test(port, bodies, concurrency, duration_s)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list[str]:
+    """Find metrics of `results` that are worse than `baseline` by more than `tolerance`.
+    Latencies are also required to grow by more than `min_delta_ms`, sub-millisecond stages are noisy.
+
+    :return: Descriptions of regressions
+    :rtype: list[str]
+    """
+    regressions = []
+    print(f"\n{'metric':>34} {'baseline':>10} {'current':>10} {'change':>8}")
+
+    def check(name: str, old: float | None, new: float | None, lower_is_better: bool = True) -> None:
+        if not old or new is None:
+            return
+        change = new / old - 1
+        print(f"{name:>34} {old:>10.2f} {new:>10.2f} {change:>+8.1%}")
+        if lower_is_better and new - old <= min_delta_ms:
+            return
+        if (change if lower_is_better else -change) > tolerance:
+            regressions.append(f"{name}: {old:.2f} -> {new:.2f} ({change:+.1%})")
+
+    for tier, stages in results["stages"].items():
+        for stage, stats in stages.items():
+            old = baseline.get("stages", {}).get(tier, {}).get(stage)
+            if isinstance(stats, dict) and isinstance(old, dict):
+                check(f"{tier}/{stage} median ms", old["median_ms"], stats["median_ms"])
+
+    if "http" in results and "http" in baseline:
+        check("http p50 ms", baseline["http"]["p50_ms"], results["http"]["p50_ms"])
+        check("http req/s", baseline["http"]["rps"], results["http"]["rps"], lower_is_better=False)
+
+    return regressions
+
+
+def environment(fixture: str, args: argparse.Namespace) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    with open(os.path.join(REPO_ROOT, "version.txt")) as f:
+        version = f.read().strip()
+
+    with open(os.path.join(fixture, "config.json")) as f:
+        model_config = json.load(f)
+
+    return {
+        "version": version,
+        "commit": commit,
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+        "seed": args.seed,
+        "preprocessing": args.preprocessing,
+        "model_config": model_config,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="benchmark_results.json", help="Path to JSON results")
+    parser.add_argument("--compare", default=None, help="JSON results of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown against `--compare`")
+    parser.add_argument("--min-delta", type=float, default=1.0, help="Latency growth in ms ignored by `--compare`")
+    parser.add_argument("--fixture", default=os.path.join(tempfile.gettempdir(), "generated-text-detector-fixture"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tiers", nargs="+", default=list(TIERS), choices=list(TIERS))
+    parser.add_argument("--repeats", type=int, default=5, help="Minimum number of timed runs of every stage")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Minimum seconds spent timing every stage")
+    parser.add_argument("--threads", type=int, default=None, help="Number of torch threads (default: torch default)")
+    parser.add_argument("--preprocessing", action="store_true", help="Enable text preprocessing in the detector")
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of concurrent HTTP clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of HTTP load, 0 skips the load test")
+    args = parser.parse_args()
+
+    if args.threads is not None:
+        torch.set_num_threads(args.threads)
+
+    fixture = build_fixture(args.fixture, args.seed)
+
+    # Micro-batching and caches are off, so every stage does the same work on every run
+    params = {
+        "detector_params": {},
+        "text_detector_params": {"preprocessing": args.preprocessing, "micro_batching": False},
+    }
+    detector = AggregatedDetector(fixture, device="cpu", **params["detector_params"], **params["text_detector_params"])
+
+    rng = random.Random(args.seed)
+    texts = {tier: make_text(rng, TIERS[tier]) for tier in args.tiers}
+
+    results = {"environment": environment(fixture, args)}
+    results["stages"] = benchmark_stages(detector, texts, args.repeats, args.min_time)
+
+    if args.duration > 0:
+        http_params = {**params, "text_detector_params": {**params["text_detector_params"], "micro_batching": True}}
+        bodies = [json.dumps({"text": make_text(rng, rng.choice((500, 2000, 8000)))}).encode() for _ in range(64)]
+        results["http"] = benchmark_http(fixture, http_params, bodies, args.concurrency, args.duration, args.threads)
+        http_results = results["http"]
+        print(
+            f" http {http_results['rps']:.1f} req/s p50={http_results['p50_ms']:.1f}ms "
+            f"p95={http_results['p95_ms']:.1f}ms p99={http_results['p99_ms']:.1f}ms errors={http_results['errors']}"
+        )
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta)
+        if regressions:
+            raise SystemExit("Regressions:\n" + "\n".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Regression check and microbenchmark of text preprocessing.
+
+Compares `preprocessing_text` with the previous implementation, which replaced homoglyphs character
+by character in Python, on a corpus of Markdown documents: hand-written LLM-style answers and randomly
+generated documents mixing block and inline markup. Any difference fails the run.
+Then reports time of both implementations on the corpus and of every stage of `preprocessing_text`.
+
+Usage: python benchmarks/preprocessing.py --documents 2000 [--corpus texts.jsonl]
+"""
+import argparse
+import json
+import random
+import time
+
+import markdown
+from bs4 import BeautifulSoup
+
+from generated_text_detector.utils.preprocessing import (
+    EMAIL_PATTERN,
+    HOMOGLYPH_MAP,
+    TRANSLATION_TABLE,
+    URL_PATTERN,
+    preprocessing_text,
+)
+
+
+SAMPLES = [
+    """# Understanding Photosynthesis
+
+Photosynthesis is the process by which **green plants** convert light energy into *chemical energy*.
+
+## Key Stages
+
+1. **Light-dependent reactions**: occur in the thylakoid membranes.
+2. **Calvin cycle**: takes place in the stroma.
+   - Fixes CO₂ into sugars
+   - Requires ATP &amp; NADPH
+
+> "Life on Earth depends on photosynthesis." — *Anonymous*
+
+For more details see [Wikipedia](https://en.wikipedia.org/wiki/Photosynthesis "Photosynthesis") or email info@example.com.
+""",
+    """Sure! Here's a quick summary:
+
+* Python's `list.sort()` sorts **in place**, while `sorted()` returns a new list.
+* Both accept a `key` argument, e.g. `sorted(words, key=str.lower)`.
+* Sorting is *stable*.
+
+Example:
+
+    data = [3, 1, 2]
+    data.sort()  # data == [1, 2, 3]
+
+Hope this helps!
+""",
+    """Title
+=====
+
+Subtitle
+--------
+
+Some text with a line break
+and a second line. Use \\*literal asterisks\\* and \\_underscores\\_.
+
+***
+
+Visit <https://www.python.org/> or write to <mailto:someone@example.org>.
+Reference-style [link][docs] and [another one][].
+
+[docs]: https://docs.python.org/3/ "Python docs"
+[another one]: <https://example.com/page>
+""",
+    """### Pros and cons
+
+| Feature | Value |
+|---------|-------|
+| Speed   | High  |
+
+- **Pros**
+    - Fast
+    - Cheap
+- **Cons**
+    1. Hard to maintain
+    2. Poor docs
+
+___Bold italic___ text, __strong__ and _em_ snake_case_words stay intact.
+""",
+    """Step 1. Open the settings menu.
+
+2. Click "Advanced" → "Network".
+
+3) This is not a list item.
+
+Price: $5 * 3 = $15 & tax < 10%.
+
+Copyright &copy; 2024, &#8212; &#x2014; &unknown; &AMP; &frac12;
+""",
+    """Here’s an example with nested quotes:
+
+> First level
+>
+> > Second level with `code`
+>
+> Back to first level
+> - list in quote
+> - another item
+
+Final paragraph with an image ![alt text](http://example.com/img.png) and **[bold link](http://a.b)**.
+""",
+    "Text with\ttabs,\r\nWindows line endings\rand old Mac ones.\u200B Zero\u200Bwidth. "
+    "Hоmоglурhs: Рython Аnd Νumpy.",
+    "",
+    "   \n\n  ",
+    "Plain text without any markup at all, just a sentence. And another one!",
+    # Malformed tags and numeric references
+    "Use Vec<String> and List<Map<K, V>> in code.",
+    "Note &#1 weird.",
+    "hello <word `code` more> end",
+    "Generic `Option<T>` and Result<T, E> types, a <b>bold</b> and &#x4 and &#65; characters.",
+]
+
+WORDS = (
+    "the model text detector score chunk language large token neural network data "
+    "training inference batch fast slow python markdown parser value result report"
+).split()
+
+INLINE_FRAGMENTS = (
+    "**{w}**", "*{w}*", "__{w}__", "_{w}_", "***{w}***", "___{w}___", "**{w} *{w}* {w}**",
+    "*{w} **{w}***", "`{w}`", "``{w} ` {w}``", "[{w}](http://example.com/{w})",
+    "[{w}](<http://example.com/{w}> \"title\")", "[{w} [{w}]]({w}.html)", "![{w}](/{w}.png)",
+    "[{w}][ref]", "[{w}][]", "[ref]", "[{w}][missing]", "<http://{w}.com/a?b=1&amp;c=2>",
+    "<{w}@example.com>", "{w}@mail.com", "https://{w}.org/path_(x)", "&amp;", "&copy;",
+    "&#169;", "&#x41;", "&#128;", "&nosuch;", "&", "\\*", "\\_", "\\\\", "\\q", "* ", "_ ",
+    "{w}_{w}_{w}", "{w}*{w}*{w}", "**", "*", "_", "<span>{w}</span>", "<br>", "<b>{w}",
+    "a < b > c", "{w}<{w}>", "<{w} `{w}` {w}>", "&#1", "&#x4", "  \n", "\u200B", "а", "Ρ", "(", ")", "[", "]", "\"", "'", "{w}  ",
+)
+
+BLOCK_TEMPLATES = (
+    "{p}",
+    "# {l}",
+    "## {l} ##",
+    "###### {l}",
+    "{l}\n===",
+    "{l}\n---",
+    "- {l}\n- {l}\n- {l}",
+    "* {l}\n\n* {l}",
+    "1. {l}\n2. {l}\n10. {l}",
+    "- {l}\n    - {l}\n    - {l}\n- {l}",
+    "1. {l}\n\n    {p}\n\n2. {l}",
+    "- {l}\n{l}",
+    "- {l}\n\n    # {l}",
+    "- {l}\n  # {l}",
+    "> {l}\n> {l}",
+    "> {l}\n>\n> - {l}\n> - {l}",
+    "> {l}\n{l}",
+    "    code {l}\n    more & <code>",
+    "\tcode with tab {l}",
+    "***",
+    "- - -",
+    "_____",
+    "{l}\n***\n{l}",
+    "[ref]: http://example.com/ref \"Ref\"",
+    "[ref]: http://example.com/ref\n{l}",
+    "{l}\n[ref]: <http://example.com/ref>",
+    "{p}  \n{p}",
+    "   {l}",
+    "1986\\. {l}",
+    "+ {l}\n+ {l}",
+)
+
+
+def reference_preprocessing(text: str) -> str:
+    """Previous implementation replacing zero-width spaces and homoglyphs in separate Python passes."""
+    text = text.replace('\u200B', '')
+    text = ''.join(HOMOGLYPH_MAP.get(char, char) for char in text)
+
+    html = markdown.markdown(text)
+    text = BeautifulSoup(html, 'html.parser').get_text()
+
+    text = URL_PATTERN.sub('', text)
+    text = EMAIL_PATTERN.sub('', text)
+    text = " ".join(text.split())
+
+    return text.strip()
+
+
+def random_line(rng: random.Random) -> str:
+    pieces = []
+    for _ in range(rng.randint(1, 8)):
+        if rng.random() < 0.5:
+            pieces.append(rng.choice(WORDS))
+        else:
+            pieces.append(rng.choice(INLINE_FRAGMENTS).format(w=rng.choice(WORDS)))
+
+    return rng.choice((" ", " ", "")).join(pieces)
+
+
+def random_document(rng: random.Random) -> str:
+    blocks = []
+    for _ in range(rng.randint(1, 8)):
+        template = rng.choice(BLOCK_TEMPLATES)
+        block = template.replace("{p}", "\n".join(random_line(rng) for _ in range(rng.randint(1, 3))))
+        while "{l}" in block:
+            block = block.replace("{l}", random_line(rng), 1)
+        blocks.append(block)
+
+    return "".join(block + rng.choice(("\n\n", "\n\n", "\n", "\n\n\n")) for block in blocks)
+
+
+def load_corpus(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line)["text"] for line in f if line.strip()]
+        return f.read().split("\n\n\n")
+
+
+def measure(function, texts: list[str], repeats: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(repeats):
+        for text in texts:
+            function(text)
+
+    return (time.perf_counter() - started_at) / repeats
+
+
+def markdown_text(text: str) -> str:
+    return BeautifulSoup(markdown.markdown(text), 'html.parser').get_text()
+
+
+def clean_text(text: str) -> str:
+    text = URL_PATTERN.sub('', text)
+    text = EMAIL_PATTERN.sub('', text)
+    return " ".join(text.split())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=2000, help="Number of random documents")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", default=None, help="JSONL file with `text` field or text file to add to corpus")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = SAMPLES + [random_document(rng) for _ in range(args.documents)]
+    if args.corpus is not None:
+        texts += load_corpus(args.corpus)
+
+    mismatches = 0
+    for i, text in enumerate(texts):
+        expected, actual = reference_preprocessing(text), preprocessing_text(text)
+        if expected != actual:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"Mismatch in document {i}:\n{text!r}\n  expected: {expected!r}\n  actual:   {actual!r}\n")
+
+    characters = sum(map(len, texts))
+    print(f"{len(texts)} documents, {characters} characters, {mismatches} mismatches")
+
+    translated = [text.translate(TRANSLATION_TABLE) for text in texts]
+    extracted = [markdown_text(text) for text in translated]
+    timings = (
+        ("previous", measure(reference_preprocessing, texts, args.repeats)),
+        ("preprocessing", measure(preprocessing_text, texts, args.repeats)),
+        ("  homoglyphs, previous", measure(
+            lambda text: ''.join(HOMOGLYPH_MAP.get(char, char) for char in text.replace('\u200B', '')),
+            texts,
+            args.repeats,
+        )),
+        ("  homoglyphs", measure(lambda text: text.translate(TRANSLATION_TABLE), texts, args.repeats)),
+        ("  markdown+bs4", measure(markdown_text, translated, args.repeats)),
+        ("  urls+whitespace", measure(clean_text, extracted, args.repeats)),
+    )
+
+    print(f"\n{'implementation':>22} {'total ms':>10} {'us/doc':>8} {'MB/s':>7}")
+    for name, seconds in timings:
+        print(f"{name:>22} {seconds * 1000:>10.1f} {seconds / len(texts) * 1e6:>8.1f} {characters / seconds / 1e6:>7.2f}")
+    print(f"speedup: {timings[0][1] / timings[1][1]:.2f}x")
+
+    if mismatches:
+        raise SystemExit(f"{mismatches} documents differ from the reference implementation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark of priority lanes of the inference executor.
+
+Bulk clients keep submitting large documents while one interactive client submits short texts one by one,
+all through `InferenceExecutor` into a micro-batching `AggregatedDetector`. Reports p50/p95 latency of
+interactive requests and bulk throughput with one shared lane and with separate interactive and bulk lanes.
+Runs offline on the model fixture of `benchmarks/fixtures.py`.
+
+Usage: python benchmarks/priority_lanes.py --bulk-clients 6 --bulk-chars 50000 --duration 20
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from fixtures import build_fixture, make_text
+
+from generated_text_detector.utils.aggregated_detector import AggregatedDetector
+from generated_text_detector.utils.executor import InferenceExecutor
+
+
+LANES = {
+    "interactive": {"weight": 4},
+    "bulk": {"weight": 1, "max_running": 1},
+}
+
+
+async def run_load(
+    detector: AggregatedDetector,
+    executor: InferenceExecutor,
+    interactive_lane: str | None,
+    bulk_lane: str | None,
+    bulk_texts: list[str],
+    interactive_texts: list[str],
+    bulk_clients: int,
+    duration_s: float
+) -> tuple[list[float], int]:
+    """Run bulk and interactive clients for `duration_s` seconds.
+
+    :return: Latencies of interactive requests in seconds and number of scored bulk documents
+    """
+    stop_at = time.monotonic() + duration_s
+    latencies = []
+    bulk_done = 0
+
+    async def bulk_client(offset: int) -> None:
+        nonlocal bulk_done
+        i = offset
+        while time.monotonic() < stop_at:
+            # Every request is a new text, so report cache does not help
+            await executor.run(detector.detect_report, f"{i} {bulk_texts[i % len(bulk_texts)]}", lane=bulk_lane)
+            bulk_done += 1
+            i += bulk_clients
+
+    async def interactive_client() -> None:
+        i = 0
+        while time.monotonic() < stop_at:
+            started_at = time.monotonic()
+            await executor.run(detector.detect_report, f"{i} {interactive_texts[i % len(interactive_texts)]}", lane=interactive_lane)
+            latencies.append(time.monotonic() - started_at)
+            i += 1
+            await asyncio.sleep(0.05)
+
+    await asyncio.gather(interactive_client(), *(bulk_client(i) for i in range(bulk_clients)))
+
+    return latencies, bulk_done
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default="/tmp/detector-fixture", help="Directory of the model fixture")
+    parser.add_argument("--bulk-clients", type=int, default=6, help="Number of concurrent bulk clients")
+    parser.add_argument("--bulk-chars", type=int, default=50000, help="Size of bulk documents")
+    parser.add_argument("--interactive-chars", type=int, default=1000, help="Size of interactive texts")
+    parser.add_argument("--workers", type=int, default=8, help="Number of executor workers")
+    parser.add_argument("--duration", type=float, default=20, help="Duration of every run in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    detector = AggregatedDetector(build_fixture(args.fixture), "cpu", micro_batching=True, max_batch_size=32)
+
+    rng = random.Random(args.seed)
+    bulk_texts = [make_text(rng, args.bulk_chars) for _ in range(16)]
+    interactive_texts = [make_text(rng, args.interactive_chars) for _ in range(16)]
+
+    print(f"{'executor':>10} {'requests':>9} {'p50, ms':>8} {'p95, ms':>8} {'max, ms':>8} {'bulk docs/s':>12}")
+    for name, lanes, interactive_lane, bulk_lane in (
+        ("one lane", None, None, None),
+        ("lanes", LANES, "interactive", "bulk"),
+    ):
+        executor = InferenceExecutor(args.workers, 1024, lanes=lanes)
+        latencies, bulk_done = asyncio.run(run_load(
+            detector,
+            executor,
+            interactive_lane,
+            bulk_lane,
+            bulk_texts,
+            interactive_texts,
+            args.bulk_clients,
+            args.duration,
+        ))
+        executor.shutdown()
+
+        ms = sorted(latency * 1000 for latency in latencies)
+        p95 = ms[min(int(0.95 * len(ms)), len(ms) - 1)]
+        print(f"{name:>10} {len(ms):>9} {statistics.median(ms):>8.0f} {p95:>8.0f} {ms[-1]:>8.0f} {bulk_done / args.duration:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Benchmark and agreement check of sentence segmenters.
+
+Compares the built-in regex segmenter with NLTK Punkt on generated documents, where Punkt is the reference,
+and on a corpus of hand-annotated English prose with abbreviations, initials, numbers, quotes and ellipses,
+where both are compared with annotations. Reports precision, recall and F1 of sentence boundaries, the share
+of chunks built by `split_by_chunks` that are identical to chunks built with Punkt, segmentation throughput
+and the cost of loading Punkt.
+Requires downloaded `punkt` data of `nltk`. Runs offline on the model fixture of `benchmarks/fixtures.py`.
+Exits with status 1 if F1 of the regex segmenter on any corpus is below `--min-f1`, or if the share of its chunks
+identical to chunks built with Punkt on generated documents is below `--min-agreement`. On prose Punkt itself
+misses annotated boundaries, so agreement with it is reported there but not checked; `tests/test_segmentation.py`
+checks it for the segmenter of the shipped config, which stays Punkt until the regex segmenter agrees on prose.
+
+Usage: python benchmarks/segmentation.py --chars 100000 --min-f1 0.95 --min-agreement 0.95
+"""
+import argparse
+import random
+import subprocess
+import sys
+import time
+
+from fixtures import build_fixture, make_text
+from transformers import RobertaTokenizerFast
+
+from generated_text_detector.utils.chunking import split_by_chunks
+from generated_text_detector.utils.segmentation import PunktSegmenter, RegexSegmenter, SentenceSegmenter
+
+
+# Paragraphs of hand-annotated sentences
+PROSE = (
+    (
+        "Dr. Watson arrived at 221B Baker St. shortly after noon.",
+        "He had been away for three weeks!",
+        "Holmes looked up from the desk and said: \"You have been in Afghanistan, I perceive.\"",
+        "The remark surprised him.",
+        "How could anyone know that?",
+    ),
+    (
+        "The U.S. economy grew by 2.5 percent in 2023, according to the report.",
+        "Analysts at J. P. Morgan expected a slowdown...",
+        "It did not happen.",
+        "Growth was driven by consumer spending, e.g. travel and dining, and by investment in manufacturing.",
+    ),
+    (
+        "Prof. Hinton's 2012 paper (see Fig. 2 and Sec. 4) changed the field.",
+        "Neural networks, once dismissed as impractical, became the default approach.",
+        "\"Deep learning works,\" he said.",
+        "Few people disagreed after that.",
+    ),
+    (
+        "Mix the flour, sugar, eggs, etc. in a large bowl.",
+        "Bake for 25 min. at 180 degrees.",
+        "Let it cool down before serving!",
+        "Would you like more recipes?",
+        "Visit our site for details.",
+    ),
+    (
+        "On Jan. 5 the committee met again.",
+        "Mr. and Mrs. Smith attended, as did Ms. Lee from Acme Inc. and Gen. Brooks.",
+        "The vote was 7 to 2.",
+        "Everyone left early (the weather was bad).",
+    ),
+)
+
+
+def boundary_scores(reference: list[int], candidate: list[int]) -> tuple[int, int, int]:
+    """Count boundaries found by both segmenters, by the candidate only and by the reference only."""
+    reference, candidate = set(reference[1:]), set(candidate[1:])
+
+    return len(reference & candidate), len(candidate - reference), len(reference - candidate)
+
+
+def make_prose(rng: random.Random, num_chars: int) -> tuple[str, list[int]]:
+    """Join shuffled paragraphs of `PROSE` into a text of about `num_chars` characters.
+
+    :return: Text and annotated sentence starts
+    """
+    text = ""
+    starts = []
+    while len(text) < num_chars:
+        if text:
+            text += "\n\n"
+        for i, sentence in enumerate(rng.choice(PROSE)):
+            if i > 0:
+                text += " "
+            starts.append(len(text))
+            text += sentence
+
+    return text, starts
+
+
+def measure(segmenter: SentenceSegmenter, texts: list[str], repeats: int = 3) -> float:
+    started_at = time.perf_counter()
+    for _ in range(repeats):
+        for text in texts:
+            segmenter.sentence_starts(text)
+
+    return (time.perf_counter() - started_at) / repeats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default="/tmp/detector-fixture", help="Directory of the model fixture")
+    parser.add_argument("--chars", type=int, default=100000, help="Size of every document")
+    parser.add_argument("--texts", type=int, default=10, help="Number of documents of every corpus")
+    parser.add_argument("--max-len", type=int, default=512, help="Maximum number of tokens in one chunk")
+    parser.add_argument("--min-f1", type=float, default=0.95, help="Minimum F1 of regex sentence boundaries")
+    parser.add_argument(
+        "--min-agreement", type=float, default=0.95,
+        help="Minimum share of regex chunks identical to Punkt chunks on generated documents"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tokenizer = RobertaTokenizerFast.from_pretrained(build_fixture(args.fixture))
+    regex, punkt = RegexSegmenter(), PunktSegmenter()
+
+    rng = random.Random(args.seed)
+    generated = [make_text(rng, args.chars) for _ in range(args.texts)]
+    prose = [make_prose(rng, args.chars) for _ in range(args.texts)]
+
+    # Punkt is the reference on generated text, both segmenters are compared with annotations on prose
+    corpora = [
+        ("generated", "regex", regex, [(text, punkt.sentence_starts(text)) for text in generated]),
+        ("prose", "regex", regex, prose),
+        ("prose", "punkt", punkt, prose),
+    ]
+
+    failures = []
+    print(f"{'corpus':>10} {'segmenter':>10} {'precision':>10} {'recall':>8} {'F1':>7} {'same chunks':>12} {'MB/s':>7}")
+    for name, segmenter_name, segmenter, annotated in corpora:
+        both = extra = missed = 0
+        same_chunks = total_chunks = 0
+        for text, reference in annotated:
+            counts = boundary_scores(reference, segmenter.sentence_starts(text))
+            both, extra, missed = both + counts[0], extra + counts[1], missed + counts[2]
+
+            # Chunks are compared with the chunks of the segmenter in production so far
+            chunks = {(chunk.start, chunk.end) for chunk in split_by_chunks(text, tokenizer, args.max_len, segmenter=segmenter)}
+            punkt_chunks = {(chunk.start, chunk.end) for chunk in split_by_chunks(text, tokenizer, args.max_len, segmenter=punkt)}
+            same_chunks += len(chunks & punkt_chunks)
+            total_chunks += len(punkt_chunks)
+
+        precision = both / max(both + extra, 1)
+        recall = both / max(both + missed, 1)
+        f1 = 2 * precision * recall / max(precision + recall, 1e-9)
+        agreement = same_chunks / max(total_chunks, 1)
+        if segmenter is regex and f1 < args.min_f1:
+            failures.append(f"F1 of regex on {name} is {f1:.3f}, below {args.min_f1}")
+        if segmenter is regex and name == "generated" and agreement < args.min_agreement:
+            failures.append(f"Agreement of regex chunks with Punkt on {name} is {agreement:.1%}, below {args.min_agreement:.1%}")
+
+        texts = [text for text, _ in annotated]
+        speed = sum(len(text) for text in texts) / 1e6 / measure(segmenter, texts)
+
+        print(f"{name:>10} {segmenter_name:>10} {precision:>10.3f} {recall:>8.3f} {f1:>7.3f} "
+              f"{agreement:>12.1%} {speed:>7.1f}")
+
+    for name, code in (
+        ("regex", "import generated_text_detector.utils.segmentation as s; s.RegexSegmenter()"),
+        ("punkt", "import nltk; nltk.data.load('tokenizers/punkt/english.pickle')"),
+    ):
+        started_at = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        print(f"start-up of a fresh process with {name} segmenter: {(time.perf_counter() - started_at) * 1000:.0f} ms")
+
+    if failures:
+        sys.exit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
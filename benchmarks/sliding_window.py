@@ -0,0 +1,107 @@
+"""Benchmark of sliding-window chunking against sentence packing.
+
+Splits generated documents with sentence packing and with overlapping windows of several strides
+and reports the number of chunks, tokens sent to the model, end-to-end throughput and the share of
+tokens of unpunctuated text that reaches the model. Also compares the vectorized aggregation of chunk
+scores and of overlapping window scores with equivalent Python loops. Runs offline on the model fixture of `benchmarks/fixtures.py`.
+
+Usage: python benchmarks/sliding_window.py --chars 20000 --texts 20 --strides 510 255 128
+"""
+import argparse
+import random
+import time
+
+from fixtures import build_fixture, make_text
+
+from generated_text_detector.utils.aggregated_detector import AggregatedDetector
+from generated_text_detector.utils.chunking import TextChunk, merge_window_scores, split_by_chunks
+from generated_text_detector.utils.text_detector import GeneratedTextDetector
+
+
+def loop_mean(chunk_scores: list[tuple[str, float]]) -> float:
+    """Length-weighted mean of scores computed the way `AggregatedDetector` did before vectorization."""
+    weighted_scores_sum = 0.0
+    total_weights = 0
+    for chunk, score in chunk_scores:
+        weighted_scores_sum += score * len(chunk)
+        total_weights += len(chunk)
+
+    return weighted_scores_sum / total_weights
+
+
+def loop_merge(chunks: list[TextChunk], scores: list[float], stride: int) -> list[float]:
+    """Mean score of every window segment computed token by token."""
+    num_tokens = (len(chunks) - 1) * stride + len(chunks[-1].input_ids)
+    score_sums = [0.0] * num_tokens
+    coverage = [0] * num_tokens
+    for i, (chunk, score) in enumerate(zip(chunks, scores)):
+        for token in range(i * stride, i * stride + len(chunk.input_ids)):
+            score_sums[token] += score
+            coverage[token] += 1
+
+    starts = [i * stride for i in range(len(chunks))] + [num_tokens]
+    return [
+        sum(score_sums[token] / coverage[token] for token in range(start, end)) / (end - start)
+        for start, end in zip(starts, starts[1:])
+    ]
+
+
+def time_ms(function, *args, repeat: int = 20) -> float:
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        function(*args)
+
+    return (time.perf_counter() - started_at) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default="/tmp/detector-fixture", help="Directory of the model fixture")
+    parser.add_argument("--chars", type=int, default=20000, help="Size of every document")
+    parser.add_argument("--texts", type=int, default=20, help="Number of documents")
+    parser.add_argument("--strides", type=int, nargs="+", default=[510, 255, 128], help="Window strides in tokens")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fixture = build_fixture(args.fixture)
+    rng = random.Random(args.seed)
+    texts = [make_text(rng, args.chars) for _ in range(args.texts)]
+    unpunctuated = [text.translate(str.maketrans("", "", ".!?")) for text in texts]
+
+    print(f"{'chunking':>16} {'chunks':>7} {'tokens':>8} {'texts/s':>8} {'unpunctuated coverage':>22}")
+    for stride in [None, *args.strides]:
+        detector = GeneratedTextDetector(fixture, device="cpu", window_stride=stride)
+        tokenizer = detector.tokenizer
+
+        chunks = [detector.prepare(text) for text in texts]
+        num_chunks = sum(len(text_chunks) for text_chunks in chunks)
+        num_tokens = sum(len(chunk.input_ids) for text_chunks in chunks for chunk in text_chunks)
+
+        started_at = time.perf_counter()
+        detector.detect_batch(texts)
+        throughput = len(texts) / (time.perf_counter() - started_at)
+
+        # Share of tokens of text without sentence boundaries that reach the model
+        covered = total = 0
+        for text in unpunctuated:
+            text_chunks = split_by_chunks(text, tokenizer, detector.max_len, window_stride=stride)
+            merged = detector.merge(text_chunks, [0.0] * len(text_chunks))
+            covered += sum(len(chunk.input_ids) for chunk, _ in merged)
+            total += len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+        name = "sentences" if stride is None else f"stride {stride}"
+        print(f"{name:>16} {num_chunks:>7} {num_tokens:>8} {throughput:>8.2f} {covered / total:>22.1%}")
+
+    chunk_scores = [(text[:rng.randint(1, 2000)], rng.random()) for text in texts for _ in range(500)]
+    vectorized = AggregatedDetector._AggregatedDetector__aggregate_scores
+    print(f"aggregation of {len(chunk_scores)} chunks: python loop {time_ms(loop_mean, chunk_scores):.2f} ms, "
+          f"numpy {time_ms(vectorized, chunk_scores):.2f} ms")
+
+    stride = args.strides[-1]
+    windows = split_by_chunks(texts[0], tokenizer, detector.max_len, window_stride=stride)
+    scores = [rng.random() for _ in windows]
+    print(f"merge of {len(windows)} windows with stride {stride}: python loop {time_ms(loop_merge, windows, scores, stride):.2f} ms, "
+          f"numpy {time_ms(merge_window_scores, windows, scores, stride):.2f} ms")
+
+if __name__ == "__main__":
+    main()
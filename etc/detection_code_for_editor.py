@@ -2,6 +2,9 @@ import json
 import requests
 import urllib.parse
 
+# One session for all calls keeps the connection to the service alive between button clicks
+session = requests.Session()
+
 
 def on_check_generation_score_button_click(path: List[Union[str, int]]):
     # Set loading while calling the API
@@ -9,7 +12,8 @@ def on_check_generation_score_button_click(path: List[Union[str, int]]):
 
     # Get completion value and call service
     completion_text = getValue(textarea_completion) # TODO Add here your textarea of block that you would like to check for generation
-    detection_report = call_detection_service(completion_text)
+    document_id = None # TODO Add here an ID of the item, same for every version of the completion, so that only edited chunks are scored again
+    detection_report = call_detection_service(completion_text, document_id)
 
     # Turn off the loading
     setLoading(False)
@@ -21,10 +25,12 @@ def on_check_generation_score_button_click(path: List[Union[str, int]]):
     return
 
 
-def call_detection_service(text: str) -> dict:
-    resp = requests.post(
+def call_detection_service(text: str, document_id: str | None = None) -> dict:
+    resp = session.post(
         url=urllib.parse.urljoin(URL, "detect"),
-        json={"text": text}
+        json={"text": text, "document_id": document_id},
+        # Editor calls are served ahead of bulk API calls
+        headers={"X-Request-Class": "interactive"}
     )
     if resp.status_code != 200:
         raise Exception(f"The service returned an unknown error\nStatus code: {resp.status_code}\nContent: {resp.content}")
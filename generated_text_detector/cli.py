@@ -0,0 +1,695 @@
+import argparse
+import csv
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import signal
+from typing import Iterator
+
+from generated_text_detector.utils.aggregated_detector import AggregatedDetector, split_text_and_code
+from generated_text_detector.utils.chunking import TextChunk, split_by_chunks
+from generated_text_detector.utils.model_registry import model_config, model_names
+from generated_text_detector.utils.preprocessing import normalize_text
+from generated_text_detector.utils.segmentation import SentenceSegmenter
+from generated_text_detector.utils.startup import resolve_model_path
+
+
+DEFAULT_DETECTOR_CONFIG_PATH = "etc/configs/detector_config.json"
+INPUT_FORMATS = ("jsonl", "csv", "parquet")
+# Values of the label field of evaluation sets, True for generated text
+LABEL_VALUES = {"1": True, "0": False, "true": True, "false": False, "generated": True, "human": False}
+
+# State of preprocessing worker processes, set by `_init_worker`
+_worker_tokenizer = None
+_worker_max_len = None
+_worker_preprocessing = None
+_worker_window_stride = None
+_worker_segmenter = None
+
+
+def _init_worker(
+    tokenizer,
+    max_len: int,
+    preprocessing: bool,
+    window_stride: int | None = None,
+    segmenter: SentenceSegmenter | None = None
+) -> None:
+    global _worker_tokenizer, _worker_max_len, _worker_preprocessing, _worker_window_stride, _worker_segmenter
+
+    _worker_tokenizer = tokenizer
+    _worker_max_len = max_len
+    _worker_preprocessing = preprocessing
+    _worker_window_stride = window_stride
+    _worker_segmenter = segmenter
+
+
+def _prepare_record(text: str) -> tuple[list[TextChunk], str] | str:
+    """Split record to text and code, preprocess and tokenize text chunks.
+    Runs in worker processes.
+
+    :param text: Input text
+    :type text: str
+    :return: Tokenized text chunks and combined code, or error message
+    :rtype: tuple[list[TextChunk], str] | str
+    """
+    try:
+        if not isinstance(text, str):
+            raise TypeError(f"Text must be a string, got {type(text).__name__}")
+
+        text, code = split_text_and_code(text)
+
+        chunks = []
+        if text.strip():
+            text = normalize_text(text, _worker_preprocessing)
+            chunks = split_by_chunks(
+                text,
+                _worker_tokenizer,
+                _worker_max_len,
+                window_stride=_worker_window_stride,
+                segmenter=_worker_segmenter,
+            )
+
+        return chunks, code
+    except Exception as exc:
+        return f"{type(exc).__name__}: {exc}"
+
+
+def read_records(path: os.PathLike, input_format: str) -> Iterator[dict]:
+    """Lazily read records from JSONL, CSV or Parquet file.
+
+    :param path: Path to input file
+    :type path: os.PathLike
+    :param input_format: One of `jsonl`, `csv` or `parquet`
+    :type input_format: str
+    :return: Records
+    :rtype: Iterator[dict]
+    """
+    if input_format == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif input_format == "csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+    elif input_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("Reading Parquet files requires `pyarrow`: pip install pyarrow") from exc
+
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unknown input format '{input_format}', expected one of {INPUT_FORMATS}")
+
+
+def load_checkpoint(path: os.PathLike) -> dict:
+    """Load scoring progress.
+
+    :param path: Path to checkpoint file
+    :type path: os.PathLike
+    :return: Number of processed input `rows` and byte `offset` of output file after them
+    :rtype: dict
+    """
+    if not os.path.exists(path):
+        return {"rows": 0, "offset": 0}
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: os.PathLike, rows: int, offset: int) -> None:
+    """Atomically save scoring progress.
+
+    :param path: Path to checkpoint file
+    :type path: os.PathLike
+    :param rows: Number of processed input rows
+    :type rows: int
+    :param offset: Byte offset of output file after processed rows
+    :type offset: int
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"rows": rows, "offset": offset}, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+
+
+def score_window(detector: AggregatedDetector, prepared: list) -> list[dict]:
+    """Score prepared records feeding the model with batches of chunks of similar length.
+
+    :param detector: Detector
+    :type detector: AggregatedDetector
+    :param prepared: Results of `_prepare_record` for every record
+    :type prepared: list
+    :return: Report for every record
+    :rtype: list[dict]
+    """
+    chunks = [
+        chunk
+        for record in prepared if not isinstance(record, str)
+        for chunk in record[0]
+    ]
+
+    return build_reports(detector, prepared, detector.text_detector.score(chunks))
+
+
+def build_reports(detector: AggregatedDetector, prepared: list, scores: list[float]) -> list[dict]:
+    """Build reports of prepared records from scores of their chunks.
+
+    :param detector: Detector
+    :type detector: AggregatedDetector
+    :param prepared: Results of `_prepare_record` for every record
+    :type prepared: list
+    :param scores: Scores of chunks of all records in order
+    :type scores: list[float]
+    :return: Report for every record
+    :rtype: list[dict]
+    """
+    scores = iter(scores)
+
+    reports = []
+    for record in prepared:
+        if isinstance(record, str):
+            reports.append({"error": record})
+            continue
+
+        record_chunks, code = record
+        merged = detector.text_detector.merge(record_chunks, [next(scores) for _ in record_chunks])
+        text_chunks = [(chunk.text, score) for chunk, score in merged]
+        try:
+            reports.append(detector.build_report(text_chunks, code))
+        except Exception as exc:
+            reports.append({"error": f"{type(exc).__name__}: {exc}"})
+
+    return reports
+
+
+def score(args: argparse.Namespace) -> None:
+    """Score input file and append reports to output JSONL file with checkpointing."""
+    import torch
+
+    with open(args.detector_config_path) as f:
+        detector_conf = model_config(json.load(f), args.model_name)
+
+    text_detector_params = dict(detector_conf.get("text_detector_params", {}))
+    text_detector_params["micro_batching"] = False
+    if args.batch_size is not None:
+        text_detector_params["max_batch_size"] = args.batch_size
+
+    device = args.device or ("cuda:0" if torch.cuda.is_available() else "cpu")
+    detector = AggregatedDetector(
+        text_detector_model_name_or_path = resolve_model_path(detector_conf),
+        code_default_score = detector_conf["code_default_probability"],
+        device = device,
+        **detector_conf.get("detector_params", {}),
+        **text_detector_params,
+    )
+    text_detector = detector.text_detector
+
+    input_format = args.input_format or os.path.splitext(args.input)[1].lstrip(".").lower()
+    checkpoint_path = f"{args.output}.checkpoint"
+    state = load_checkpoint(checkpoint_path) if args.resume else {"rows": 0, "offset": 0}
+    rows = state["rows"]
+
+    if rows:
+        logging.info(f"Resuming from row {rows}")
+
+    records = itertools.islice(read_records(args.input, input_format), rows, None)
+    initargs = (
+        text_detector.tokenizer,
+        text_detector.max_len,
+        text_detector.preprocessing,
+        text_detector.window_stride,
+        text_detector.segmenter,
+    )
+
+    with open(args.output, "a+b") as out:
+        # Drop reports written after the last checkpoint
+        out.truncate(state["offset"])
+        out.seek(0, os.SEEK_END)
+
+        def flush(window: list[dict], prepared: list) -> None:
+            nonlocal rows
+
+            reports = score_window(detector, prepared)
+            for i, (record, report) in enumerate(zip(window, reports)):
+                line = {"row": rows + i, "id": record.get(args.id_field), **report}
+                out.write(json.dumps(line).encode("utf-8") + b"\n")
+
+            out.flush()
+            os.fsync(out.fileno())
+            rows += len(window)
+            save_checkpoint(checkpoint_path, rows, out.tell())
+            logging.info(f"Scored {rows} rows")
+
+        def windows() -> Iterator[list[dict]]:
+            while window := list(itertools.islice(records, args.window_size)):
+                yield window
+
+        if args.workers == 0:
+            _init_worker(*initargs)
+            for window in windows():
+                flush(window, [_prepare_record(record.get(args.text_field)) for record in window])
+            return
+
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(args.workers, initializer=_init_worker, initargs=initargs) as pool:
+            pending = None
+
+            # Preprocessing of the next window overlaps with scoring of the current one
+            for window in windows():
+                texts = [record.get(args.text_field) for record in window]
+                job = pool.map_async(_prepare_record, texts, chunksize=args.chunksize)
+                if pending is not None:
+                    flush(pending[0], pending[1].get())
+                pending = (window, job)
+
+            if pending is not None:
+                flush(pending[0], pending[1].get())
+
+
+def parse_label(value) -> bool | None:
+    """Parse label of an evaluation record.
+
+    :param value: 0 or 1, boolean, or one of `LABEL_VALUES`
+    :type value: Any
+    :raises ValueError: If the value is not a known label
+    :return: True for generated text, None if there is no label
+    :rtype: bool | None
+    """
+    if value is None:
+        return None
+    if isinstance(value, (bool, int, float)) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in LABEL_VALUES:
+        return LABEL_VALUES[value.strip().lower()]
+
+    raise ValueError(f"Unknown label {value!r}, expected 0 or 1")
+
+
+def evaluate_cascade(args: argparse.Namespace) -> None:
+    """Score a labeled file with the model alone and with the cascade, print their agreement, accuracy and speedup."""
+    import time
+    import torch
+
+    with open(args.detector_config_path) as f:
+        detector_conf = model_config(json.load(f), args.model_name)
+
+    text_detector_params = dict(detector_conf.get("text_detector_params", {}))
+    # Every chunk reaches the models in both runs
+    text_detector_params["micro_batching"] = False
+    text_detector_params["chunk_cache_size"] = 0
+    text_detector_params["inference_socket"] = None
+    if args.cascade_model is not None:
+        text_detector_params["cascade_model"] = args.cascade_model
+    if args.band is not None:
+        text_detector_params["cascade_band"] = args.band
+    if not text_detector_params.get("cascade_model"):
+        raise SystemExit("Cascade model is required: pass --cascade-model or set `cascade_model` in detector config")
+
+    device = args.device or ("cuda:0" if torch.cuda.is_available() else "cpu")
+    detector = AggregatedDetector(
+        text_detector_model_name_or_path = resolve_model_path(detector_conf),
+        code_default_score = detector_conf["code_default_probability"],
+        device = device,
+        **detector_conf.get("detector_params", {}),
+        **text_detector_params,
+    )
+    text_detector = detector.text_detector
+
+    input_format = args.input_format or os.path.splitext(args.input)[1].lstrip(".").lower()
+    records = list(read_records(args.input, input_format))
+    labels = [parse_label(record.get(args.label_field)) for record in records]
+
+    _init_worker(
+        text_detector.tokenizer,
+        text_detector.max_len,
+        text_detector.preprocessing,
+        text_detector.window_stride,
+        text_detector.segmenter,
+    )
+    prepared = [_prepare_record(record.get(args.text_field)) for record in records]
+    chunks = [
+        chunk
+        for record in prepared if not isinstance(record, str)
+        for chunk in record[0]
+    ]
+    logging.info(f"Scoring {len(chunks)} chunks of {len(records)} records")
+
+    def measure(cascade: bool) -> tuple[list[float], float]:
+        """Score all chunks `repeats` times, the first run also warms up allocators of the longest batches."""
+        times = []
+        for _ in range(args.repeats):
+            started_at = time.perf_counter()
+            scores = text_detector.score_chunks(chunks, cascade)
+            times.append(time.perf_counter() - started_at)
+
+        return scores, min(times)
+
+    reference_scores, reference_s = measure(cascade=False)
+    escalated_before = text_detector.cascade_stats.stats()["second_stage_chunks"]
+    cascade_scores, cascade_s = measure(cascade=True)
+    escalated = (text_detector.cascade_stats.stats()["second_stage_chunks"] - escalated_before) // args.repeats
+
+    pairs = [
+        (reference, cascade, label)
+        for reference, cascade, label in zip(
+            build_reports(detector, prepared, reference_scores),
+            build_reports(detector, prepared, cascade_scores),
+            labels,
+        )
+        if "error" not in reference and "error" not in cascade
+    ]
+    differences = [abs(reference["generated_score"] - cascade["generated_score"]) for reference, cascade, _ in pairs]
+    labeled = [(reference, cascade, label) for reference, cascade, label in pairs if label is not None]
+
+    def accuracy(index: int) -> float | None:
+        if not labeled:
+            return None
+        return sum((item[index]["generated_score"] > args.threshold) == item[2] for item in labeled) / len(labeled)
+
+    summary = {
+        "records": len(records),
+        "scored_records": len(pairs),
+        "labeled_records": len(labeled),
+        "chunks": len(chunks),
+        "band": list(text_detector.cascade_band),
+        "escalated_chunks": escalated,
+        "escalation_rate": escalated / len(chunks) if chunks else 0.0,
+        "author_agreement": sum(reference["author"] == cascade["author"] for reference, cascade, _ in pairs) / max(len(pairs), 1),
+        "decision_agreement": sum(
+            (reference["generated_score"] > args.threshold) == (cascade["generated_score"] > args.threshold)
+            for reference, cascade, _ in pairs
+        ) / max(len(pairs), 1),
+        "mean_abs_score_difference": sum(differences) / max(len(differences), 1),
+        "max_abs_score_difference": max(differences, default=0.0),
+        "model_accuracy": accuracy(0),
+        "cascade_accuracy": accuracy(1),
+        "model_time_s": reference_s,
+        "cascade_time_s": cascade_s,
+        "speedup": reference_s / cascade_s if cascade_s else None,
+    }
+    print(json.dumps(summary, indent=4))
+
+
+def export_onnx(args: argparse.Namespace) -> None:
+    """Export detector checkpoint to ONNX model for the `onnx` backend."""
+    from generated_text_detector.utils.backends import export_onnx as export
+    from generated_text_detector.utils.model.roberta_classifier import RobertaClassifier
+
+    model_name_or_path = args.model
+    if model_name_or_path is None:
+        with open(args.detector_config_path) as f:
+            model_name_or_path = resolve_model_path(json.load(f))
+
+    export(RobertaClassifier.from_pretrained(model_name_or_path), args.output, args.quantize, args.opset)
+    logging.info(f"Exported {model_name_or_path} to {args.output}")
+
+
+def snapshot(args: argparse.Namespace) -> None:
+    """Save models with the full encoder config and tokenizer to local directories loaded without network access.
+    Without `output` every model of the detector config is saved to its `text_detector_snapshot`.
+    """
+    from transformers import RobertaTokenizerFast
+    from generated_text_detector.utils.model.roberta_classifier import RobertaClassifier
+
+    if args.output is None and args.model is not None:
+        raise ValueError("`output` is required with `--model`")
+
+    if args.output is not None and args.model is not None:
+        targets = [(args.model, args.output)]
+    else:
+        with open(args.detector_config_path) as f:
+            detector_conf = json.load(f)
+
+        if args.output is not None:
+            targets = [(detector_conf["text_detector_model"], args.output)]
+        else:
+            targets = []
+            for name in model_names(detector_conf):
+                conf = model_config(detector_conf, name)
+                if not conf.get("text_detector_snapshot"):
+                    raise ValueError(f"Model '{name}' has no `text_detector_snapshot` in detector config")
+                targets.append((conf["text_detector_model"], conf["text_detector_snapshot"]))
+
+    for model_name_or_path, output in targets:
+        # Saved config includes `roberta_config`, so loading the snapshot does not fetch the pretrained encoder
+        RobertaClassifier.from_pretrained(model_name_or_path).save_pretrained(output)
+        RobertaTokenizerFast.from_pretrained(model_name_or_path).save_pretrained(output)
+        logging.info(f"Saved snapshot of {model_name_or_path} to {output}")
+
+
+def inference_server(args: argparse.Namespace) -> None:
+    """Load the model once and serve chunk scores to HTTP workers over a Unix socket."""
+    import torch
+    from generated_text_detector.utils.inference_server import InferenceServer
+    from generated_text_detector.utils.text_detector import GeneratedTextDetector
+
+    with open(args.detector_config_path) as f:
+        detector_conf = model_config(json.load(f), args.model_name)
+
+    text_detector_params = dict(detector_conf.get("text_detector_params", {}))
+    socket_path = args.socket or text_detector_params.get("inference_socket")
+    if not socket_path:
+        raise SystemExit("Socket path is required: pass --socket or set `inference_socket` in detector config")
+    text_detector_params["inference_socket"] = None
+
+    device = args.device or ("cuda:0" if torch.cuda.is_available() else "cpu")
+    detector = GeneratedTextDetector(resolve_model_path(detector_conf), device, **text_detector_params)
+
+    server = InferenceServer(detector, socket_path)
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.close())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="generated-text-detector",
+        description="SuperAnnotate Generated Text Detection tools"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    score_parser = subparsers.add_parser(
+        "score",
+        help="Offline batch scoring of JSONL/CSV/Parquet file with resumable JSONL output"
+    )
+    score_parser.add_argument("input", help="Path to input file")
+    score_parser.add_argument(
+        "output",
+        help="Path to output JSONL file. Progress is checkpointed to `<output>.checkpoint`, "
+             "an interrupted run continues after the last checkpointed row"
+    )
+    score_parser.add_argument(
+        "--detector-config-path",
+        "-dc",
+        help=f"Path to a detector config file (default: {DEFAULT_DETECTOR_CONFIG_PATH})",
+        default=DEFAULT_DETECTOR_CONFIG_PATH,
+    )
+    score_parser.add_argument(
+        "--device",
+        "-d",
+        help="Device for inference model (default: cuda:0 if available, otherwise cpu)",
+        default=None,
+    )
+    score_parser.add_argument(
+        "--model-name",
+        help="Name of the model in `models` section of detector config (default: `default_model`)",
+        default=None,
+    )
+    score_parser.add_argument(
+        "--input-format",
+        help="Input format (default: inferred from file extension)",
+        choices=INPUT_FORMATS,
+        default=None,
+    )
+    score_parser.add_argument("--text-field", help="Field with text (default: text)", default="text")
+    score_parser.add_argument("--id-field", help="Field with record ID (default: id)", default="id")
+    score_parser.add_argument(
+        "--workers",
+        help="Number of preprocessing processes, 0 to preprocess in main process (default: CPU count)",
+        default=os.cpu_count(),
+        type=int,
+    )
+    score_parser.add_argument(
+        "--window-size",
+        help="Number of rows preprocessed, scored and checkpointed together (default: 4096)",
+        default=4096,
+        type=int,
+    )
+    score_parser.add_argument(
+        "--chunksize",
+        help="Number of rows sent to a preprocessing process at once (default: 64)",
+        default=64,
+        type=int,
+    )
+    score_parser.add_argument(
+        "--batch-size",
+        help="Number of chunks in one model pass (default: `max_batch_size` from detector config)",
+        default=None,
+        type=int,
+    )
+    score_parser.add_argument(
+        "--no-resume",
+        help="Ignore existing checkpoint and rewrite output from the first row",
+        dest="resume",
+        action="store_false",
+    )
+    score_parser.set_defaults(func=score)
+
+    export_parser = subparsers.add_parser(
+        "export-onnx",
+        help="Export detector checkpoint to ONNX model for the `onnx` backend"
+    )
+    export_parser.add_argument("output", help="Path to output ONNX file")
+    export_parser.add_argument(
+        "--detector-config-path",
+        "-dc",
+        help=f"Path to a detector config file (default: {DEFAULT_DETECTOR_CONFIG_PATH})",
+        default=DEFAULT_DETECTOR_CONFIG_PATH,
+    )
+    export_parser.add_argument(
+        "--model",
+        help="Model ID on the Hub or path to checkpoint (default: `text_detector_model` from detector config)",
+        default=None,
+    )
+    export_parser.add_argument(
+        "--quantize",
+        help="Quantize weights of linear layers to int8",
+        action="store_true",
+    )
+    export_parser.add_argument("--opset", help="ONNX opset version (default: 17)", default=17, type=int)
+    export_parser.set_defaults(func=export_onnx)
+
+    snapshot_parser = subparsers.add_parser(
+        "snapshot",
+        help="Save model and tokenizer to a local directory for fast startup without network access"
+    )
+    snapshot_parser.add_argument(
+        "output",
+        nargs="?",
+        help=(
+            "Path to snapshot directory, used instead of the Hub model when set as `text_detector_snapshot` in detector config "
+            "(default: every model of detector config is saved to its `text_detector_snapshot`)"
+        ),
+        default=None,
+    )
+    snapshot_parser.add_argument(
+        "--detector-config-path",
+        "-dc",
+        help=f"Path to a detector config file (default: {DEFAULT_DETECTOR_CONFIG_PATH})",
+        default=DEFAULT_DETECTOR_CONFIG_PATH,
+    )
+    snapshot_parser.add_argument(
+        "--model",
+        help="Model ID on the Hub or path to checkpoint (default: `text_detector_model` from detector config)",
+        default=None,
+    )
+    snapshot_parser.set_defaults(func=snapshot)
+
+    server_parser = subparsers.add_parser(
+        "inference-server",
+        help="Serve the model to HTTP workers over a Unix socket, so that it is loaded once for all of them"
+    )
+    server_parser.add_argument(
+        "--socket",
+        help="Path of the Unix socket (default: `inference_socket` from detector config)",
+        default=None,
+    )
+    server_parser.add_argument(
+        "--detector-config-path",
+        "-dc",
+        help=f"Path to a detector config file (default: {DEFAULT_DETECTOR_CONFIG_PATH})",
+        default=DEFAULT_DETECTOR_CONFIG_PATH,
+    )
+    server_parser.add_argument(
+        "--device",
+        "-d",
+        help="Device for inference model (default: cuda:0 if available, otherwise cpu)",
+        default=None,
+    )
+    server_parser.add_argument(
+        "--model-name",
+        help="Name of the model in `models` section of detector config (default: `default_model`)",
+        default=None,
+    )
+    server_parser.set_defaults(func=inference_server)
+
+    evaluate_parser = subparsers.add_parser(
+        "evaluate-cascade",
+        help="Compare the model cascade with the model alone on a labeled JSONL/CSV/Parquet file: agreement, accuracy and speedup"
+    )
+    evaluate_parser.add_argument("input", help="Path to input file with text and label (1 for generated, 0 for human) fields")
+    evaluate_parser.add_argument(
+        "--detector-config-path",
+        "-dc",
+        help=f"Path to a detector config file (default: {DEFAULT_DETECTOR_CONFIG_PATH})",
+        default=DEFAULT_DETECTOR_CONFIG_PATH,
+    )
+    evaluate_parser.add_argument(
+        "--model-name",
+        help="Name of the model in `models` section of detector config (default: `default_model`)",
+        default=None,
+    )
+    evaluate_parser.add_argument(
+        "--device",
+        "-d",
+        help="Device for inference models (default: cuda:0 if available, otherwise cpu)",
+        default=None,
+    )
+    evaluate_parser.add_argument(
+        "--cascade-model",
+        help="First-stage model ID on the Hub or path to checkpoint (default: `cascade_model` from detector config)",
+        default=None,
+    )
+    evaluate_parser.add_argument(
+        "--band",
+        help="Lower and upper bound of first-stage scores escalated to the model (default: `cascade_band` from detector config)",
+        nargs=2,
+        type=float,
+        default=None,
+    )
+    evaluate_parser.add_argument(
+        "--input-format",
+        help="Input format (default: inferred from file extension)",
+        choices=INPUT_FORMATS,
+        default=None,
+    )
+    evaluate_parser.add_argument("--text-field", help="Field with text (default: text)", default="text")
+    evaluate_parser.add_argument("--label-field", help="Field with label (default: label)", default="label")
+    evaluate_parser.add_argument(
+        "--threshold",
+        help="Score above which text is classified as generated (default: 0.5)",
+        default=0.5,
+        type=float,
+    )
+    evaluate_parser.add_argument(
+        "--repeats",
+        help="Number of timed runs of the model and of the cascade, the fastest one is reported (default: 3)",
+        default=3,
+        type=int,
+    )
+    evaluate_parser.set_defaults(func=evaluate_cascade)
+
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    args = parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
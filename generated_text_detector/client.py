@@ -0,0 +1,524 @@
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Sequence
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Responses retried after a pause: rate limited, bad gateway, overloaded or loading service
+RETRY_STATUS_CODES = frozenset((429, 502, 503))
+# Details of FastAPI responses to a route the server does not have
+MISSING_ROUTE_DETAILS = frozenset(("Not Found", "Method Not Allowed"))
+
+
+class DetectorClientError(RuntimeError):
+    """Raised when the detection service rejects a request or is unavailable after all retries.
+
+    :param message: Error message, `detail` of the response if there is one
+    :type message: str
+    :param status_code: HTTP status code, None if no response was received
+    :type status_code: int, optional
+    """
+    def __init__(self, message: str, status_code: int | None = None) -> None:
+        super().__init__(message if status_code is None else f"{status_code}: {message}")
+        self.status_code = status_code
+
+
+def _import_httpx():
+    try:
+        import httpx
+    except ImportError as exc:
+        raise ImportError("Detector client requires `httpx`: pip install httpx") from exc
+
+    return httpx
+
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+
+    return json.dumps(value).encode("utf-8")
+
+
+def _loads(content: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(content)
+
+    return json.loads(content)
+
+
+class _ClientBase:
+    """Settings and request building shared by `DetectorClient` and `AsyncDetectorClient`."""
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 30.0,
+        max_connections: int = 16,
+        max_concurrency: int = 8,
+        batch_size: int = 16,
+        retries: int = 3,
+        backoff_s: float = 0.1,
+        max_backoff_s: float = 5.0,
+        model: str | None = None,
+        request_class: str | None = None,
+        api_key: str | None = None,
+        deadline_ms: float | None = None
+    ) -> None:
+        assert max_concurrency > 0, "max_concurrency must be positive"
+        assert batch_size > 0, "batch_size must be positive"
+        assert retries >= 0, "retries must be non-negative"
+
+        self.httpx = _import_httpx()
+        self.base_url = base_url.rstrip("/") + "/"
+        self.timeout = timeout
+        self.limits = self.httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.model = model
+
+        self.headers = {"Content-Type": "application/json"}
+        if request_class is not None:
+            self.headers["X-Request-Class"] = request_class
+        if api_key is not None:
+            self.headers["X-API-Key"] = api_key
+        if deadline_ms is not None:
+            self.headers["X-Request-Deadline-Ms"] = str(deadline_ms)
+
+        # Whether the server has `/detect/batch`, None until a batch request succeeds or finds no such route
+        self.batch_supported = None
+
+
+    def _detect_payload(self, text: str, document_id: str | None, detailed: bool, model: str | None) -> dict:
+        payload = {"text": text}
+        if document_id is not None:
+            payload["document_id"] = document_id
+        if detailed:
+            payload["detailed"] = True
+        if model or self.model:
+            payload["model"] = model or self.model
+
+        return payload
+
+
+    def _batch_payload(self, texts: Sequence[str], model: str | None) -> dict:
+        payload = {"items": [{"text": text} for text in texts]}
+        if model or self.model:
+            payload["model"] = model or self.model
+
+        return payload
+
+
+    def _backoff(self, attempt: int, response: Any | None) -> float:
+        """Pause before the next attempt: exponential backoff with full jitter, at least `Retry-After` of the response.
+
+        :param attempt: Number of the failed attempt, from 0
+        :type attempt: int
+        :param response: Failed response, None if no response was received
+        :type response: httpx.Response, optional
+        :return: Pause in seconds
+        :rtype: float
+        """
+        pause = random.uniform(0, min(self.max_backoff_s, self.backoff_s * 2 ** attempt))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after is not None:
+            try:
+                pause = max(pause, min(float(retry_after), self.max_backoff_s))
+            except ValueError:
+                pass
+
+        return pause
+
+
+    def _result(self, response: Any) -> Any:
+        """Decode successful response or raise error with `detail` of the failed one."""
+        if response.status_code < 400:
+            return _loads(response.content)
+
+        try:
+            detail = _loads(response.content).get("detail", response.text)
+        except (ValueError, AttributeError):
+            detail = response.text
+
+        raise DetectorClientError(str(detail), response.status_code)
+
+
+    def _is_missing_route(self, response: Any) -> bool:
+        """Whether the response is the FastAPI answer to a route the server does not have.
+        404 of a proxy or a load balancer in front of the service does not disable batch calls.
+        """
+        if response.status_code not in (404, 405):
+            return False
+
+        try:
+            return _loads(response.content).get("detail") in MISSING_ROUTE_DETAILS
+        except (ValueError, AttributeError):
+            return False
+
+
+    @staticmethod
+    def _batch_reports(result: dict) -> list[dict]:
+        """Reports of `/detect/batch` response without the unused `id`, failed items keep their `error`."""
+        return [
+            {key: value for key, value in item.items() if key != "id" and value is not None}
+            for item in result["results"]
+        ]
+
+
+    @staticmethod
+    def _groups(texts: Sequence[str], size: int) -> list[Sequence[str]]:
+        return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+
+class DetectorClient(_ClientBase):
+    """Client of the detection service with a persistent pool of keep-alive connections.
+    Failed requests (connection errors, timeouts, 429, 502 and 503) are retried with exponential backoff and jitter.
+    `detect_many` coalesces texts into `/detect/batch` calls of `batch_size` texts sent by up to
+    `max_concurrency` threads, or into single calls if the server has no batch endpoint.
+    The client is thread-safe, use one instance for the whole process.
+
+    :param base_url: URL of the service, e.g. `http://localhost:8080/generated-text-detector`
+    :type base_url: str
+    :param timeout: Timeout of one attempt in seconds, defaults to 30.0
+    :type timeout: float, optional
+    :param max_connections: Maximum number of open connections, defaults to 16
+    :type max_connections: int, optional
+    :param max_concurrency: Maximum number of requests in flight of `detect_many`, defaults to 8
+    :type max_concurrency: int, optional
+    :param batch_size: Number of texts in one batch call, defaults to 16
+    :type batch_size: int, optional
+    :param retries: Number of retries after the first attempt, defaults to 3
+    :type retries: int, optional
+    :param backoff_s: Base pause before a retry, doubled with every attempt, defaults to 0.1
+    :type backoff_s: float, optional
+    :param max_backoff_s: Maximum pause before a retry, defaults to 5.0
+    :type max_backoff_s: float, optional
+    :param model: Model of requests without model, defaults to None (default model of the service)
+    :type model: str, optional
+    :param request_class: Priority lane of requests (`X-Request-Class`), e.g. `interactive`, defaults to None
+    :type request_class: str, optional
+    :param api_key: API key mapped to a lane by the service (`X-API-Key`), defaults to None
+    :type api_key: str, optional
+    :param deadline_ms: Time a request may wait in the service queue (`X-Request-Deadline-Ms`), defaults to None
+    :type deadline_ms: float, optional
+    :param transport: httpx transport replacing the network, e.g. `httpx.MockTransport` in tests, defaults to None
+    :type transport: httpx.BaseTransport, optional
+    """
+    def __init__(self, base_url: str, *args, transport: Any | None = None, **kwargs) -> None:
+        super().__init__(base_url, *args, **kwargs)
+
+        self.client = self.httpx.Client(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=self.limits,
+            headers=self.headers,
+            transport=transport,
+        )
+        self.__pool = None
+
+
+    def detect(self, text: str, document_id: str | None = None, detailed: bool = False, model: str | None = None) -> dict:
+        """Detect generated text.
+
+        :param text: Input text
+        :type text: str
+        :param document_id: ID of the document for incremental re-scoring of its versions, defaults to None
+        :type document_id: str, optional
+        :param detailed: Whether to include scores of chunks, defaults to False
+        :type detailed: bool, optional
+        :param model: Model name, defaults to None (`model` of the client)
+        :type model: str, optional
+        :raises DetectorClientError: If the service rejected the request or is unavailable
+        :return: Report with `generated_score` and `author`
+        :rtype: dict
+        """
+        return self._result(self.__post("detect", self._detect_payload(text, document_id, detailed, model)))
+
+
+    def detect_batch(self, texts: Sequence[str], model: str | None = None) -> list[dict]:
+        """Detect generated text of several texts in one call.
+
+        :param texts: Input texts
+        :type texts: Sequence[str]
+        :param model: Model name, defaults to None (`model` of the client)
+        :type model: str, optional
+        :raises DetectorClientError: If the service rejected the request or is unavailable
+        :return: Report or `error` of every text in order
+        :rtype: list[dict]
+        """
+        if self.batch_supported is not False:
+            response = self.__post("detect/batch", self._batch_payload(texts, model))
+            if not self._is_missing_route(response):
+                # A failed request says nothing about the route, it raises before the flag is set
+                reports = self._batch_reports(self._result(response))
+                self.batch_supported = True
+                return reports
+
+            self.batch_supported = False
+
+        return [self.__detect_or_error(text, model) for text in texts]
+
+
+    def detect_many(self, texts: Sequence[str], model: str | None = None) -> list[dict]:
+        """Detect generated text of many texts in concurrent batch calls.
+
+        :param texts: Input texts
+        :type texts: Sequence[str]
+        :param model: Model name, defaults to None (`model` of the client)
+        :type model: str, optional
+        :return: Report or `error` of every text in order
+        :rtype: list[dict]
+        """
+        if self.__pool is None:
+            self.__pool = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix="detector-client")
+
+        groups = self._groups(texts, self.batch_size)
+        # Batch support is checked with one group before fan-out, without it every text is a separate call.
+        # If that group failed, support is still unknown and the other groups try batch calls too
+        if self.batch_supported is None and groups:
+            first = self.__batch_or_errors(groups[0], model)
+            groups = groups[1:]
+        else:
+            first = []
+
+        if self.batch_supported is not False:
+            results = self.__pool.map(lambda group: self.__batch_or_errors(group, model), groups)
+            return first + [report for reports in results for report in reports]
+
+        rest = [text for group in groups for text in group]
+        return first + list(self.__pool.map(lambda text: self.__detect_or_error(text, model), rest))
+
+
+    def close(self) -> None:
+        """Close connections and threads."""
+        if self.__pool is not None:
+            self.__pool.shutdown(wait=True)
+        self.client.close()
+
+
+    def __enter__(self) -> "DetectorClient":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+    def __batch_or_errors(self, texts: Sequence[str], model: str | None) -> list[dict]:
+        try:
+            return self.detect_batch(texts, model)
+        except DetectorClientError as exc:
+            return [{"error": str(exc)} for _ in texts]
+
+
+    def __detect_or_error(self, text: str, model: str | None) -> dict:
+        try:
+            return self.detect(text, model=model)
+        except DetectorClientError as exc:
+            return {"error": str(exc)}
+
+
+    def __post(self, path: str, payload: dict) -> Any:
+        """Send request retrying failures.
+
+        :return: Last response
+        :rtype: httpx.Response
+        """
+        content = _dumps(payload)
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.client.post(path, content=content)
+            except self.httpx.TransportError as exc:
+                if attempt == self.retries:
+                    raise DetectorClientError(f"{type(exc).__name__}: {exc}") from exc
+                time.sleep(self._backoff(attempt, None))
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.retries:
+                return response
+            time.sleep(self._backoff(attempt, response))
+
+
+class AsyncDetectorClient(_ClientBase):
+    """asyncio client of the detection service with a persistent pool of keep-alive connections.
+    Takes the arguments of `DetectorClient`, and `batch_wait_ms`.
+    Concurrent `detect` calls without `document_id` and `detailed` are coalesced into `/detect/batch` calls:
+    a call waits up to `batch_wait_ms` for others to fill a batch of `batch_size` texts.
+    At most `max_concurrency` requests are in flight, failed requests are retried with exponential backoff and jitter.
+    Use one instance per event loop.
+
+    :param batch_wait_ms: Maximum time a `detect` call waits for its batch to fill, 0 disables coalescing, defaults to 2.0
+    :type batch_wait_ms: float, optional
+    :param transport: httpx transport replacing the network, e.g. `httpx.ASGITransport(app)`
+        to call the app in-process, defaults to None
+    :type transport: httpx.AsyncBaseTransport, optional
+    """
+    def __init__(self, base_url: str, *args, batch_wait_ms: float = 2.0, transport: Any | None = None, **kwargs) -> None:
+        super().__init__(base_url, *args, **kwargs)
+
+        self.batch_wait = batch_wait_ms / 1000
+        self.client = self.httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=self.limits,
+            headers=self.headers,
+            transport=transport,
+        )
+        self.__semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Model -> calls waiting for their batch: text and future of the report
+        self.__pending = {}
+
+
+    async def detect(self, text: str, document_id: str | None = None, detailed: bool = False, model: str | None = None) -> dict:
+        """Detect generated text, concurrent calls are coalesced into batch calls.
+
+        :param text: Input text
+        :type text: str
+        :param document_id: ID of the document for incremental re-scoring of its versions, defaults to None
+        :type document_id: str, optional
+        :param detailed: Whether to include scores of chunks, defaults to False
+        :type detailed: bool, optional
+        :param model: Model name, defaults to None (`model` of the client)
+        :type model: str, optional
+        :raises DetectorClientError: If the service rejected the request or is unavailable
+        :return: Report with `generated_score` and `author`
+        :rtype: dict
+        """
+        if document_id is not None or detailed or self.batch_wait <= 0 or self.batch_supported is False:
+            return self._result(await self.__post("detect", self._detect_payload(text, document_id, detailed, model)))
+
+        future = asyncio.get_running_loop().create_future()
+        calls = self.__pending.setdefault(model, [])
+        calls.append((text, future))
+        if len(calls) >= self.batch_size:
+            self.__flush(model)
+        elif len(calls) == 1:
+            asyncio.get_running_loop().call_later(self.batch_wait, self.__flush_if_waiting, model, calls)
+
+        report = await future
+        if "error" in report:
+            raise DetectorClientError(report["error"])
+
+        return report
+
+
+    async def detect_batch(self, texts: Sequence[str], model: str | None = None) -> list[dict]:
+        """Detect generated text of several texts in one call.
+
+        :param texts: Input texts
+        :type texts: Sequence[str]
+        :param model: Model name, defaults to None (`model` of the client)
+        :type model: str, optional
+        :raises DetectorClientError: If the service rejected the request or is unavailable
+        :return: Report or `error` of every text in order
+        :rtype: list[dict]
+        """
+        if self.batch_supported is not False:
+            response = await self.__post("detect/batch", self._batch_payload(texts, model))
+            if not self._is_missing_route(response):
+                # A failed request says nothing about the route, it raises before the flag is set
+                reports = self._batch_reports(self._result(response))
+                self.batch_supported = True
+                return reports
+
+            self.batch_supported = False
+
+        return list(await asyncio.gather(*(self.__detect_or_error(text, model) for text in texts)))
+
+
+    async def detect_many(self, texts: Sequence[str], model: str | None = None) -> list[dict]:
+        """Detect generated text of many texts in concurrent batch calls.
+
+        :param texts: Input texts
+        :type texts: Sequence[str]
+        :param model: Model name, defaults to None (`model` of the client)
+        :type model: str, optional
+        :return: Report or `error` of every text in order
+        :rtype: list[dict]
+        """
+        groups = self._groups(texts, self.batch_size)
+        results = await asyncio.gather(*(self.__batch_or_errors(group, model) for group in groups))
+
+        return [report for reports in results for report in reports]
+
+
+    async def aclose(self) -> None:
+        """Close connections."""
+        await self.client.aclose()
+
+
+    async def __aenter__(self) -> "AsyncDetectorClient":
+        return self
+
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+
+    def __flush_if_waiting(self, model: str | None, calls: list) -> None:
+        # The batch may have been sent full before the timer fired
+        if self.__pending.get(model) is calls:
+            self.__flush(model)
+
+
+    def __flush(self, model: str | None) -> None:
+        calls = self.__pending.pop(model)
+        asyncio.get_running_loop().create_task(self.__send(calls, model))
+
+
+    async def __send(self, calls: list, model: str | None) -> None:
+        try:
+            reports = await self.detect_batch([text for text, _ in calls], model)
+        except Exception as exc:
+            for _, future in calls:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, future), report in zip(calls, reports):
+            if not future.done():
+                future.set_result(report)
+
+
+    async def __batch_or_errors(self, texts: Sequence[str], model: str | None) -> list[dict]:
+        try:
+            return await self.detect_batch(texts, model)
+        except DetectorClientError as exc:
+            return [{"error": str(exc)} for _ in texts]
+
+
+    async def __detect_or_error(self, text: str, model: str | None) -> dict:
+        try:
+            return self._result(await self.__post("detect", self._detect_payload(text, None, False, model)))
+        except DetectorClientError as exc:
+            return {"error": str(exc)}
+
+
+    async def __post(self, path: str, payload: dict) -> Any:
+        """Send request retrying failures, at most `max_concurrency` requests are in flight.
+
+        :return: Last response
+        :rtype: httpx.Response
+        """
+        content = _dumps(payload)
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.__semaphore:
+                    response = await self.client.post(path, content=content)
+            except self.httpx.TransportError as exc:
+                if attempt == self.retries:
+                    raise DetectorClientError(f"{type(exc).__name__}: {exc}") from exc
+                await asyncio.sleep(self._backoff(attempt, None))
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.retries:
+                return response
+            await asyncio.sleep(self._backoff(attempt, response))
@@ -1,18 +1,122 @@
-from fastapi import APIRouter, Request, status
+import functools
+
+from fastapi import APIRouter, HTTPException, Request, status
 from starlette.responses import JSONResponse
 
-from generated_text_detector.controllers.schemas_type import ReportResponse, TextRequest
+from generated_text_detector.controllers.schemas_type import (
+    BatchReportResponse,
+    BatchTextRequest,
+    ReportResponse,
+    TextRequest,
+)
+from generated_text_detector.utils.streaming import BodyStreamingResponse, stream_reports
 
 router = APIRouter()
 
+
+def request_lane(meta: Request) -> dict:
+    """Choose executor lane and deadline of a request by its headers (see `request_lanes` section of the detector config).
+    A lane mapped to the API key takes precedence over the lane named in the lane header.
+
+    :param meta: Request
+    :type meta: Request
+    :raises HTTPException: 400 if the lane header names an unknown lane or the deadline header is not a number
+    :return: Keyword arguments `lane` and `deadline_ms` of `InferenceExecutor.run`
+    :rtype: dict
+    """
+    params = meta.app.lane_params
+    lanes = meta.app.executor.lanes
+
+    lane = None
+    api_key = meta.headers.get(params.get("api_key_header", "X-API-Key"))
+    if api_key is not None:
+        lane = params.get("api_keys", {}).get(api_key)
+
+    header = params.get("header", "X-Request-Class")
+    if lane is None and header and header in meta.headers:
+        lane = meta.headers[header]
+        if lane not in lanes:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Unknown request class '{lane}', expected one of {lanes}")
+
+    deadline_ms = None
+    deadline_header = params.get("deadline_header", "X-Request-Deadline-Ms")
+    if deadline_header and deadline_header in meta.headers:
+        try:
+            deadline_ms = float(meta.headers[deadline_header])
+        except ValueError:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, f"{deadline_header} must be a number of milliseconds")
+
+    return {"lane": lane, "deadline_ms": deadline_ms}
+
+
 @router.post(
     "/detect",
     status_code=status.HTTP_200_OK,
-    description="Detect generated-text report. Return dict with score and final predict"
+    description="Detect generated-text report. Return dict with score and final predict. "
+                "With `document_id` only chunks changed since the previous version of the document are scored. "
+                "With `detailed` the report includes character offsets, token count and score of every chunk. "
+                "`model` chooses one of the served models, the default model is used without it. "
+                "Request class (lane) and deadline are chosen by headers, a request still queued at its deadline gets 504"
 )
 async def detect(request: TextRequest, meta: Request) -> ReportResponse:
     current_app = meta.app
-    detector = current_app.detector
+    registry = current_app.detector_loader.get()
+    model = registry.resolve(request.model)
+    executor = current_app.executor
     text = request.text
-    result = detector.detect_report(text)
+    result = await executor.run(
+        registry.call,
+        model,
+        "detect_report",
+        text,
+        request.document_id,
+        request.detailed,
+        **request_lane(meta),
+    )
     return JSONResponse(result, 200)
+
+
+@router.post(
+    "/detect/batch",
+    status_code=status.HTTP_200_OK,
+    description="Detect generated-text reports for a list of texts. Return report or error for every item"
+)
+async def detect_batch(request: BatchTextRequest, meta: Request) -> BatchReportResponse:
+    current_app = meta.app
+    registry = current_app.detector_loader.get()
+    model = registry.resolve(request.model)
+    executor = current_app.executor
+    texts = [item.text for item in request.items]
+    reports = await executor.run(registry.call, model, "detect_report_batch", texts, **request_lane(meta))
+    results = [
+        {"id": item.id, **report}
+        for item, report in zip(request.items, reports)
+    ]
+    return JSONResponse({"results": results}, 200)
+
+
+@router.post(
+    "/detect/stream",
+    status_code=status.HTTP_200_OK,
+    description="Detect generated-text reports for NDJSON body. Stream NDJSON report for every input line as it is scored"
+)
+async def detect_stream(
+    meta: Request,
+    text_field: str = "text",
+    id_field: str = "id",
+    model: str | None = None
+) -> BodyStreamingResponse:
+    current_app = meta.app
+    registry = current_app.detector_loader.get()
+    model = registry.resolve(model)
+    executor = current_app.executor
+    reports = stream_reports(
+        meta.stream(),
+        functools.partial(registry.call, model, "detect_report_batch"),
+        executor,
+        text_field=text_field,
+        id_field=id_field,
+        **request_lane(meta),
+        **current_app.streaming_params,
+    )
+    return BodyStreamingResponse(reports, status_code=200, media_type="application/x-ndjson")
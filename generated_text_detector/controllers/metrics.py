@@ -0,0 +1,18 @@
+from fastapi import APIRouter, status
+from starlette.responses import JSONResponse, PlainTextResponse
+
+from generated_text_detector.utils.metrics import METRICS
+
+router = APIRouter()
+
+@router.get(
+    "/metrics",
+    response_model=None,
+    status_code=status.HTTP_200_OK,
+    description="Stage latency histograms, request counters and runtime statistics in Prometheus text format"
+)
+def metrics():
+    if not METRICS.enabled:
+        return JSONResponse({"detail": "Metrics are disabled"}, 404)
+
+    return PlainTextResponse(METRICS.render(), 200, media_type="text/plain; version=0.0.4")
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Request, status
 from starlette.responses import JSONResponse
 
 router = APIRouter()
@@ -7,7 +7,32 @@ router = APIRouter()
     "/healthcheck",
     response_model=None,
     status_code=status.HTTP_200_OK,
-    description="Alive method"
+    description="Alive method, fails only if the detector failed to load"
 )
-def ping():
+def ping(meta: Request):
+    detector_loader = meta.app.detector_loader
+    if detector_loader.failed:
+        return JSONResponse({"healthy": False, "error": detector_loader.status()["error"]}, 503)
+
     return JSONResponse({"healthy": True}, 200)
+
+
+@router.get(
+    "/readiness",
+    response_model=None,
+    status_code=status.HTTP_200_OK,
+    description="Ready method, succeeds once the detector is loaded and warmed up"
+)
+def readiness(meta: Request):
+    detector_loader = meta.app.detector_loader
+    result = detector_loader.status()
+
+    # Workers of a shared inference server are ready only while the server answers
+    detector = detector_loader.get().peek() if result["ready"] else None
+    if detector is not None:
+        remote = detector.text_detector.remote
+        if remote is not None and not remote.ping():
+            result["ready"] = False
+            result["error"] = f"Inference server on {remote.socket_path} is not available"
+
+    return JSONResponse(result, 200 if result["ready"] else 503)
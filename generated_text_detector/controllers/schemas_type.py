@@ -5,8 +5,40 @@ from generated_text_detector.utils.author import Author
 
 class TextRequest(BaseModel):
     text: str
+    document_id: str | None = None
+    detailed: bool = False
+    model: str | None = None
+
+
+class ChunkReport(BaseModel):
+    start: int
+    end: int
+    tokens: int
+    score: float
 
 
 class ReportResponse(BaseModel):
     generated_score: float
     author: Author
+    chunks: list[ChunkReport] | None = None
+
+
+class BatchTextItem(BaseModel):
+    text: str
+    id: str | None = None
+
+
+class BatchTextRequest(BaseModel):
+    items: list[BatchTextItem]
+    model: str | None = None
+
+
+class BatchItemReport(BaseModel):
+    id: str | None = None
+    generated_score: float | None = None
+    author: Author | None = None
+    error: str | None = None
+
+
+class BatchReportResponse(BaseModel):
+    results: list[BatchItemReport]
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Request, status
+from starlette.responses import JSONResponse
+
+router = APIRouter()
+
+@router.get(
+    "/stats",
+    response_model=None,
+    status_code=status.HTTP_200_OK,
+    description="Runtime statistics of the service (executor load, micro-batching queue depth and batch fill, loaded models)"
+)
+def stats(meta: Request):
+    current_app = meta.app
+    result = {
+        "executor": current_app.executor.stats(),
+        **current_app.detector_loader.get().stats(),
+    }
+    return JSONResponse(result, 200)
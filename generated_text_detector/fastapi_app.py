@@ -1,15 +1,22 @@
 import argparse
+import functools
 import logging
 import json
 import os
 
-import torch
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
 
 from generated_text_detector.controllers.detect import router as detect_router
+from generated_text_detector.controllers.metrics import router as metrics_router
 from generated_text_detector.controllers.ping import router as health_router
-from generated_text_detector.utils.aggregated_detector import AggregatedDetector
+from generated_text_detector.controllers.stats import router as stats_router
+from generated_text_detector.utils.executor import DeadlineExceededError, ExecutorOverloadedError, InferenceExecutor
+from generated_text_detector.utils.metrics import METRICS, MetricsMiddleware, configure_metrics
+from generated_text_detector.utils.model_registry import ModelRegistry, UnknownModelError, model_config, model_names
+from generated_text_detector.utils.startup import BackgroundLoader, ServiceNotReadyError, resolve_model_path
+from generated_text_detector.utils.text_detector import DetailedReportError
 
 with open("./version.txt") as f:
     version = f.read()
@@ -33,13 +40,49 @@ app.add_middleware(
 
 app.include_router(detect_router)
 app.include_router(health_router)
+app.include_router(stats_router)
+app.include_router(metrics_router)
+
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(ExecutorOverloadedError)
+async def overloaded_handler(request: Request, exc: ExecutorOverloadedError):
+    return JSONResponse(
+        {"detail": str(exc)},
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(ServiceNotReadyError)
+async def not_ready_handler(request: Request, exc: ServiceNotReadyError):
+    return JSONResponse(
+        {"detail": str(exc)},
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "5"},
+    )
+
+
+@app.exception_handler(DeadlineExceededError)
+async def deadline_handler(request: Request, exc: DeadlineExceededError):
+    return JSONResponse({"detail": str(exc)}, status.HTTP_504_GATEWAY_TIMEOUT)
+
+
+@app.exception_handler(UnknownModelError)
+async def unknown_model_handler(request: Request, exc: UnknownModelError):
+    return JSONResponse({"detail": str(exc)}, status.HTTP_404_NOT_FOUND)
+
+
+@app.exception_handler(DetailedReportError)
+async def detailed_report_handler(request: Request, exc: DetailedReportError):
+    return JSONResponse({"detail": str(exc)}, status.HTTP_400_BAD_REQUEST)
 
 
 def parse_args():
     DEFAULT_HOST = "0.0.0.0"
     DEFAULT_PORT = "8080"
     DEFAULT_DETECTOR_CONFIG_PATH = "etc/configs/detector_config.json"
-    DEFAULT_DEVICE = "cuda:0"
     
     parser = argparse.ArgumentParser(
         description="SuperAnnotate service for Generated Text Detection"
@@ -67,8 +110,8 @@ def parse_args():
     parser.add_argument(
         "--device",
         "-d",
-        help=f"Device for inference model.",
-        default=DEFAULT_DEVICE,
+        help=f"Device for inference model (default: cuda:0 if available, otherwise cpu)",
+        default=None,
         type=str,
     )
     return parser.parse_args()
@@ -85,9 +128,97 @@ def check_path(path: os.PathLike) -> os.PathLike|None:
     return path
 
 
+def load_detector(detector_conf: dict, device: str | None, model: str | None = None):
+    """Build the detector of one model, heavy modules (torch, transformers) are imported here and not on app import.
+
+    :param detector_conf: Detector config
+    :type detector_conf: dict
+    :param device: Device for inference model, None to use cuda:0 if available, otherwise cpu
+    :type device: str, optional
+    :param model: Model name from `models` section of the config, defaults to None (default model)
+    :type model: str, optional
+    :return: Loaded and warmed up detector
+    :rtype: AggregatedDetector
+    """
+    import torch
+    from generated_text_detector.utils.aggregated_detector import AggregatedDetector
+
+    if device is None:
+        device = "cuda:0" if torch.cuda.is_available() else "cpu"
+
+    conf = model_config(detector_conf, model)
+    text_detector_params = dict(conf.get("text_detector_params", {}))
+    # Models fine-tuned from the same encoder share one tokenizer instance
+    if detector_conf.get("model_registry", {}).get("shared_tokenizer", False):
+        text_detector_params.setdefault("tokenizer_name_or_path", resolve_model_path(model_config(detector_conf)))
+
+    return AggregatedDetector(
+        text_detector_model_name_or_path = resolve_model_path(conf),
+        code_default_score = conf["code_default_probability"],
+        device = device,
+        **conf.get("detector_params", {}),
+        **text_detector_params,
+    )
+
+
+def estimate_detector_memory(detector_conf: dict, device: str | None, model: str | None = None) -> int | None:
+    """Estimate memory of model weights of the detector of one model before loading it, from its checkpoint or ONNX file.
+
+    :param detector_conf: Detector config
+    :type detector_conf: dict
+    :param device: Device for inference model, None to use cuda:0 if available, otherwise cpu
+    :type device: str, optional
+    :param model: Model name from `models` section of the config, defaults to None (default model)
+    :type model: str, optional
+    :return: Size of weights in bytes, None if a checkpoint is not available locally
+    :rtype: int | None
+    """
+    import torch
+    from generated_text_detector.utils.backends import estimate_memory_bytes
+
+    if device is None:
+        device = "cuda:0" if torch.cuda.is_available() else "cpu"
+
+    conf = model_config(detector_conf, model)
+    params = conf.get("text_detector_params", {})
+    # Weights of a model served by an inference server are not in this process
+    if params.get("inference_socket") is not None:
+        return 0
+
+    backend = params.get("backend", "torch")
+    stages = [(resolve_model_path(conf), params.get("onnx_path"))]
+    if params.get("cascade_model") is not None:
+        stages.append((params["cascade_model"], params.get("cascade_onnx_path")))
+
+    sizes = [estimate_memory_bytes(backend, path, device, onnx_path) for path, onnx_path in stages]
+    return None if None in sizes else sum(sizes)
+
+
+def load_registry(detector_conf: dict, device: str | None) -> ModelRegistry:
+    """Build registry of models of the config and load the default model.
+
+    :param detector_conf: Detector config
+    :type detector_conf: dict
+    :param device: Device for inference models, None to use cuda:0 if available, otherwise cpu
+    :type device: str, optional
+    :return: Registry with loaded and warmed up default model
+    :rtype: ModelRegistry
+    """
+    registry = ModelRegistry(
+        model_names(detector_conf),
+        functools.partial(load_detector, detector_conf, device),
+        memory_budget_mb=detector_conf.get("model_registry", {}).get("memory_budget_mb"),
+        estimate=functools.partial(estimate_detector_memory, detector_conf, device),
+    )
+    registry.load()
+
+    return registry
+
+
 def create_app(
     path_to_detector_config: os.PathLike,
-    device: str
+    device: str | None = None,
+    background_load: bool = True
 ):
     
     with open(path_to_detector_config, 'r') as f:
@@ -95,13 +226,30 @@ def create_app(
 
     application = app
 
-    detector = AggregatedDetector(
-        text_detector_model_name_or_path = detector_conf["text_detector_model"],
-        code_default_score = detector_conf["code_default_probability"],
-        device = device,
-    )
-    
-    setattr(application, "detector", detector)
+    configure_metrics(detector_conf.get("metrics", {}).get("enabled", False))
+
+    executor = InferenceExecutor(**detector_conf.get("executor", {}))
+    lane_params = detector_conf.get("request_lanes", {})
+    unknown_lanes = {key: lane for key, lane in lane_params.get("api_keys", {}).items() if lane not in executor.lanes}
+    if unknown_lanes:
+        raise ValueError(f"`api_keys` of `request_lanes` map to unknown lanes {sorted(set(unknown_lanes.values()))}, expected one of {executor.lanes}")
+    detector_loader = BackgroundLoader(functools.partial(load_registry, detector_conf, device))
+
+    setattr(application, "detector_loader", detector_loader)
+    setattr(application, "executor", executor)
+    setattr(application, "streaming_params", detector_conf.get("streaming", {}))
+    setattr(application, "lane_params", lane_params)
+    application.add_event_handler("shutdown", executor.shutdown)
+
+    METRICS.clear_collectors()
+    METRICS.register_collector("detector", lambda: detector_loader.get().stats() if detector_loader.ready else {})
+    METRICS.register_collector("executor", executor.stats)
+
+    # Liveness probe is answered while the model is loading, readiness only once it is warm
+    if background_load:
+        detector_loader.start()
+    else:
+        detector_loader.load()
 
     class EndpointFilter(logging.Filter):
         def filter(self, record: logging.LogRecord) -> bool:
@@ -119,5 +267,4 @@ if __name__ == "__main__":
     app = create_app(args.detector_config_path, args.device)
     uvicorn.run(app, host=args.host, port=args.port)
 else:
-    device = "cuda:0" if torch.cuda.is_available() else "cpu"
-    app = create_app(os.environ.get("DETECTOR_CONFIG_PATH"), device)
+    app = create_app(os.environ.get("DETECTOR_CONFIG_PATH"))
@@ -1,7 +1,88 @@
-import re
+import math
+import random
+import threading
+
+import numpy as np
 
 from generated_text_detector.controllers.schemas_type import Author
-from generated_text_detector.utils.text_detector import GeneratedTextDetector
+from generated_text_detector.utils.cache import ResultCache, make_cache_key
+from generated_text_detector.utils.chunking import TextChunk
+from generated_text_detector.utils.code_blocks import scan_code_blocks, strip_span
+from generated_text_detector.utils.metrics import stage_timer
+from generated_text_detector.utils.preprocessing import OffsetMapping, normalize_text
+from generated_text_detector.utils.text_detector import DetailedReportError, GeneratedTextDetector
+
+
+# Lower bounds (exclusive) of generated scores of authors, from heuristics obtained from analysis on validation data
+AUTHOR_THRESHOLDS = (
+    (0.9, Author.LLM_GENERATED),
+    (0.7, Author.PROBABLY_LLM_GENERATED),
+    (0.3, Author.NOT_SURE),
+    (0.1, Author.PROBABLY_HUMAN_WRITTEN),
+)
+
+
+def split_text_and_code_spans(text: str) -> tuple[list[tuple[int, int]], str]:
+    """Split input text to text and code blocks keeping positions of text pieces.
+    Language and content of code blocks are text pieces too.
+
+    :param text: Input text
+    :type text: str
+    :return: Start and end of every stripped text piece in the input and combined code
+    :rtype: tuple(list[tuple[int, int]], str)
+    """
+    code_blocks = []
+    pieces = []
+    position = 0
+    for block in scan_code_blocks(text):
+        code_blocks.append(text[block.content[0]:block.content[1]])
+        # Text between blocks, then language and content of the block
+        pieces.append((position, block.start))
+        if block.language is not None:
+            pieces.append(block.language)
+        pieces.append(block.content)
+        position = block.end
+    pieces.append((position, len(text)))
+
+    spans = []
+    for start, end in pieces:
+        span = strip_span(text, start, end)
+        if span is not None:
+            spans.append(span)
+
+    return spans, "\n\n".join(code_blocks)
+
+
+def split_text_and_code(text: str) -> tuple[str, str]:
+    """Split input text to text and code blocks.
+    
+    :param text: Input text
+    :type text: str
+    :return: Combined pieces of text and code
+    :rtype: tuple(str, str)
+    """
+    spans, code = split_text_and_code_spans(text)
+    text = "\n".join(text[start:end] for start, end in spans)
+
+    return text, code
+
+
+def span_positions(spans: list[tuple[int, int]]) -> OffsetMapping:
+    """Map characters of text pieces joined with a separator to their positions in the input.
+
+    :param spans: Start and end of every text piece in the input
+    :type spans: list[tuple[int, int]]
+    :return: Mapping of positions in the joined text to positions in the input,
+        a separator is mapped to the end of the preceding piece
+    :rtype: OffsetMapping
+    """
+    mapping = OffsetMapping()
+    position = 0
+    for start, end in spans:
+        mapping.add(position, start)
+        position += end - start + 1
+
+    return mapping
 
 
 class AggregatedDetector:
@@ -11,19 +92,74 @@ class AggregatedDetector:
     :type text_detector_model_name_or_path: str
     :param device: The device identifier string (e.g. `cpu` or `cuda`) on which the model will be loaded.
     :type device: str
+    :param code_default_score: Score assigned to code blocks, defaults to 0.5
+    :type code_default_score: float, optional
+    :param early_exit: Whether to stop scoring chunks of a long text once the confidence band
+        of the aggregated score falls inside one `Author` bucket, defaults to False
+    :type early_exit: bool, optional
+    :param early_exit_z: Width of the confidence band in standard errors, defaults to 3.0
+    :type early_exit_z: float, optional
+    :param early_exit_min_chunks: Minimum number of scored chunks before early exit is considered, defaults to 8
+    :type early_exit_min_chunks: int, optional
+    :param report_cache_size: Maximum number of reports kept in memory, 0 disables the report cache, defaults to 0
+    :type report_cache_size: int, optional
+    :param report_cache_ttl_s: Lifetime of a cached report in seconds, defaults to None (no expiration)
+    :type report_cache_ttl_s: float, optional
+    :param report_cache_path: Path to SQLite file persisting reports across restarts, defaults to None
+    :type report_cache_path: str, optional
+    :param report_cache_disk_size: Maximum number of reports persisted in SQLite, defaults to None (no limit)
+    :type report_cache_disk_size: int, optional
+    :param text_detector_kwargs: Additional keyword arguments for GeneratedTextDetector (e.g. micro-batching settings)
+    :type text_detector_kwargs: dict
     """
     def __init__(
         self,
         text_detector_model_name_or_path: str,
         device: str,
-        code_default_score: float = 0.5
+        code_default_score: float = 0.5,
+        early_exit: bool = False,
+        early_exit_z: float = 3.0,
+        early_exit_min_chunks: int = 8,
+        report_cache_size: int = 0,
+        report_cache_ttl_s: float | None = None,
+        report_cache_path: str | None = None,
+        report_cache_disk_size: int | None = None,
+        **text_detector_kwargs
     ) -> None:
         
         self.code_default_score = code_default_score
 
-        self.text_detector = GeneratedTextDetector(text_detector_model_name_or_path, device=device)
+        self.early_exit = early_exit
+        self.early_exit_z = early_exit_z
+        self.early_exit_min_chunks = early_exit_min_chunks
+        self.__early_exit_lock = threading.Lock()
+        self.__early_exit_reports = 0
+        self.__early_exit_skipped_chunks = 0
+
+        self.text_detector = GeneratedTextDetector(
+            text_detector_model_name_or_path,
+            device=device,
+            **text_detector_kwargs
+        )
+
+        # Every setting a report depends on besides the input, reports cached under another config are not reused
+        self.__report_config = make_cache_key(
+            self.text_detector.model_id,
+            self.text_detector.chunking_id,
+            f"code_default_score={code_default_score}",
+            f"early_exit={early_exit},z={early_exit_z},min_chunks={early_exit_min_chunks}" if early_exit else "early_exit=False",
+            ",".join(f"{threshold}:{author.value}" for threshold, author in AUTHOR_THRESHOLDS),
+        )
 
-        self.code_block_pattern = re.compile(r"```(\w+)?\s*([\s\S]*?)\s*```")
+        self.report_cache = None
+        if report_cache_size > 0:
+            self.report_cache = ResultCache(
+                report_cache_size,
+                report_cache_ttl_s,
+                report_cache_path,
+                table="reports",
+                disk_max_size=report_cache_disk_size,
+            )
 
 
     def __split_text_and_code(self, text: str) -> tuple[str, str]:
@@ -34,36 +170,397 @@ class AggregatedDetector:
         :return: Combined pieces of text and code
         :rtype: tuple(str, str)
         """
-        code_blocks = self.code_block_pattern.findall(text)
-        code_blocks = [code for lang, code in code_blocks]
-        code = "\n\n".join(code_blocks)
-
-        texts = self.code_block_pattern.split(text)
-        text = "\n".join([t.strip() for t in texts if t and t.strip()])
-
-        return text, code
+        with stage_timer("split"):
+            return split_text_and_code(text)
 
         
-    def detect_report(self, text: str) -> dict:
+    def detect_report(self, text: str, document_id: str | None = None, detailed: bool = False) -> dict:
         """Detects if text is generated and prepare a report.
 
         :param text: Input text
         :type text: str
+        :param document_id: ID of the document the text is a version of. If set, chunks that did not change
+            since the previous version are not scored again, see `GeneratedTextDetector.detect_incremental`, defaults to None
+        :type document_id: str, optional
+        :param detailed: Whether to add every text chunk with its character offsets in the input text,
+            number of tokens and score to the report, defaults to False
+        :type detailed: bool, optional
+        :raises DetailedReportError: If `detailed` is set and the text detector applies full preprocessing,
+            whose output has no exact offsets in the input text
         :return: Text chunks with generated scores
-        :rtype: dict with keys: 'generated_score' and 'author'
+        :rtype: dict with keys: 'generated_score', 'author' and 'chunks' for detailed reports
+        """
+        if detailed and self.text_detector.preprocessing:
+            raise DetailedReportError("Detailed reports are not available with text preprocessing, chunks have no exact offsets")
+
+        positions = None
+        if detailed:
+            with stage_timer("split"):
+                spans, code = split_text_and_code_spans(text)
+            positions = span_positions(spans)
+            text = "\n".join(text[start:end] for start, end in spans)
+        else:
+            text, code = self.__split_text_and_code(text)
+
+        if self.report_cache is None:
+            return self.__detect_report(text, code, document_id, positions)
+
+        # Chunk offsets of detailed reports refer to the input text, so it is keyed as is.
+        # Other reports are keyed by normalized text, which is then scored without normalizing it again
+        if not detailed:
+            text = self.__normalize_text(text)
+
+        key = self.__report_key(text, code, incremental=document_id is not None, detailed=detailed)
+        report = self.report_cache.get(key)
+        if report is not None:
+            return self.__load_report(report)
+
+        report = self.__detect_report(text, code, document_id, positions, normalized=not detailed)
+        self.report_cache.put(key, self.__dump_report(report))
+
+        return report
+
+
+    def __detect_report(
+        self,
+        text: str,
+        code: str,
+        document_id: str | None = None,
+        positions: OffsetMapping | None = None,
+        normalized: bool = False
+    ) -> dict:
+        """Score text and build report bypassing the report cache.
+
+        :param text: Combined pieces of text
+        :type text: str
+        :param code: Combined code blocks
+        :type code: str
+        :param document_id: ID of the document for incremental re-scoring, defaults to None
+        :type document_id: str, optional
+        :param positions: Position in the input text of every character of `text`, given for detailed reports, defaults to None
+        :type positions: OffsetMapping, optional
+        :param normalized: Whether the text is already normalized with `normalize_text`, defaults to False
+        :type normalized: bool, optional
+        :return: Report
+        :rtype: dict with keys: 'generated_score', 'author' and 'chunks' for detailed reports
         """
-        text, code = self.__split_text_and_code(text)
+        if positions is not None:
+            return self.__detect_detailed_report(text, code, document_id, positions)
+
+        # Every chunk score is kept for the next version of the document, so early exit does not apply
+        if document_id is not None:
+            results = []
+            if text.strip():
+                results = self.text_detector.detect_incremental(text, document_id, normalized=normalized)
+            return self.build_report(results, code)
+
+        if self.early_exit and text.strip():
+            return self.__detect_report_early_exit(text, code, normalized)
 
         results = []
 
         if text.strip():
-            text_chunks = self.text_detector.detect(text)
+            text_chunks = self.text_detector.detect(text, normalized=normalized)
             results += text_chunks
-        if code.strip():
-            results += [(code, self.code_default_score)]
 
-        score = self.__aggregate_scores(results)
-        author = self.__determine_author(score)
+        return self.build_report(results, code)
+
+
+    def __detect_detailed_report(
+        self,
+        text: str,
+        code: str,
+        document_id: str | None,
+        positions: OffsetMapping
+    ) -> dict:
+        """Score text and build report with every text chunk.
+
+        :param text: Combined pieces of text
+        :type text: str
+        :param code: Combined code blocks
+        :type code: str
+        :param document_id: ID of the document for incremental re-scoring
+        :type document_id: str, optional
+        :param positions: Position in the input text of every character of `text`
+        :type positions: OffsetMapping
+        :return: Report, every chunk has `start` and `end` character offsets in the input text, `tokens` and `score`
+        :rtype: dict with keys: 'generated_score', 'author' and 'chunks'
+        """
+        detected = []
+        if text.strip():
+            detected = self.text_detector.detect_detailed(text, document_id)
+
+        report = self.build_report([(chunk.text, score) for chunk, score in detected], code)
+        report["chunks"] = [
+            {
+                "start": positions[chunk.start],
+                "end": positions[chunk.end - 1] + 1 if chunk.end > chunk.start else positions[chunk.start],
+                "tokens": len(chunk.input_ids),
+                "score": score,
+            }
+            for chunk, score in detected
+        ]
+
+        return report
+
+
+    def __detect_report_early_exit(self, text: str, code: str, normalized: bool = False) -> dict:
+        """Score text chunks in random order batch by batch and stop as soon as
+        the confidence band of the final aggregated score lies inside one `Author` bucket.
+
+        :param text: Combined pieces of text
+        :type text: str
+        :param code: Combined code blocks
+        :type code: str
+        :param normalized: Whether the text is already normalized with `normalize_text`, defaults to False
+        :type normalized: bool, optional
+        :return: Report, `generated_score` is estimated if scoring stopped early
+        :rtype: dict with keys: 'generated_score' and 'author'
+        """
+        chunks = self.text_detector.prepare(text, normalized=normalized)
+        weights = self.__chunk_weights(chunks)
+
+        known_weight = len(code) if code.strip() else 0
+        known_sum = known_weight * self.code_default_score
+        total_weight = known_weight + sum(weights)
+
+        # Random order makes every scored prefix a fair sample of the whole text
+        order = list(range(len(chunks)))
+        random.Random(len(chunks)).shuffle(order)
+
+        scores = {}
+        step = self.text_detector.max_batch_size
+
+        for start in range(0, len(order), step):
+            batch = order[start:start + step]
+            for i, score in zip(batch, self.text_detector.score([chunks[i] for i in batch])):
+                scores[i] = score
+
+            if len(scores) < self.early_exit_min_chunks or len(scores) == len(chunks) or total_weight == 0:
+                continue
+
+            sample = [(weights[i], score) for i, score in scores.items()]
+            low, estimate, high = self.__score_band(sample, len(chunks), known_sum, known_weight, total_weight)
+            author = self.__determine_author(estimate)
+
+            if self.__determine_author(low) == author == self.__determine_author(high):
+                with self.__early_exit_lock:
+                    self.__early_exit_reports += 1
+                    self.__early_exit_skipped_chunks += len(chunks) - len(scores)
+
+                return {
+                    "generated_score": estimate,
+                    "author": author
+                }
+
+        merged = self.text_detector.merge(chunks, [scores[i] for i in range(len(chunks))])
+        return self.build_report([(chunk.text, score) for chunk, score in merged], code)
+
+
+    def __chunk_weights(self, chunks: list[TextChunk]) -> list[int]:
+        """Weight of every chunk in the report: its number of characters.
+        Overlapping windows count only up to the start of the next window, like the segments `merge_window_scores`
+        turns them into, so the weights of a text add up to its length in the full report.
+
+        :param chunks: Chunks of one text built by `GeneratedTextDetector.prepare`
+        :type chunks: list[TextChunk]
+        :return: Weight of every chunk
+        :rtype: list[int]
+        """
+        if self.text_detector.window_stride is None or len(chunks) < 2:
+            return [len(chunk.text) for chunk in chunks]
+
+        weights = [
+            max(min(following.start, chunk.end), chunk.start) - chunk.start
+            for chunk, following in zip(chunks, chunks[1:])
+        ]
+        weights.append(len(chunks[-1].text))
+
+        return weights
+
+
+    def __score_band(
+        self,
+        sample: list[tuple[int, float]],
+        population_size: int,
+        known_sum: float,
+        known_weight: int,
+        total_weight: int
+    ) -> tuple[float, float, float]:
+        """Estimate the final weighted mean score and its confidence band from scored chunks.
+
+        :param sample: Weight and score of every scored chunk
+        :type sample: list[tuple[int, float]]
+        :param population_size: Total number of text chunks
+        :type population_size: int
+        :param known_sum: Weighted score of parts that are not scored by the model (code)
+        :type known_sum: float
+        :param known_weight: Weight of parts that are not scored by the model
+        :type known_weight: int
+        :param total_weight: Weight of the whole text
+        :type total_weight: int
+        :return: Lower bound, estimate and upper bound of the final score
+        :rtype: tuple[float, float, float]
+        """
+        sample_weight = sum(weight for weight, _ in sample)
+        sample_sum = sum(weight * score for weight, score in sample)
+        remaining_weight = total_weight - known_weight - sample_weight
+
+        if sample_weight == 0:
+            return 0.0, known_sum / total_weight, 1.0
+
+        mean = sample_sum / sample_weight
+        variance = sum(weight * (score - mean) ** 2 for weight, score in sample) / sample_weight
+
+        # Standard error of the mean with finite population correction
+        n = len(sample)
+        std_error = math.sqrt(variance / n * (1 - n / population_size))
+
+        def final_score(remaining_mean: float) -> float:
+            remaining_mean = min(max(remaining_mean, 0.0), 1.0)
+            return (known_sum + sample_sum + remaining_weight * remaining_mean) / total_weight
+
+        return (
+            final_score(mean - self.early_exit_z * std_error),
+            final_score(mean),
+            final_score(mean + self.early_exit_z * std_error),
+        )
+
+
+    def detect_report_batch(self, texts: list[str]) -> list[dict]:
+        """Detects if texts are generated and prepare a report for each of them.
+        Text chunks of all inputs are scored together in size-bounded model passes.
+        Failures are reported per item and do not fail the whole batch.
+
+        :param texts: Input texts
+        :type texts: list[str]
+        :return: Report for every input text
+        :rtype: list[dict] with keys: 'generated_score' and 'author', or 'error' for failed items
+        """
+        parts = []
+        for text in texts:
+            try:
+                parts.append(self.__split_text_and_code(text))
+            except Exception as exc:
+                parts.append(exc)
+
+        keys = [None] * len(texts)
+        cached = [None] * len(texts)
+        if self.report_cache is not None:
+            for i, part in enumerate(parts):
+                if isinstance(part, Exception):
+                    continue
+                try:
+                    parts[i] = (self.__normalize_text(part[0]), part[1])
+                    keys[i] = self.__report_key(*parts[i])
+                except Exception as exc:
+                    parts[i] = exc
+                    continue
+                cached[i] = self.report_cache.get(keys[i])
+
+        text_indices = [
+            i for i, part in enumerate(parts)
+            if not isinstance(part, Exception) and cached[i] is None and part[0].strip()
+        ]
+        detected = self.text_detector.detect_batch(
+            [parts[i][0] for i in text_indices],
+            normalized=self.report_cache is not None
+        )
+
+        text_chunks = [[] for _ in texts]
+        for i, chunks in zip(text_indices, detected):
+            text_chunks[i] = chunks
+
+        reports = []
+        for part, chunks, key, report in zip(parts, text_chunks, keys, cached):
+            if report is not None:
+                reports.append(self.__load_report(report))
+                continue
+
+            try:
+                if isinstance(part, Exception):
+                    raise part
+                if isinstance(chunks, Exception):
+                    raise chunks
+                report = self.build_report(chunks, part[1])
+            except Exception as exc:
+                reports.append({"error": f"{type(exc).__name__}: {exc}"})
+                continue
+
+            if key is not None:
+                self.report_cache.put(key, self.__dump_report(report))
+            reports.append(report)
+
+        return reports
+
+
+    def __normalize_text(self, text: str) -> str:
+        """Normalize combined pieces of text the way `GeneratedTextDetector.prepare` does.
+
+        :param text: Combined pieces of text
+        :type text: str
+        :return: Normalized text
+        :rtype: str
+        """
+        if not text.strip():
+            return ""
+
+        with stage_timer("preprocessing"):
+            return normalize_text(text, self.text_detector.preprocessing)
+
+
+    def __report_key(self, text: str, code: str, incremental: bool = False, detailed: bool = False) -> str:
+        """Cache key of report: config of the detector, text and code fully determine the report.
+
+        :param text: Normalized text, or combined pieces of text for detailed reports
+        :type text: str
+        :param code: Combined code blocks
+        :type code: str
+        :param incremental: Whether the report is built from content-defined chunks, defaults to False
+        :type incremental: bool, optional
+        :param detailed: Whether the report includes chunks, defaults to False
+        :type detailed: bool, optional
+        :return: Cache key
+        :rtype: str
+        """
+        return make_cache_key(
+            self.__report_config,
+            text if text.strip() else "",
+            code if code.strip() else "",
+            # Content-defined chunks score slightly differently, keys of other reports stay unchanged
+            *(("incremental",) if incremental else ()),
+            *(("detailed",) if detailed else ()),
+        )
+
+
+    @staticmethod
+    def __dump_report(report: dict) -> dict:
+        return {**report, "author": report["author"].value}
+
+
+    @staticmethod
+    def __load_report(report: dict) -> dict:
+        return {**report, "author": Author(report["author"])}
+
+
+    def build_report(self, text_chunks: list[tuple[str, float]], code: str) -> dict:
+        """Aggregate scored text chunks and code into a report.
+
+        :param text_chunks: Text chunks with generated scores
+        :type text_chunks: list[tuple[str, float]]
+        :param code: Combined code blocks
+        :type code: str
+        :return: Report
+        :rtype: dict with keys: 'generated_score' and 'author'
+        """
+        with stage_timer("aggregation"):
+            results = list(text_chunks)
+
+            if code.strip():
+                results += [(code, self.code_default_score)]
+
+            score = self.__aggregate_scores(results)
+            author = self.__determine_author(score)
 
         res = {
             "generated_score": score,
@@ -82,17 +579,16 @@ class AggregatedDetector:
         :return: The weighted mean of the scores.
         :rtype: float
         """
-        weighted_scores_sum = 0.0
-        total_weights = 0
-        
-        for chunk, score in chunk_scores:
-            weight = len(chunk)
-            
-            weighted_scores_sum += score * weight
-            total_weights += weight
-        
-        weighted_mean = weighted_scores_sum / total_weights
-    
+        count = len(chunk_scores)
+        weights = np.fromiter((len(chunk) for chunk, _ in chunk_scores), dtype=np.float64, count=count)
+        scores = np.fromiter((score for _, score in chunk_scores), dtype=np.float64, count=count)
+
+        total_weights = weights.sum()
+        if total_weights == 0:
+            raise ValueError("Nothing to score: text is empty")
+
+        weighted_mean = float(np.dot(weights, scores) / total_weights)
+
         return weighted_mean
 
     
@@ -109,16 +605,37 @@ class AggregatedDetector:
         """
         assert 0 <= generated_score <= 1
 
-        if generated_score > 0.9:
-            return Author.LLM_GENERATED
-        elif generated_score > 0.7:
-            return Author.PROBABLY_LLM_GENERATED
-        elif generated_score > 0.3:
-            return Author.NOT_SURE
-        elif generated_score > 0.1:
-            return Author.PROBABLY_HUMAN_WRITTEN
-        else:
-            return Author.HUMAN
+        for threshold, author in AUTHOR_THRESHOLDS:
+            if generated_score > threshold:
+                return author
+
+        return Author.HUMAN
+
+
+    def close(self) -> None:
+        """Release the model, the detector must not be used afterwards."""
+        self.text_detector.close()
+
+
+    def stats(self) -> dict:
+        """Collect runtime statistics of the detector.
+
+        :return: Statistics grouped by component
+        :rtype: dict
+        """
+        res = self.text_detector.stats()
+
+        if self.early_exit:
+            with self.__early_exit_lock:
+                res["early_exit"] = {
+                    "reports": self.__early_exit_reports,
+                    "skipped_chunks": self.__early_exit_skipped_chunks,
+                }
+
+        if self.report_cache is not None:
+            res["report_cache"] = self.report_cache.stats()
+
+        return res
     
 
 if __name__ == "__main__":
@@ -131,6 +648,8 @@ if __name__ == "__main__":
         text_detector_model_name_or_path = detector_config["text_detector_model"],
         code_default_score = detector_config["code_default_probability"],
         device = "cuda:0",
+        **detector_config.get("detector_params", {}),
+        **detector_config.get("text_detector_params", {}),
     )
 
     res = detector.detect_report("Hello, world!")
@@ -0,0 +1,355 @@
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+
+import torch
+import torch.nn as nn
+
+from generated_text_detector.utils.model.roberta_classifier import RobertaClassifier
+
+
+BACKENDS = ("torch", "onnx")
+# Weight files of checkpoints, in the order `from_pretrained` looks for them
+CHECKPOINT_FILES = ("model.safetensors", "pytorch_model.bin")
+# Operators of int8-quantized ONNX graphs
+QUANTIZED_OPS = frozenset(("DynamicQuantizeLinear", "MatMulInteger", "QLinearMatMul", "ConvInteger", "QuantizeLinear"))
+
+
+class InferenceBackend(ABC):
+    """Runtime executing the classifier on padded model inputs."""
+    @abstractmethod
+    def __call__(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        """Compute logits.
+
+        :param input_ids: Padded token IDs of shape [batch size, length]
+        :type input_ids: torch.Tensor
+        :param attention_mask: Attention mask of shape [batch size, length]
+        :type attention_mask: torch.Tensor
+        :return: Logits of shape [batch size, 1] on CPU or on the model device
+        :rtype: torch.Tensor
+        """
+
+
+    @property
+    def memory_bytes(self) -> int:
+        """Estimated memory taken by model weights in RAM or VRAM."""
+        return 0
+
+
+def enable_compile_cache(cache_dir: str) -> None:
+    """Persist artifacts of `torch.compile` in a directory, so that restarts reuse kernels compiled before.
+    Must be called before the first compilation in the process.
+
+    :param cache_dir: Cache directory, created if it does not exist
+    :type cache_dir: str
+    """
+    cache_dir = os.path.abspath(cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    os.environ["TORCHINDUCTOR_CACHE_DIR"] = cache_dir
+    os.environ["TRITON_CACHE_DIR"] = os.path.join(cache_dir, "triton")
+
+    import torch._inductor.config as inductor_config
+
+    # Besides generated kernels, cache whole compiled graphs keyed by graph, shapes and library versions
+    inductor_config.fx_graph_cache = True
+
+
+class TorchBackend(InferenceBackend):
+    """PyTorch `RobertaClassifier`, in half precision on CUDA, optionally compiled with `torch.compile`.
+
+    :param model_name_or_path: Either the `model_id` (string) of a model hosted on the Hub, or a path to a `directory` containing model weights
+    :type model_name_or_path: str
+    :param device: The device identifier string (e.g. `cpu` or `cuda`) on which the model will be loaded.
+    :type device: str
+    :param compile: Whether to compile the model, defaults to None (only on CUDA)
+    :type compile: bool, optional
+    :param compile_cache_dir: Directory persisting compiled artifacts between restarts, defaults to None
+    :type compile_cache_dir: str, optional
+    """
+    def __init__(
+        self,
+        model_name_or_path: str,
+        device: str,
+        compile: bool | None = None,
+        compile_cache_dir: str | None = None
+    ) -> None:
+        self.device = torch.device(device)
+        self.model = RobertaClassifier.from_pretrained(model_name_or_path)
+        self.model.to(self.device)
+        self.model.eval()
+
+        if compile is None:
+            compile = self.device.type == 'cuda'
+        self.compiled = compile
+
+        # Optimizing GPU inference
+        if self.device.type == 'cuda':
+            self.model = self.model.half()
+
+        if compile:
+            if compile_cache_dir is not None:
+                enable_compile_cache(compile_cache_dir)
+            self.model = torch.compile(self.model)
+
+
+    def __call__(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        with torch.inference_mode():
+            _, logits = self.model(
+                input_ids=input_ids.to(self.device),
+                attention_mask=attention_mask.to(self.device)
+            )
+
+        return logits
+
+
+    @property
+    def memory_bytes(self) -> int:
+        tensors = [*self.model.parameters(), *self.model.buffers()]
+        return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+class OnnxBackend(InferenceBackend):
+    """ONNX Runtime session on CPU, optionally with a dynamically int8-quantized model.
+    The model is exported from the PyTorch checkpoint on first use if `onnx_path` does not exist.
+    An existing model must match `quantize`.
+
+    :param model_name_or_path: Either the `model_id` (string) of a model hosted on the Hub, or a path to a `directory` containing model weights
+    :type model_name_or_path: str
+    :param onnx_path: Path to the ONNX model file
+    :type onnx_path: str
+    :param quantize: Whether to quantize weights to int8 when exporting, defaults to False
+    :type quantize: bool, optional
+    :param num_threads: Number of intra-op threads, defaults to None (ONNX Runtime default)
+    :type num_threads: int, optional
+    """
+    def __init__(
+        self,
+        model_name_or_path: str,
+        onnx_path: str,
+        quantize: bool = False,
+        num_threads: int | None = None
+    ) -> None:
+        try:
+            import onnxruntime as ort
+        except ImportError as exc:
+            raise ImportError("ONNX backend requires `onnxruntime`: pip install onnxruntime") from exc
+
+        if not os.path.exists(onnx_path):
+            export_onnx(RobertaClassifier.from_pretrained(model_name_or_path), onnx_path, quantize)
+        else:
+            quantized = onnx_quantized(onnx_path)
+            if quantized is None:
+                logging.warning(f"Quantization of {onnx_path} is unknown, assuming `onnx_quantize` {quantize}")
+            elif quantized != quantize:
+                raise ValueError(
+                    f"ONNX model {onnx_path} is {'' if quantized else 'not '}quantized, but `onnx_quantize` is {quantize}: "
+                    "remove the file to export it again or change `onnx_quantize`"
+                )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads is not None:
+            options.intra_op_num_threads = num_threads
+
+        self.onnx_path = onnx_path
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+
+
+    def __call__(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        logits, = self.session.run(
+            ["logits"],
+            {"input_ids": input_ids.numpy(), "attention_mask": attention_mask.numpy()}
+        )
+
+        return torch.from_numpy(logits)
+
+
+    @property
+    def memory_bytes(self) -> int:
+        # Weights are loaded from the model file as is
+        return os.path.getsize(self.onnx_path)
+
+
+class _LogitsOnly(nn.Module):
+    """Export wrapper returning only logits of `RobertaClassifier`."""
+    def __init__(self, model: RobertaClassifier) -> None:
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        _, logits = self.model(input_ids, attention_mask=attention_mask)
+        return logits
+
+
+def onnx_settings_path(onnx_path: str) -> str:
+    """Path of export settings saved next to the ONNX model."""
+    return f"{onnx_path}.json"
+
+
+def onnx_quantized(onnx_path: str) -> bool | None:
+    """Check whether the ONNX model is int8-quantized, by export settings saved next to it
+    or, for models exported elsewhere, by operators of its graph (requires `onnx`).
+
+    :param onnx_path: Path to the ONNX model file
+    :type onnx_path: str
+    :return: Whether the model is quantized, None if unknown
+    :rtype: bool | None
+    """
+    settings_path = onnx_settings_path(onnx_path)
+    if os.path.exists(settings_path):
+        with open(settings_path) as f:
+            return json.load(f)["quantize"]
+
+    try:
+        import onnx
+    except ImportError:
+        return None
+
+    graph = onnx.load(onnx_path, load_external_data=False).graph
+    return any(node.op_type in QUANTIZED_OPS for node in graph.node)
+
+
+def export_onnx(model: RobertaClassifier, onnx_path: str, quantize: bool = False, opset: int = 17) -> None:
+    """Export classifier to ONNX with dynamic batch and sequence axes.
+    Export settings are saved next to the model to `onnx_path` with `.json` suffix.
+
+    :param model: Classifier loaded from a PyTorch checkpoint
+    :type model: RobertaClassifier
+    :param onnx_path: Path of the resulting ONNX model file
+    :type onnx_path: str
+    :param quantize: Whether to quantize weights of linear layers to int8, defaults to False
+    :type quantize: bool, optional
+    :param opset: ONNX opset version, defaults to 17
+    :type opset: int, optional
+    """
+    model = _LogitsOnly(model.float().cpu().eval())
+    sample = torch.ones((2, 8), dtype=torch.long)
+    export_path = f"{onnx_path}.fp32" if quantize else onnx_path
+
+    os.makedirs(os.path.dirname(os.path.abspath(onnx_path)), exist_ok=True)
+
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            (sample, sample),
+            export_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=opset,
+        )
+
+    if quantize:
+        try:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+        except ImportError as exc:
+            raise ImportError("Quantization requires `onnxruntime`: pip install onnxruntime") from exc
+
+        quantize_dynamic(export_path, onnx_path, weight_type=QuantType.QInt8)
+        os.remove(export_path)
+
+    with open(onnx_settings_path(onnx_path), "w") as f:
+        json.dump({"quantize": quantize, "opset": opset}, f)
+
+
+def checkpoint_bytes(model_name_or_path: str) -> int | None:
+    """Size of weights of a local checkpoint or of a Hub checkpoint already in the local cache.
+
+    :param model_name_or_path: Either the `model_id` (string) of a model hosted on the Hub, or a path to a `directory` containing model weights
+    :type model_name_or_path: str
+    :return: Size of the weight file in bytes, None if it is not available locally
+    :rtype: int | None
+    """
+    if os.path.isdir(model_name_or_path):
+        paths = [os.path.join(model_name_or_path, name) for name in CHECKPOINT_FILES]
+    else:
+        from huggingface_hub import try_to_load_from_cache
+
+        paths = [try_to_load_from_cache(model_name_or_path, name) for name in CHECKPOINT_FILES]
+
+    for path in paths:
+        if isinstance(path, str) and os.path.exists(path):
+            return os.path.getsize(path)
+
+    return None
+
+
+def estimate_memory_bytes(
+    backend: str,
+    model_name_or_path: str,
+    device: str,
+    onnx_path: str | None = None
+) -> int | None:
+    """Estimate memory of backend weights before creating it, see `InferenceBackend.memory_bytes`.
+
+    :param backend: One of `torch` or `onnx`
+    :type backend: str
+    :param model_name_or_path: Either the `model_id` (string) of a model hosted on the Hub, or a path to a `directory` containing model weights
+    :type model_name_or_path: str
+    :param device: The device identifier string
+    :type device: str
+    :param onnx_path: Path to the ONNX model file, defaults to None
+    :type onnx_path: str, optional
+    :return: Size of weights in bytes, an upper bound for an ONNX model not exported yet, None if unknown
+    :rtype: int | None
+    """
+    if backend == "onnx" and onnx_path is not None and os.path.exists(onnx_path):
+        return os.path.getsize(onnx_path)
+
+    size = checkpoint_bytes(model_name_or_path)
+    # Checkpoints are saved in fp32, the torch backend runs in half precision on CUDA
+    if size is not None and backend == "torch" and torch.device(device).type == "cuda":
+        size //= 2
+
+    return size
+
+
+def create_backend(
+    backend: str,
+    model_name_or_path: str,
+    device: str,
+    onnx_path: str | None = None,
+    onnx_quantize: bool = False,
+    num_threads: int | None = None,
+    compile: bool | None = None,
+    compile_cache_dir: str | None = None
+) -> InferenceBackend:
+    """Create inference backend by name.
+
+    :param backend: One of `torch` or `onnx`
+    :type backend: str
+    :param model_name_or_path: Either the `model_id` (string) of a model hosted on the Hub, or a path to a `directory` containing model weights
+    :type model_name_or_path: str
+    :param device: The device identifier string, ONNX backend supports only `cpu`
+    :type device: str
+    :param onnx_path: Path to the ONNX model file, required by the ONNX backend
+    :type onnx_path: str, optional
+    :param onnx_quantize: Whether to quantize weights to int8 when exporting, defaults to False
+    :type onnx_quantize: bool, optional
+    :param num_threads: Number of intra-op threads of the ONNX backend, defaults to None
+    :type num_threads: int, optional
+    :param compile: Whether to compile the PyTorch model, defaults to None (only on CUDA)
+    :type compile: bool, optional
+    :param compile_cache_dir: Directory persisting compiled artifacts of the PyTorch backend, defaults to None
+    :type compile_cache_dir: str, optional
+    :return: Backend
+    :rtype: InferenceBackend
+    """
+    if backend == "torch":
+        return TorchBackend(model_name_or_path, device, compile, compile_cache_dir)
+
+    if backend == "onnx":
+        if torch.device(device).type != "cpu":
+            raise ValueError(f"ONNX backend runs on cpu only, got device '{device}'")
+        if onnx_path is None:
+            raise ValueError("ONNX backend requires `onnx_path`")
+        if compile:
+            raise ValueError("`compile` is supported by the torch backend only")
+        return OnnxBackend(model_name_or_path, onnx_path, onnx_quantize, num_threads)
+
+    raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
@@ -0,0 +1,359 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Sequence
+
+import torch
+
+
+def round_up_to_bucket(value: int, buckets: Sequence[int]) -> int:
+    """Round value up to the smallest bucket not less than it.
+
+    :param value: Value
+    :type value: int
+    :param buckets: Sorted bucket values
+    :type buckets: Sequence[int]
+    :return: Bucket value, or the value itself if it exceeds every bucket
+    :rtype: int
+    """
+    index = bisect_left(buckets, value)
+    return buckets[index] if index < len(buckets) else value
+
+
+def pad_input_ids(
+    input_ids: list[list[int]],
+    pad_token_id: int,
+    length: int | None = None,
+    batch_size: int | None = None
+) -> dict[str, torch.Tensor]:
+    """Pad token IDs to the longest sequence in the batch or to the fixed shape.
+
+    :param input_ids: Token IDs of every sequence (with special tokens)
+    :type input_ids: list[list[int]]
+    :param pad_token_id: ID of the padding token
+    :type pad_token_id: int
+    :param length: Sequence length to pad to, defaults to None (the longest sequence)
+    :type length: int, optional
+    :param batch_size: Number of rows to pad to by repeating the first sequence, defaults to None (no extra rows)
+    :type batch_size: int, optional
+    :return: Model inputs `input_ids` and `attention_mask` of shape [batch size, length]
+    :rtype: dict[str, torch.Tensor]
+    """
+    length = max(length or 0, max(len(ids) for ids in input_ids))
+    if batch_size is not None and batch_size > len(input_ids):
+        # Extra rows are real sequences, so they go through the same kernels; their scores are dropped
+        input_ids = input_ids + [input_ids[0]] * (batch_size - len(input_ids))
+
+    padded = torch.full((len(input_ids), length), pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(input_ids), length), dtype=torch.long)
+
+    for i, ids in enumerate(input_ids):
+        padded[i, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+        attention_mask[i, :len(ids)] = 1
+
+    return {"input_ids": padded, "attention_mask": attention_mask}
+
+
+def bucket_by_length(
+    lengths: list[int],
+    boundaries: Sequence[int],
+    max_batch_size: int,
+    max_batch_tokens: int | None = None,
+    batch_sizes: Sequence[int] | None = None
+) -> list[list[int]]:
+    """Group items of similar length into batches to cut padding waste.
+    Items are sorted by length and assigned to the smallest bucket boundary not shorter than them,
+    items longer than every boundary share the last bucket. Every bucket is split into batches
+    of at most `max_batch_size` items and at most `max_batch_tokens` tokens after padding.
+
+    :param lengths: Length of every item
+    :type lengths: list[int]
+    :param boundaries: Sorted upper bounds of bucket lengths
+    :type boundaries: Sequence[int]
+    :param max_batch_size: Maximum number of items in one batch
+    :type max_batch_size: int
+    :param max_batch_tokens: Maximum number of padded tokens in one batch, defaults to None (no limit)
+    :type max_batch_tokens: int, optional
+    :param batch_sizes: Sorted batch sizes batches are padded to, taken into account by `max_batch_tokens`, defaults to None
+    :type batch_sizes: Sequence[int], optional
+    :return: Batches of item indices
+    :rtype: list[list[int]]
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+
+    batches = []
+    batch = []
+    batch_bucket = None
+
+    for i in order:
+        bucket = bisect_left(boundaries, lengths[i])
+        # Items are sorted, so the batch is padded to the length of the item being added
+        size = len(batch) + 1 if batch_sizes is None else round_up_to_bucket(len(batch) + 1, batch_sizes)
+        over_budget = max_batch_tokens is not None and size * lengths[i] > max_batch_tokens
+        if batch and (bucket != batch_bucket or len(batch) >= max_batch_size or over_budget):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+        batch_bucket = bucket
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+class PaddingStats:
+    """Thread-safe counters of real and padded tokens passed to the model."""
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__passes = 0
+        self.__sequences = 0
+        self.__tokens = 0
+        self.__padded_tokens = 0
+
+
+    def update(self, lengths: list[int], padded_tokens: int | None = None) -> None:
+        """Account one model pass.
+
+        :param lengths: Lengths of sequences in the pass before padding
+        :type lengths: list[int]
+        :param padded_tokens: Size of the padded input, defaults to None (padded to the longest sequence)
+        :type padded_tokens: int, optional
+        """
+        with self.__lock:
+            self.__passes += 1
+            self.__sequences += len(lengths)
+            self.__tokens += sum(lengths)
+            self.__padded_tokens += padded_tokens or max(lengths) * len(lengths)
+
+
+    def stats(self) -> dict:
+        """Collect padding-efficiency statistics.
+
+        :return: Number of passes, sequences, real and padded tokens and their ratio
+        :rtype: dict
+        """
+        with self.__lock:
+            return {
+                "passes": self.__passes,
+                "sequences": self.__sequences,
+                "tokens": self.__tokens,
+                "padded_tokens": self.__padded_tokens,
+                "padding_efficiency": self.__tokens / self.__padded_tokens if self.__padded_tokens else 1.0,
+            }
+
+
+class _PendingRequest:
+    """Book-keeping for one submitted request whose chunks may be spread over several batches.
+
+    :param size: Number of chunks in the request
+    :type size: int
+    """
+    def __init__(self, size: int) -> None:
+        self.future = Future()
+        self.scores = [0.0] * size
+        self.remaining = size
+
+
+class MicroBatcher:
+    """Dynamic micro-batching scheduler.
+    Chunks submitted by concurrent callers are queued and grouped into shared model passes,
+    then every caller receives only the scores of its own chunks.
+    Queues of different priorities (lane weights, e.g. of interactive and bulk requests) share batch slots
+    in proportion to their priorities by stride scheduling, like lanes of `InferenceExecutor`,
+    so chunks of a light lane skip ahead of a heavy one without starving it.
+
+    :param model_pass: Function that scores a list of model inputs and returns one score per input
+    :type model_pass: Callable[[list], Sequence[float]]
+    :param max_batch_size: Maximum number of chunks in one model pass, defaults to 32
+    :type max_batch_size: int, optional
+    :param max_wait_ms: Maximum time the oldest queued chunk waits for the batch to fill, defaults to 5.0
+    :type max_wait_ms: float, optional
+    """
+    def __init__(
+        self,
+        model_pass: Callable[[list], Sequence[float]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ) -> None:
+        assert max_batch_size > 0, "max_batch_size must be positive"
+        assert max_wait_ms >= 0, "max_wait_ms must be non-negative"
+
+        self.model_pass = model_pass
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        # Priority -> queued chunks
+        self.__queues = {}
+        # Priority -> virtual time of stride scheduling, grows by 1 / priority with every chunk taken into a batch
+        self.__virtual_times = {}
+        self.__queued = 0
+        self.__condition = threading.Condition()
+        self.__closed = False
+
+        self.__stats_lock = threading.Lock()
+        self.__batches = 0
+        self.__chunks = 0
+        self.__requests = 0
+        self.__max_queue_depth = 0
+        self.__total_wait = 0.0
+
+        self.__worker = threading.Thread(target=self.__run, name="micro-batcher", daemon=True)
+        self.__worker.start()
+
+
+    def submit(self, chunks: list[Any], priority: int = 0) -> Future:
+        """Queue chunks of one request for scoring.
+
+        :param chunks: Model inputs of a single request
+        :type chunks: list
+        :param priority: Weight of the share of batch slots of the chunks, defaults to 0 (the same as 1)
+        :type priority: int, optional
+        :return: Future resolved with the list of scores in the order of `chunks`
+        :rtype: Future
+        """
+        request = _PendingRequest(len(chunks))
+
+        if not chunks:
+            request.future.set_result([])
+            return request.future
+
+        enqueued_at = time.monotonic()
+
+        with self.__condition:
+            if self.__closed:
+                raise RuntimeError("MicroBatcher is closed")
+
+            queue = self.__queues.setdefault(priority, deque())
+            # An idle queue joins at the virtual time of busy queues instead of catching up on the time it was idle
+            if not queue:
+                busy = [self.__virtual_times[p] for p, q in self.__queues.items() if q]
+                self.__virtual_times[priority] = max(self.__virtual_times.get(priority, 0.0), min(busy, default=0.0))
+            for index, chunk in enumerate(chunks):
+                queue.append((chunk, request, index, enqueued_at))
+
+            self.__queued += len(chunks)
+            queue_depth = self.__queued
+            self.__condition.notify()
+
+        with self.__stats_lock:
+            self.__requests += 1
+            self.__max_queue_depth = max(self.__max_queue_depth, queue_depth)
+
+        return request.future
+
+
+    def score(self, chunks: list[Any], priority: int = 0) -> list[float]:
+        """Blocking variant of `submit`.
+
+        :param chunks: Model inputs of a single request
+        :type chunks: list
+        :param priority: Weight of the share of batch slots of the chunks, defaults to 0 (the same as 1)
+        :type priority: int, optional
+        :return: Scores in the order of `chunks`
+        :rtype: list[float]
+        """
+        return self.submit(chunks, priority).result()
+
+
+    def close(self) -> None:
+        """Stop the worker thread after draining already queued chunks."""
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+
+        self.__worker.join()
+
+
+    def stats(self) -> dict:
+        """Collect queue-depth and batch-fill statistics.
+
+        :return: Scheduler statistics
+        :rtype: dict
+        """
+        with self.__condition:
+            queue_depth = self.__queued
+
+        with self.__stats_lock:
+            batches = self.__batches
+            chunks = self.__chunks
+
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queue_depth": queue_depth,
+                "max_queue_depth": self.__max_queue_depth,
+                "requests": self.__requests,
+                "batches": batches,
+                "chunks": chunks,
+                "mean_batch_size": chunks / batches if batches else 0.0,
+                "mean_batch_fill": chunks / (batches * self.max_batch_size) if batches else 0.0,
+                "mean_wait_ms": self.__total_wait * 1000 / chunks if chunks else 0.0,
+            }
+
+
+    def __next_batch(self) -> list[tuple]:
+        """Wait until a batch is full or the oldest chunk exceeded `max_wait`.
+
+        :return: Queued entries for the next model pass, empty list once closed and drained
+        :rtype: list[tuple]
+        """
+        with self.__condition:
+            while not self.__queued and not self.__closed:
+                self.__condition.wait()
+
+            if not self.__queued:
+                return []
+
+            deadline = min(queue[0][3] for queue in self.__queues.values() if queue) + self.max_wait
+            while self.__queued < self.max_batch_size and not self.__closed:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                self.__condition.wait(timeout)
+
+            batch = []
+            while len(batch) < min(self.max_batch_size, self.__queued):
+                # Queue with the least virtual time, the higher priority on a tie
+                priority = min(
+                    (p for p, queue in self.__queues.items() if queue),
+                    key=lambda p: (self.__virtual_times[p], -p)
+                )
+                batch.append(self.__queues[priority].popleft())
+                self.__virtual_times[priority] += 1 / max(priority, 1)
+
+            self.__queued -= len(batch)
+            return batch
+
+
+    def __run(self) -> None:
+        while True:
+            batch = self.__next_batch()
+            if not batch:
+                return
+
+            started_at = time.monotonic()
+            with self.__stats_lock:
+                self.__batches += 1
+                self.__chunks += len(batch)
+                self.__total_wait += sum(started_at - enqueued_at for *_, enqueued_at in batch)
+
+            try:
+                scores = self.model_pass([chunk for chunk, *_ in batch])
+                if hasattr(scores, "tolist"):
+                    scores = scores.tolist()
+            except Exception as exc:
+                for _, request, _, _ in batch:
+                    if not request.future.done():
+                        request.future.set_exception(exc)
+                continue
+
+            for (_, request, index, _), score in zip(batch, scores):
+                if request.future.done():
+                    continue
+                request.scores[index] = score
+                request.remaining -= 1
+                if request.remaining == 0:
+                    request.future.set_result(request.scores)
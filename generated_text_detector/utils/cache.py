@@ -0,0 +1,297 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from generated_text_detector.utils.metrics import CACHE_LOOKUPS, increment
+
+
+# Number of writes between purges of expired and excess rows of the persistent cache
+PURGE_INTERVAL = 1000
+
+def make_cache_key(*parts: str | bytes) -> str:
+    """Build content-addressed cache key.
+
+    :param parts: Pieces identifying the cached value (e.g. model ID, flags and normalized text)
+    :type parts: str | bytes
+    :return: Hex SHA-256 digest of the parts
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe in-process cache with least-recently-used eviction and optional time-to-live.
+
+    :param max_size: Maximum number of entries
+    :type max_size: int
+    :param ttl_s: Lifetime of an entry in seconds, defaults to None (entries never expire)
+    :type ttl_s: float, optional
+    """
+    def __init__(self, max_size: int, ttl_s: float | None = None) -> None:
+        assert max_size > 0, "max_size must be positive"
+
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+
+    def get(self, key: str) -> Any | None:
+        """Get cached value.
+
+        :param key: Cache key
+        :type key: str
+        :return: Value or None if it is missing or expired
+        :rtype: Any | None
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self.__entries[key]
+                return None
+
+            self.__entries.move_to_end(key)
+            return value
+
+
+    def put(self, key: str, value: Any) -> None:
+        """Store value evicting the least recently used entries above `max_size`.
+
+        :param key: Cache key
+        :type key: str
+        :param value: Value
+        :type value: Any
+        """
+        expires_at = time.monotonic() + self.ttl_s if self.ttl_s is not None else None
+
+        with self.__lock:
+            self.__entries[key] = (value, expires_at)
+            self.__entries.move_to_end(key)
+
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return len(self.__entries)
+
+
+class SQLiteCache:
+    """Persistent cache of JSON-serializable values in SQLite database, survives restarts.
+    Expired rows and the oldest rows above `max_rows` are deleted on opening and every `PURGE_INTERVAL` writes,
+    space of deleted rows is reused by new ones.
+
+    :param path: Path to database file
+    :type path: os.PathLike
+    :param table: Name of the table, allows several caches in one file, defaults to "cache"
+    :type table: str, optional
+    :param ttl_s: Lifetime of an entry in seconds, defaults to None (entries never expire)
+    :type ttl_s: float, optional
+    :param max_rows: Maximum number of rows, exceeded by at most `PURGE_INTERVAL` rows between purges,
+        defaults to None (no limit)
+    :type max_rows: int, optional
+    """
+    def __init__(
+        self,
+        path: os.PathLike,
+        table: str = "cache",
+        ttl_s: float | None = None,
+        max_rows: int | None = None
+    ) -> None:
+        assert table.isidentifier(), "table must be a valid identifier"
+        assert max_rows is None or max_rows > 0, "max_rows must be positive"
+
+        self.table = table
+        self.ttl_s = ttl_s
+        self.max_rows = max_rows
+
+        self.__lock = threading.Lock()
+        self.__writes = 0
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.__connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_created_at ON {table} (created_at)")
+
+        with self.__lock:
+            self.__purge()
+
+
+    def get(self, key: str) -> Any | None:
+        """Get cached value.
+
+        :param key: Cache key
+        :type key: str
+        :return: Value or None if it is missing or expired
+        :rtype: Any | None
+        """
+        with self.__lock:
+            row = self.__connection.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            value, created_at = row
+            if self.ttl_s is not None and created_at + self.ttl_s < time.time():
+                self.__connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+
+        return json.loads(value)
+
+
+    def put(self, key: str, value: Any) -> None:
+        """Store value.
+
+        :param key: Cache key
+        :type key: str
+        :param value: JSON-serializable value
+        :type value: Any
+        """
+        value = json.dumps(value)
+
+        with self.__lock:
+            self.__connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+
+            self.__writes += 1
+            if self.__writes % PURGE_INTERVAL == 0:
+                self.__purge()
+
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return self.__connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+    def __purge(self) -> None:
+        """Delete expired rows and the oldest rows above `max_rows`, called under the lock."""
+        if self.ttl_s is not None:
+            self.__connection.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (time.time() - self.ttl_s,))
+
+        if self.max_rows is not None:
+            self.__connection.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,)
+            )
+
+
+class ResultCache:
+    """Two-level cache: in-process LRU in front of an optional persistent SQLite store.
+    Values found only in the persistent store are promoted to the LRU.
+
+    :param max_size: Maximum number of entries in the in-process LRU
+    :type max_size: int
+    :param ttl_s: Lifetime of an entry in seconds, defaults to None (entries never expire)
+    :type ttl_s: float, optional
+    :param path: Path to SQLite database file, defaults to None (no persistent store)
+    :type path: os.PathLike, optional
+    :param table: Name of the table in the SQLite database, defaults to "cache"
+    :type table: str, optional
+    :param disk_max_size: Maximum number of entries in the persistent store, defaults to None (no limit)
+    :type disk_max_size: int, optional
+    """
+    def __init__(
+        self,
+        max_size: int,
+        ttl_s: float | None = None,
+        path: os.PathLike | None = None,
+        table: str = "cache",
+        disk_max_size: int | None = None
+    ) -> None:
+        self.table = table
+        self.memory = LRUCache(max_size, ttl_s)
+        self.disk = SQLiteCache(path, table, ttl_s, disk_max_size) if path is not None else None
+
+        self.__lock = threading.Lock()
+        self.__memory_hits = 0
+        self.__disk_hits = 0
+        self.__misses = 0
+
+
+    def get(self, key: str) -> Any | None:
+        """Get cached value.
+
+        :param key: Cache key
+        :type key: str
+        :return: Value or None on miss
+        :rtype: Any | None
+        """
+        value = self.memory.get(key)
+        if value is not None:
+            with self.__lock:
+                self.__memory_hits += 1
+            increment(CACHE_LOOKUPS, self.table, "memory_hit")
+            return value
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+                with self.__lock:
+                    self.__disk_hits += 1
+                increment(CACHE_LOOKUPS, self.table, "disk_hit")
+                return value
+
+        with self.__lock:
+            self.__misses += 1
+        increment(CACHE_LOOKUPS, self.table, "miss")
+
+        return None
+
+
+    def put(self, key: str, value: Any) -> None:
+        """Store value in both levels.
+
+        :param key: Cache key
+        :type key: str
+        :param value: JSON-serializable value
+        :type value: Any
+        """
+        self.memory.put(key, value)
+
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+
+    def stats(self) -> dict:
+        """Collect hit/miss counters.
+
+        :return: Cache statistics
+        :rtype: dict
+        """
+        with self.__lock:
+            hits = self.__memory_hits + self.__disk_hits
+            lookups = hits + self.__misses
+
+            return {
+                "size": len(self.memory),
+                "max_size": self.memory.max_size,
+                "memory_hits": self.__memory_hits,
+                "disk_hits": self.__disk_hits,
+                "misses": self.__misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
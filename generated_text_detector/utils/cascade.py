@@ -0,0 +1,83 @@
+import threading
+from typing import Sequence
+
+
+# `NOT_SURE` range of the author thresholds
+DEFAULT_CASCADE_BAND = (0.3, 0.7)
+
+
+def check_band(band: Sequence[float]) -> tuple[float, float]:
+    """Validate uncertainty band of a cascade.
+
+    :param band: Lower and upper bound of first-stage scores escalated to the large model
+    :type band: Sequence[float]
+    :raises ValueError: If the band is not two bounds within [0, 1] in ascending order
+    :return: Lower and upper bound
+    :rtype: tuple[float, float]
+    """
+    if len(band) != 2 or not 0 <= band[0] <= band[1] <= 1:
+        raise ValueError(f"Cascade band must be two bounds with 0 <= low <= high <= 1, got {list(band)}")
+
+    return float(band[0]), float(band[1])
+
+
+def uncertain(scores: Sequence[float], band: tuple[float, float]) -> list[int]:
+    """Find scores in the uncertainty band, bounds follow the author thresholds: low < score <= high.
+
+    :param scores: First-stage scores
+    :type scores: Sequence[float]
+    :param band: Lower and upper bound
+    :type band: tuple[float, float]
+    :return: Indices of scores to escalate
+    :rtype: list[int]
+    """
+    low, high = band
+    return [i for i, score in enumerate(scores) if low < score <= high]
+
+
+class CascadeStats:
+    """Thread-safe counters of chunks scored by every stage of a model cascade."""
+    def __init__(self, band: tuple[float, float]) -> None:
+        self.__band = band
+        self.__lock = threading.Lock()
+        self.__chunks = 0
+        self.__escalated = 0
+        self.__first_stage_s = 0.0
+        self.__second_stage_s = 0.0
+
+
+    def update(self, chunks: int, escalated: int, first_stage_s: float, second_stage_s: float) -> None:
+        """Account one cascaded scoring call.
+
+        :param chunks: Number of chunks scored by the first stage
+        :type chunks: int
+        :param escalated: Number of chunks escalated to the second stage
+        :type escalated: int
+        :param first_stage_s: Time of the first stage in seconds
+        :type first_stage_s: float
+        :param second_stage_s: Time of the second stage in seconds
+        :type second_stage_s: float
+        """
+        with self.__lock:
+            self.__chunks += chunks
+            self.__escalated += escalated
+            self.__first_stage_s += first_stage_s
+            self.__second_stage_s += second_stage_s
+
+
+    def stats(self) -> dict:
+        """Collect escalation statistics.
+
+        :return: Band, number of chunks of every stage, share of escalated chunks and time spent in every stage
+        :rtype: dict
+        """
+        with self.__lock:
+            return {
+                "band_low": self.__band[0],
+                "band_high": self.__band[1],
+                "first_stage_chunks": self.__chunks,
+                "second_stage_chunks": self.__escalated,
+                "escalation_rate": self.__escalated / self.__chunks if self.__chunks else 0.0,
+                "first_stage_time_s": self.__first_stage_s,
+                "second_stage_time_s": self.__second_stage_s,
+            }
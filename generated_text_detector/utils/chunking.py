@@ -0,0 +1,216 @@
+import zlib
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+from transformers import PreTrainedTokenizerFast
+
+from generated_text_detector.utils.metrics import stage_timer
+from generated_text_detector.utils.segmentation import PunktSegmenter, SentenceSegmenter
+
+
+# One sentence in ANCHOR_PERIOD on average ends a content-defined chunk
+ANCHOR_PERIOD = 4
+
+
+@lru_cache(maxsize=1)
+def _default_segmenter() -> SentenceSegmenter:
+    return PunktSegmenter()
+
+
+@dataclass(slots=True)
+class TextChunk:
+    """Piece of text scored by one model pass.
+
+    :param text: Text of the chunk
+    :type text: str
+    :param input_ids: Token IDs of the chunk without special tokens
+    :type input_ids: list[int]
+    :param start: Character offset of the chunk start in the split text
+    :type start: int
+    :param end: Character offset of the chunk end in the split text
+    :type end: int
+    """
+    text: str
+    input_ids: list[int]
+    start: int
+    end: int
+
+
+def split_by_chunks(
+    text: str,
+    tokenizer: PreTrainedTokenizerFast,
+    max_len: int,
+    content_defined: bool = False,
+    window_stride: int | None = None,
+    segmenter: SentenceSegmenter | None = None
+) -> list[TextChunk]:
+    """Split text into chunks of whole sentences to handle large inputs.
+    Text is tokenized only once, chunks are built from slices of token IDs
+    aligned to sentence boundaries with the help of tokenizer offset mappings.
+    A sentence longer than the model input is split into pieces of the model input size.
+
+    By default sentences are packed greedily, so an edit moves the boundaries of every following chunk.
+    With `content_defined` a chunk of at least half the model input also ends after an anchor sentence,
+    chosen by the hash of its tokens. Boundaries then depend only on nearby content:
+    after an edit they realign at the next anchor and chunks further away stay the same.
+
+    With `window_stride` sentences are ignored and chunks are overlapping windows of the model input size
+    starting every `window_stride` tokens, scores of windows are merged with `merge_window_scores`.
+
+    :param text: Input text
+    :type text: str
+    :param tokenizer: Fast tokenizer of the detector model
+    :type tokenizer: PreTrainedTokenizerFast
+    :param max_len: Maximum number of tokens in one chunk including special tokens
+    :type max_len: int
+    :param content_defined: Whether to end chunks at anchor sentences, takes precedence over `window_stride`, defaults to False
+    :type content_defined: bool, optional
+    :param window_stride: Distance in tokens between starts of sliding windows, defaults to None (sentence packing)
+    :type window_stride: int, optional
+    :param segmenter: Sentence segmenter, defaults to None (`PunktSegmenter`)
+    :type segmenter: SentenceSegmenter, optional
+    :return: List of text chunks
+    :rtype: list[TextChunk]
+    """
+    with stage_timer("tokenization"):
+        encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+    input_ids = encoding["input_ids"]
+    offsets = encoding["offset_mapping"]
+
+    budget = max_len - tokenizer.num_special_tokens_to_add()
+
+    if len(input_ids) < budget:
+        return [TextChunk(text, input_ids, 0, len(text))]
+
+    if window_stride is not None and not content_defined:
+        return [
+            _make_chunk(text, input_ids, offsets, start, min(start + budget, len(input_ids)), budget)
+            for start in window_starts(len(input_ids), budget, window_stride)
+        ]
+
+    # Token index where every sentence starts
+    with stage_timer("sentence_split"):
+        token_starts = [start for start, _ in offsets]
+        boundaries = [
+            bisect_left(token_starts, sentence_start)
+            for sentence_start in (segmenter or _default_segmenter()).sentence_starts(text)
+        ]
+    boundaries[0] = 0
+    boundaries.append(len(input_ids))
+
+    chunks = []
+    chunk_start = 0
+
+    for sentence_start, sentence_end in zip(boundaries, boundaries[1:]):
+        if sentence_end - chunk_start > budget and sentence_start > chunk_start:
+            chunks.append(_make_chunk(text, input_ids, offsets, chunk_start, sentence_start, budget))
+            chunk_start = sentence_start
+
+        # Text without punctuation is one long sentence, none of its tokens are dropped
+        while sentence_end - chunk_start > budget:
+            chunks.append(_make_chunk(text, input_ids, offsets, chunk_start, chunk_start + budget, budget))
+            chunk_start += budget
+
+        if (
+            content_defined
+            and sentence_end - chunk_start >= budget // 2
+            and sentence_end < len(input_ids)
+            and _is_anchor(input_ids[sentence_start:sentence_end])
+        ):
+            chunks.append(_make_chunk(text, input_ids, offsets, chunk_start, sentence_end, budget))
+            chunk_start = sentence_end
+
+    if chunk_start < len(input_ids):
+        chunks.append(_make_chunk(text, input_ids, offsets, chunk_start, len(input_ids), budget))
+
+    return chunks
+
+
+def window_starts(num_tokens: int, window: int, stride: int) -> range:
+    """First tokens of sliding windows covering every token.
+
+    :param num_tokens: Number of tokens
+    :type num_tokens: int
+    :param window: Number of tokens in a window
+    :type window: int
+    :param stride: Distance between starts of consecutive windows, at most `window`
+    :type stride: int
+    :return: Start token of every window
+    :rtype: range
+    """
+    assert 0 < stride <= window, "stride must be positive and not greater than the window"
+
+    return range(0, max(num_tokens - window, 0) + stride, stride)
+
+
+def merge_window_scores(
+    chunks: list[TextChunk],
+    scores: list[float],
+    stride: int
+) -> list[tuple[TextChunk, float]]:
+    """Merge scores of overlapping windows of one text (built by `split_by_chunks` with `window_stride`)
+    into scores of disjoint segments: every token gets the mean score of windows covering it,
+    and every segment, from the start of a window to the start of the next one, gets the mean score of its tokens.
+    Segments cover the text without overlaps, so they are aggregated like sentence chunks.
+
+    :param chunks: Windows in the order of the text
+    :type chunks: list[TextChunk]
+    :param scores: Score of every window
+    :type scores: list[float]
+    :param stride: Distance in tokens between starts of windows
+    :type stride: int
+    :return: Segments with their scores
+    :rtype: list[tuple[TextChunk, float]]
+    """
+    if len(chunks) < 2:
+        return list(zip(chunks, scores))
+
+    starts = np.arange(len(chunks)) * stride
+    ends = starts + np.fromiter((len(chunk.input_ids) for chunk in chunks), dtype=np.int64, count=len(chunks))
+    scores = np.asarray(scores, dtype=np.float64)
+    num_tokens = int(ends[-1])
+
+    # Difference arrays turn window ranges into per-token sums with one cumulative sum
+    score_sums = np.zeros(num_tokens + 1)
+    coverage = np.zeros(num_tokens + 1)
+    np.add.at(score_sums, starts, scores)
+    np.subtract.at(score_sums, ends, scores)
+    np.add.at(coverage, starts, 1)
+    np.subtract.at(coverage, ends, 1)
+    token_scores = np.cumsum(score_sums[:-1]) / np.cumsum(coverage[:-1])
+
+    segment_lengths = np.diff(np.append(starts, num_tokens))
+    segment_scores = np.add.reduceat(token_scores, starts) / segment_lengths
+
+    res = []
+    for i, (chunk, score) in enumerate(zip(chunks, segment_scores.tolist())):
+        first, last = i * stride, i * stride + int(segment_lengths[i])
+        end = chunks[i + 1].start if i + 1 < len(chunks) else chunk.end
+        end = max(min(end, chunk.end), chunk.start)
+        segment = TextChunk(chunk.text[:end - chunk.start], chunk.input_ids[:last - first], chunk.start, end)
+        res.append((segment, score))
+
+    return res
+
+
+def _is_anchor(sentence_ids: list[int]) -> bool:
+    """Whether the sentence may end a content-defined chunk, the hash is stable across processes."""
+    return zlib.crc32(array("i", sentence_ids).tobytes()) % ANCHOR_PERIOD == 0
+
+
+def _make_chunk(
+    text: str,
+    input_ids: list[int],
+    offsets: list[tuple[int, int]],
+    first: int,
+    last: int,
+    budget: int
+) -> TextChunk:
+    """Build chunk from token range `[first, last)` truncating its token IDs to `budget`."""
+    start = offsets[first][0]
+    end = offsets[last - 1][1]
+
+    return TextChunk(text[start:end], input_ids[first:min(last, first + budget)], start, end)
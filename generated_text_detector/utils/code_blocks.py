@@ -0,0 +1,150 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+BACKTICK_FENCE = "```"
+TILDE_FENCE = "~~~"
+
+WORD_PATTERN = re.compile(r"\w*")
+WHITESPACE_PATTERN = re.compile(r"\s*")
+NON_WHITESPACE_PATTERN = re.compile(r"\S")
+# Tilde fence opens a block only at the start of a line, the info string starts with the language
+TILDE_OPENING_PATTERN = re.compile(r"^[ \t]*(~{3,})[ \t]*(\w*)[^\n]*\n?", re.MULTILINE)
+
+
+@lru_cache(maxsize=16)
+def _tilde_closing_pattern(length: int) -> re.Pattern:
+    return re.compile(rf"^[ \t]*~{{{length},}}[ \t]*$", re.MULTILINE)
+
+
+@dataclass(slots=True)
+class CodeBlock:
+    """Fenced code block found by `scan_code_blocks`, all offsets are character offsets in the scanned text.
+
+    :param start: Start of the opening fence
+    :type start: int
+    :param end: End of the closing fence, or of the text if the block is not closed
+    :type end: int
+    :param language: Start and end of the language after the opening fence, None if there is no language
+    :type language: tuple[int, int] | None
+    :param content: Start and end of the block content without surrounding whitespace
+    :type content: tuple[int, int]
+    :param closed: Whether the block has a closing fence
+    :type closed: bool
+    """
+    start: int
+    end: int
+    language: tuple[int, int] | None
+    content: tuple[int, int]
+    closed: bool
+
+
+def scan_code_blocks(text: str) -> list[CodeBlock]:
+    """Find fenced code blocks in one pass over the text, in linear time even on adversarial inputs.
+
+    Backtick fences follow the pattern ```` ```(\\w+)?\\s*([\\s\\S]*?)\\s*``` ```` used before:
+    a block opens at any three backticks, optionally followed by a language, and closes at the next three backticks.
+    Tilde fences (`~~~`, optionally indented) open only at the start of a line and close at a line of
+    at least as many tildes. Inside a block fences of the other kind are content.
+    A block without a closing fence extends to the end of the text if its opening fence starts a line,
+    otherwise the fence is left as text.
+
+    :param text: Input text
+    :type text: str
+    :return: Code blocks in the order of the text
+    :rtype: list[CodeBlock]
+    """
+    blocks = []
+    position = 0
+
+    backtick = text.find(BACKTICK_FENCE)
+    tilde = TILDE_OPENING_PATTERN.search(text) if TILDE_FENCE in text else None
+
+    while True:
+        # Fences found before the end of the previous block are its content
+        if backtick != -1 and backtick < position:
+            backtick = text.find(BACKTICK_FENCE, position)
+        if tilde is not None and tilde.start() < position:
+            tilde = TILDE_OPENING_PATTERN.search(text, position)
+
+        if tilde is None or (backtick != -1 and backtick < tilde.start()):
+            if backtick == -1:
+                break
+
+            block = _backtick_block(text, backtick)
+            if block is None:
+                # No backtick fence follows, so no later backtick block can be closed either
+                backtick = -1
+                continue
+        else:
+            block = _tilde_block(text, tilde)
+
+        blocks.append(block)
+        position = block.end
+
+    return blocks
+
+
+def _backtick_block(text: str, start: int) -> CodeBlock | None:
+    """Build the backtick block opening at `start`, None if it is not closed and does not start a line."""
+    language_start, language_end = WORD_PATTERN.match(text, start + len(BACKTICK_FENCE)).span()
+    content_start = WHITESPACE_PATTERN.match(text, language_end).end()
+
+    closing = text.find(BACKTICK_FENCE, content_start)
+    closed = closing != -1
+    if closed:
+        end = closing + len(BACKTICK_FENCE)
+    else:
+        line_start = text.rfind("\n", 0, start) + 1
+        if NON_WHITESPACE_PATTERN.search(text, line_start, start) is not None:
+            return None
+        closing = end = len(text)
+
+    language = (language_start, language_end) if language_end > language_start else None
+    content_end = max(_rstrip(text, content_start, closing), content_start)
+
+    return CodeBlock(start, end, language, (content_start, content_end), closed)
+
+
+def _tilde_block(text: str, opening: re.Match) -> CodeBlock:
+    """Build the tilde block of the opening fence line matched by `TILDE_OPENING_PATTERN`."""
+    language = opening.span(2) if opening.end(2) > opening.start(2) else None
+    closing = _tilde_closing_pattern(len(opening.group(1))).search(text, opening.end())
+
+    if closing is None:
+        content_limit = end = len(text)
+    else:
+        content_limit, end = closing.span()
+
+    content_start = min(WHITESPACE_PATTERN.match(text, opening.end()).end(), content_limit)
+    content_end = max(_rstrip(text, content_start, content_limit), content_start)
+
+    return CodeBlock(opening.start(1), end, language, (content_start, content_end), closing is not None)
+
+
+def _rstrip(text: str, start: int, end: int) -> int:
+    """End of `text[start:end]` without trailing whitespace, without copying the text."""
+    while end > start and text[end - 1].isspace():
+        end -= 1
+
+    return end
+
+
+def strip_span(text: str, start: int, end: int) -> tuple[int, int] | None:
+    """Start and end of `text[start:end]` without surrounding whitespace, without copying the text.
+
+    :param text: Input text
+    :type text: str
+    :param start: Start of the span
+    :type start: int
+    :param end: End of the span
+    :type end: int
+    :return: Stripped span, None if the span is blank
+    :rtype: tuple[int, int] | None
+    """
+    first = NON_WHITESPACE_PATTERN.search(text, start, end)
+    if first is None:
+        return None
+
+    return first.start(), _rstrip(text, first.start(), end)
@@ -0,0 +1,304 @@
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from generated_text_detector.utils.metrics import LANE_LATENCY, observe
+
+
+DEFAULT_LANE = "default"
+# Number of latest requests of every lane latency percentiles are computed over
+LATENCY_WINDOW = 1024
+
+_current_lane = threading.local()
+
+
+class ExecutorOverloadedError(RuntimeError):
+    """Raised when the inference executor has no free capacity for a new task."""
+
+
+class DeadlineExceededError(RuntimeError):
+    """Raised when a task waited in the queue past its deadline and was dropped before running."""
+
+
+def current_priority() -> int:
+    """Priority of the lane of the task running in the current thread, used to order chunks in the micro-batcher.
+
+    :return: Weight of the lane, 0 outside of executor tasks
+    :rtype: int
+    """
+    return getattr(_current_lane, "priority", 0)
+
+
+class _Task:
+    __slots__ = ("func", "loop", "future", "deadline", "enqueued_at")
+
+    def __init__(self, func: Callable, loop: asyncio.AbstractEventLoop, deadline: float | None) -> None:
+        self.func = func
+        self.loop = loop
+        self.future = loop.create_future()
+        self.deadline = deadline
+        self.enqueued_at = time.monotonic()
+
+
+class _Lane:
+    """Queue and counters of one request class."""
+    def __init__(
+        self,
+        name: str,
+        weight: int = 1,
+        max_pending: int | None = None,
+        max_running: int | None = None,
+        deadline_ms: float | None = None
+    ) -> None:
+        assert weight > 0, "lane weight must be positive"
+
+        self.name = name
+        self.weight = weight
+        self.max_pending = max_pending
+        self.max_running = max_running
+        self.deadline_ms = deadline_ms
+
+        self.queue = deque()
+        # Virtual time of stride scheduling: grows by 1 / weight with every dispatched task
+        self.virtual_time = 0.0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.expired = 0
+        self.total_wait = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+
+    @property
+    def pending(self) -> int:
+        return len(self.queue) + self.running
+
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(q: float) -> float:
+            return latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000 if latencies else 0.0
+
+        return {
+            "weight": self.weight,
+            "queued": len(self.queue),
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "mean_wait_ms": self.total_wait * 1000 / self.completed if self.completed else 0.0,
+            "latency_p50_ms": percentile(0.5),
+            "latency_p95_ms": percentile(0.95),
+            "latency_p99_ms": percentile(0.99),
+        }
+
+
+class InferenceExecutor:
+    """Bounded execution layer that runs blocking detection off the asyncio event loop.
+    At most `max_workers` tasks run at once and at most `max_pending` tasks are admitted
+    (running plus waiting). Tasks above this limit are rejected instead of piling up.
+
+    Tasks are queued in lanes, one per request class (e.g. interactive editor calls and bulk API calls).
+    Free workers take tasks from lanes in proportion to their weights (stride scheduling), so a heavy lane
+    does not delay a light one. A task with a deadline still queued when the deadline passes is dropped
+    without running. Without `lanes` all tasks go to one lane in arrival order.
+
+    :param max_workers: Number of threads running detection, defaults to 4
+    :type max_workers: int, optional
+    :param max_pending: Maximum number of admitted tasks, defaults to 32
+    :type max_pending: int, optional
+    :param lanes: Lane name to its `weight`, `max_pending` and `max_running` limits and default `deadline_ms`,
+        defaults to None (one lane)
+    :type lanes: dict[str, dict], optional
+    :param default_lane: Lane of tasks without lane, defaults to None (the first lane)
+    :type default_lane: str, optional
+    """
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_pending: int = 32,
+        lanes: dict[str, dict] | None = None,
+        default_lane: str | None = None
+    ) -> None:
+        assert max_workers > 0, "max_workers must be positive"
+        assert max_pending >= max_workers, "max_pending must be greater or equal to max_workers"
+
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+
+        self.__lanes = {name: _Lane(name, **params) for name, params in (lanes or {DEFAULT_LANE: {}}).items()}
+        self.default_lane = default_lane or next(iter(self.__lanes))
+        assert self.default_lane in self.__lanes, f"default_lane '{self.default_lane}' is not one of lanes"
+
+        self.__pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self.__lock = threading.Lock()
+        self.__pending = 0
+        self.__running = 0
+        self.__completed = 0
+        self.__rejected = 0
+
+
+    @property
+    def lanes(self) -> list[str]:
+        return list(self.__lanes)
+
+
+    async def run(
+        self,
+        func: Callable,
+        *args,
+        lane: str | None = None,
+        deadline_ms: float | None = None,
+        **kwargs
+    ) -> Any:
+        """Run blocking function in the pool and await its result.
+
+        :param func: Blocking function (e.g. `AggregatedDetector.detect_report`)
+        :type func: Callable
+        :param lane: Lane of the task, defaults to None (`default_lane`)
+        :type lane: str, optional
+        :param deadline_ms: Time the task may wait in the queue in milliseconds, defaults to None (`deadline_ms` of the lane)
+        :type deadline_ms: float, optional
+        :raises ValueError: If the lane is unknown
+        :raises ExecutorOverloadedError: If `max_pending` tasks are already admitted to the executor or to the lane
+        :raises DeadlineExceededError: If the task was still queued at its deadline
+        :return: Result of the function
+        :rtype: Any
+        """
+        queue = self.__lanes.get(lane or self.default_lane)
+        if queue is None:
+            raise ValueError(f"Unknown lane '{lane}', expected one of {self.lanes}")
+
+        if deadline_ms is None:
+            deadline_ms = queue.deadline_ms
+        deadline = time.monotonic() + deadline_ms / 1000 if deadline_ms is not None else None
+        task = _Task(functools.partial(func, *args, **kwargs), asyncio.get_running_loop(), deadline)
+
+        with self.__lock:
+            if self.__pending >= self.max_pending or (queue.max_pending is not None and queue.pending >= queue.max_pending):
+                self.__rejected += 1
+                queue.rejected += 1
+                raise ExecutorOverloadedError(
+                    f"Inference capacity exhausted: {self.__pending} tasks are already pending, {queue.pending} in lane '{queue.name}'"
+                )
+            self.__pending += 1
+
+            # An idle lane joins at the virtual time of busy lanes instead of catching up on the time it was idle
+            if not queue.queue:
+                queue.virtual_time = max(queue.virtual_time, self.__min_virtual_time())
+            queue.queue.append(task)
+            self.__dispatch()
+
+        return await task.future
+
+
+    def shutdown(self) -> None:
+        """Wait for running tasks and release the threads."""
+        self.__pool.shutdown(wait=True)
+
+
+    def stats(self) -> dict:
+        """Collect concurrency statistics.
+
+        :return: Executor statistics with statistics of every lane under `lanes`
+        :rtype: dict
+        """
+        with self.__lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self.__pending,
+                "completed": self.__completed,
+                "rejected": self.__rejected,
+                "lanes": {name: lane.stats() for name, lane in self.__lanes.items()},
+            }
+
+
+    def __min_virtual_time(self) -> float:
+        busy = [lane.virtual_time for lane in self.__lanes.values() if lane.queue]
+        return min(busy, default=0.0)
+
+
+    def __next_task(self) -> tuple[_Lane, _Task] | None:
+        """Take the task of the lane with the least virtual time among lanes with queued tasks and free capacity.
+        Tasks cancelled by the caller or expired are dropped. Called under the lock.
+        """
+        while True:
+            ready = [
+                lane for lane in self.__lanes.values()
+                if lane.queue and (lane.max_running is None or lane.running < lane.max_running)
+            ]
+            if not ready:
+                return None
+
+            lane = min(ready, key=lambda lane: lane.virtual_time)
+            task = lane.queue.popleft()
+
+            if task.future.cancelled():
+                self.__pending -= 1
+                continue
+
+            if task.deadline is not None and time.monotonic() > task.deadline:
+                self.__pending -= 1
+                lane.expired += 1
+                task.loop.call_soon_threadsafe(
+                    _set_exception,
+                    task.future,
+                    DeadlineExceededError(f"Request waited in lane '{lane.name}' past its deadline and was dropped"),
+                )
+                continue
+
+            lane.virtual_time += 1 / lane.weight
+            return lane, task
+
+
+    def __dispatch(self) -> None:
+        """Start queued tasks while there are free workers. Called under the lock."""
+        while self.__running < self.max_workers:
+            item = self.__next_task()
+            if item is None:
+                return
+
+            self.__running += 1
+            item[0].running += 1
+            self.__pool.submit(self.__execute, *item)
+
+
+    def __execute(self, lane: _Lane, task: _Task) -> None:
+        started_at = time.monotonic()
+        _current_lane.priority = lane.weight
+        try:
+            result = task.func()
+        except BaseException as exc:
+            task.loop.call_soon_threadsafe(_set_exception, task.future, exc)
+        else:
+            task.loop.call_soon_threadsafe(_set_result, task.future, result)
+        finally:
+            _current_lane.priority = 0
+            finished_at = time.monotonic()
+            observe(LANE_LATENCY, finished_at - task.enqueued_at, lane.name)
+
+            with self.__lock:
+                self.__pending -= 1
+                self.__running -= 1
+                self.__completed += 1
+                lane.running -= 1
+                lane.completed += 1
+                lane.total_wait += started_at - task.enqueued_at
+                lane.latencies.append(finished_at - task.enqueued_at)
+                self.__dispatch()
+
+
+def _set_result(future: asyncio.Future, result: Any) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, exc: BaseException) -> None:
+    if not future.done():
+        future.set_exception(exc)
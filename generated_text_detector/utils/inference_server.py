@@ -0,0 +1,307 @@
+import json
+import logging
+import os
+import stat
+import struct
+import threading
+import time
+from array import array
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any
+
+from generated_text_detector.utils.chunking import TextChunk
+from generated_text_detector.utils.startup import ServiceNotReadyError
+
+
+# Request kinds, the first byte of every request message
+SCORE = b"S"
+PING = b"P"
+STATS = b"T"
+
+# Response statuses, the first byte of every response message
+OK = b"\x00"
+ERROR = b"\x01"
+
+_COUNT = struct.Struct("<I")
+
+
+class InferenceServerError(RuntimeError):
+    """Raised on the client when the inference server fails to score chunks."""
+
+
+def encode_chunks(chunks: list[TextChunk]) -> bytes:
+    """Serialize token IDs of chunks: number of chunks, their lengths and all token IDs as int32.
+
+    :param chunks: Tokenized chunks
+    :type chunks: list[TextChunk]
+    :return: Message payload
+    :rtype: bytes
+    """
+    lengths = array("i", [len(chunk.input_ids) for chunk in chunks])
+    input_ids = array("i")
+    for chunk in chunks:
+        input_ids.extend(chunk.input_ids)
+
+    return _COUNT.pack(len(chunks)) + lengths.tobytes() + input_ids.tobytes()
+
+
+def decode_chunks(payload: bytes) -> list[TextChunk]:
+    """Deserialize chunks encoded by `encode_chunks`, only token IDs are transferred.
+
+    :param payload: Message payload
+    :type payload: bytes
+    :return: Chunks with empty text
+    :rtype: list[TextChunk]
+    """
+    count, = _COUNT.unpack_from(payload)
+    offset = _COUNT.size
+    lengths = array("i")
+    lengths.frombytes(payload[offset:offset + 4 * count])
+    input_ids = array("i")
+    input_ids.frombytes(payload[offset + 4 * count:])
+
+    chunks = []
+    start = 0
+    for length in lengths:
+        chunks.append(TextChunk("", input_ids[start:start + length].tolist(), 0, 0))
+        start += length
+
+    return chunks
+
+
+class InferenceServer:
+    """Model-owning process serving chunk scores to HTTP workers over a Unix socket.
+    Every client connection is handled by its own thread, so with micro-batching enabled
+    chunks of all workers are grouped into shared model passes.
+
+    :param detector: Detector scoring chunks, `GeneratedTextDetector`
+    :type detector: GeneratedTextDetector
+    :param socket_path: Path of the Unix socket, a stale socket file is replaced
+    :type socket_path: str
+    """
+    def __init__(self, detector: Any, socket_path: str) -> None:
+        self.detector = detector
+        self.socket_path = socket_path
+
+        self.__lock = threading.Lock()
+        self.__connections = 0
+        self.__requests = 0
+        self.__chunks = 0
+        self.__errors = 0
+
+        if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            os.remove(socket_path)
+        self.__listener = Listener(socket_path, family="AF_UNIX")
+        # Only processes of the same user may connect
+        os.chmod(socket_path, 0o600)
+
+
+    def serve_forever(self) -> None:
+        """Accept client connections until `close` is called."""
+        logging.info(f"Inference server is listening on {self.socket_path}")
+        while True:
+            try:
+                connection = self.__listener.accept()
+            except OSError:
+                # Listener is closed
+                return
+
+            with self.__lock:
+                self.__connections += 1
+            threading.Thread(target=self.__handle, args=(connection,), name="inference-connection", daemon=True).start()
+
+
+    def close(self) -> None:
+        """Stop accepting connections and remove the socket file."""
+        self.__listener.close()
+
+
+    def stats(self) -> dict:
+        """Collect server statistics together with statistics of the detector.
+
+        :return: Statistics
+        :rtype: dict
+        """
+        with self.__lock:
+            res = {
+                "connections": self.__connections,
+                "requests": self.__requests,
+                "chunks": self.__chunks,
+                "errors": self.__errors,
+            }
+
+        res.update(self.detector.stats())
+        return res
+
+
+    def __handle(self, connection: Connection) -> None:
+        with connection:
+            while True:
+                try:
+                    message = connection.recv_bytes()
+                except (EOFError, OSError):
+                    break
+
+                try:
+                    response = OK + self.__process(message)
+                except Exception as exc:
+                    logging.exception("Inference server request failed")
+                    with self.__lock:
+                        self.__errors += 1
+                    response = ERROR + f"{type(exc).__name__}: {exc}".encode("utf-8")
+
+                try:
+                    connection.send_bytes(response)
+                except OSError:
+                    break
+
+        with self.__lock:
+            self.__connections -= 1
+
+
+    def __process(self, message: bytes) -> bytes:
+        kind, payload = message[:1], message[1:]
+
+        if kind == SCORE:
+            chunks = decode_chunks(payload)
+            scores = self.detector.score(chunks) if chunks else []
+            with self.__lock:
+                self.__requests += 1
+                self.__chunks += len(chunks)
+            return array("d", scores).tobytes()
+
+        if kind == PING:
+            return b""
+
+        if kind == STATS:
+            return json.dumps(self.stats()).encode("utf-8")
+
+        raise ValueError(f"Unknown request kind {kind!r}")
+
+
+class RemoteScorer:
+    """Client of `InferenceServer` used by HTTP workers instead of a local model.
+    Connections are pooled, every thread uses its own connection for the duration of a request.
+
+    :param socket_path: Path of the Unix socket of the inference server
+    :type socket_path: str
+    """
+    def __init__(self, socket_path: str) -> None:
+        self.socket_path = socket_path
+
+        self.__lock = threading.Lock()
+        self.__idle = []
+
+
+    def score(self, chunks: list[TextChunk]) -> list[float]:
+        """Score chunks in the inference server.
+
+        :param chunks: Tokenized chunks
+        :type chunks: list[TextChunk]
+        :raises ServiceNotReadyError: If the inference server is not reachable
+        :raises InferenceServerError: If the inference server failed to score chunks
+        :return: Score of every chunk
+        :rtype: list[float]
+        """
+        if not chunks:
+            return []
+
+        scores = array("d")
+        scores.frombytes(self.__request(SCORE + encode_chunks(chunks)))
+        return scores.tolist()
+
+
+    def ping(self) -> bool:
+        """Check that the inference server answers.
+
+        :return: Whether the server is reachable
+        :rtype: bool
+        """
+        try:
+            self.__request(PING)
+        except ServiceNotReadyError:
+            return False
+
+        return True
+
+
+    def wait(self, timeout: float | None = None, interval: float = 0.5) -> bool:
+        """Wait until the inference server answers.
+
+        :param timeout: Maximum time to wait in seconds, defaults to None (no limit)
+        :type timeout: float, optional
+        :param interval: Time between attempts in seconds, defaults to 0.5
+        :type interval: float, optional
+        :return: Whether the server is reachable
+        :rtype: bool
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        logged = False
+        while not self.ping():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            if not logged:
+                logging.info(f"Waiting for inference server on {self.socket_path}")
+                logged = True
+            time.sleep(interval)
+
+        return True
+
+
+    def stats(self) -> dict:
+        """Collect statistics of the inference server.
+
+        :return: Statistics, empty if the server is not reachable
+        :rtype: dict
+        """
+        try:
+            return json.loads(self.__request(STATS))
+        except ServiceNotReadyError:
+            return {}
+
+
+    def __request(self, message: bytes) -> bytes:
+        """Send request and receive response, a broken pooled connection is replaced once,
+        so restarts of the server are transparent to callers."""
+        for attempt in range(2):
+            connection = self.__acquire()
+            try:
+                connection.send_bytes(message)
+                response = connection.recv_bytes()
+            except (EOFError, OSError) as exc:
+                connection.close()
+                # Other pooled connections are broken too if the server restarted
+                self.__close_idle()
+                if attempt == 1:
+                    raise ServiceNotReadyError(f"Inference server is not available: {exc}") from exc
+                continue
+
+            self.__release(connection)
+            if response[:1] == ERROR:
+                raise InferenceServerError(response[1:].decode("utf-8"))
+
+            return response[1:]
+
+
+    def __acquire(self) -> Connection:
+        with self.__lock:
+            if self.__idle:
+                return self.__idle.pop()
+
+        try:
+            return Client(self.socket_path, family="AF_UNIX")
+        except OSError as exc:
+            raise ServiceNotReadyError(f"Inference server is not available: {exc}") from exc
+
+
+    def __release(self, connection: Connection) -> None:
+        with self.__lock:
+            self.__idle.append(connection)
+
+
+    def __close_idle(self) -> None:
+        with self.__lock:
+            idle, self.__idle = self.__idle, []
+
+        for connection in idle:
+            connection.close()
@@ -0,0 +1,377 @@
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Iterator, Sequence
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+# Characters not allowed in metric names, e.g. in model names used as keys of collected statistics
+INVALID_NAME_CHARS_PATTERN = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    """Monotonically increasing value, optionally split by label values.
+
+    :param name: Metric name
+    :type name: str
+    :param documentation: Help text of the metric
+    :type documentation: str
+    :param labelnames: Names of labels, defaults to no labels
+    :type labelnames: Sequence[str], optional
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+        self.__lock = threading.Lock()
+        self.__values = {}
+
+
+    def inc(self, amount: float = 1, *labelvalues: str) -> None:
+        """Increase the counter.
+
+        :param amount: Increment, defaults to 1
+        :type amount: float, optional
+        :param labelvalues: Values of labels in the order of `labelnames`
+        :type labelvalues: str
+        """
+        with self.__lock:
+            self.__values[labelvalues] = self.__values.get(labelvalues, 0) + amount
+
+
+    def samples(self) -> Iterator[str]:
+        with self.__lock:
+            values = sorted(self.__values.items())
+
+        for labelvalues, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets, optionally split by label values.
+
+    :param name: Metric name
+    :type name: str
+    :param documentation: Help text of the metric
+    :type documentation: str
+    :param buckets: Sorted upper bounds of buckets, `+Inf` bucket is added automatically
+    :type buckets: Sequence[float]
+    :param labelnames: Names of labels, defaults to no labels
+    :type labelnames: Sequence[str], optional
+    """
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float],
+        labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+
+        self.__lock = threading.Lock()
+        # Label values -> [count of every bucket (not cumulative), sum]
+        self.__values = {}
+
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """Record one observation.
+
+        :param value: Observed value
+        :type value: float
+        :param labelvalues: Values of labels in the order of `labelnames`
+        :type labelvalues: str
+        """
+        bucket = bisect_left(self.buckets, value)
+
+        with self.__lock:
+            state = self.__values.get(labelvalues)
+            if state is None:
+                state = self.__values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bucket] += 1
+            state[1] += value
+
+
+    def samples(self) -> Iterator[str]:
+        with self.__lock:
+            values = sorted((labelvalues, (list(counts), total)) for labelvalues, (counts, total) in self.__values.items())
+
+        labelnames = (*self.labelnames, "le")
+        for labelvalues, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = _format_labels(labelnames, (*labelvalues, _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Set of metrics rendered together in Prometheus text exposition format.
+    While the registry is disabled, instrumentation helpers of this module do nothing.
+
+    :param enabled: Whether metrics are collected, defaults to False
+    :type enabled: bool, optional
+    """
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+
+        self.__metrics = []
+        self.__collectors = []
+
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self.__metrics.append(metric)
+        return metric
+
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float],
+        labelnames: Sequence[str] = ()
+    ) -> Histogram:
+        metric = Histogram(name, documentation, buckets, labelnames)
+        self.__metrics.append(metric)
+        return metric
+
+
+    def register_collector(self, prefix: str, collect: Callable[[], dict]) -> None:
+        """Export numeric values of a statistics dict (e.g. `AggregatedDetector.stats`) as gauges on every scrape.
+        Nested keys are joined with underscores: `{"chunk_cache": {"misses": 3}}` becomes `<prefix>_chunk_cache_misses 3`.
+
+        :param prefix: Prefix of gauge names
+        :type prefix: str
+        :param collect: Function returning the statistics
+        :type collect: Callable[[], dict]
+        """
+        self.__collectors.append((prefix, collect))
+
+
+    def clear_collectors(self) -> None:
+        self.__collectors.clear()
+
+
+    def render(self) -> str:
+        """Render all metrics and collected statistics.
+
+        :return: Metrics in Prometheus text exposition format
+        :rtype: str
+        """
+        lines = []
+        for metric in self.__metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+
+        for prefix, collect in self.__collectors:
+            for name, value in self.__flatten(prefix, collect()):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+    @classmethod
+    def __flatten(cls, prefix: str, stats: dict) -> Iterator[tuple[str, float]]:
+        for key, value in stats.items():
+            name = INVALID_NAME_CHARS_PATTERN.sub("_", f"{prefix}_{key}")
+            if isinstance(value, dict):
+                yield from cls.__flatten(name, value)
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield name, value
+
+
+METRICS = MetricsRegistry()
+
+STAGE_DURATION = METRICS.histogram(
+    "detector_stage_duration_seconds",
+    "Time spent in every stage of the detection pipeline",
+    LATENCY_BUCKETS,
+    labelnames=("stage",),
+)
+CHUNKS_PER_TEXT = METRICS.histogram(
+    "detector_chunks_per_text",
+    "Number of chunks a text is split into",
+    COUNT_BUCKETS,
+)
+TOKENS_PER_TEXT = METRICS.histogram(
+    "detector_tokens_per_text",
+    "Number of tokens of a text after preprocessing",
+    TOKEN_BUCKETS,
+)
+BATCH_SIZE = METRICS.histogram(
+    "detector_batch_size",
+    "Number of chunks in one model pass",
+    COUNT_BUCKETS,
+)
+BATCH_TOKENS = METRICS.histogram(
+    "detector_batch_padded_tokens",
+    "Number of padded tokens in one model pass",
+    TOKEN_BUCKETS,
+)
+CACHE_LOOKUPS = METRICS.counter(
+    "detector_cache_lookups_total",
+    "Lookups of result caches by cache and result (memory_hit, disk_hit or miss)",
+    labelnames=("cache", "result"),
+)
+LANE_LATENCY = METRICS.histogram(
+    "detector_lane_latency_seconds",
+    "Time from admission to the executor until detection finished by request lane",
+    LATENCY_BUCKETS,
+    labelnames=("lane",),
+)
+HTTP_REQUEST_DURATION = METRICS.histogram(
+    "http_request_duration_seconds",
+    "Time until response headers are sent by route and method",
+    LATENCY_BUCKETS,
+    labelnames=("route", "method"),
+)
+HTTP_REQUESTS = METRICS.counter(
+    "http_requests_total",
+    "Handled HTTP requests by route, method and status code",
+    labelnames=("route", "method", "status"),
+)
+
+
+def configure_metrics(enabled: bool) -> None:
+    """Switch instrumentation on or off for the whole process.
+
+    :param enabled: Whether metrics are collected
+    :type enabled: bool
+    """
+    METRICS.enabled = enabled
+
+
+class _StageTimer:
+    __slots__ = ("stage", "started_at")
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+
+    def __enter__(self) -> None:
+        self.started_at = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        STAGE_DURATION.observe(time.perf_counter() - self.started_at, self.stage)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def stage_timer(stage: str) -> _StageTimer | _NullTimer:
+    """Context manager recording duration of a pipeline stage to `detector_stage_duration_seconds`.
+    Returns a shared no-op context manager while metrics are disabled.
+
+    :param stage: Name of the stage (e.g. `preprocessing` or `forward`)
+    :type stage: str
+    :return: Context manager
+    :rtype: _StageTimer | _NullTimer
+    """
+    if not METRICS.enabled:
+        return _NULL_TIMER
+
+    return _StageTimer(stage)
+
+
+def observe(metric: Histogram, value: float, *labelvalues: str) -> None:
+    """Record observation if metrics are enabled.
+
+    :param metric: Histogram of this module
+    :type metric: Histogram
+    :param value: Observed value
+    :type value: float
+    :param labelvalues: Values of labels in the order of `labelnames`
+    :type labelvalues: str
+    """
+    if METRICS.enabled:
+        metric.observe(value, *labelvalues)
+
+
+def increment(metric: Counter, *labelvalues: str) -> None:
+    """Increase counter by one if metrics are enabled.
+
+    :param metric: Counter of this module
+    :type metric: Counter
+    :param labelvalues: Values of labels in the order of `labelnames`
+    :type labelvalues: str
+    """
+    if METRICS.enabled:
+        metric.inc(1, *labelvalues)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency until response headers and status code of every HTTP request.
+    Unlike `BaseHTTPMiddleware` it passes `receive` and `send` through untouched,
+    so responses streamed while the request body is still being read keep working.
+
+    :param app: ASGI application
+    :type app: Callable
+    """
+    def __init__(self, app: Callable[..., Awaitable[None]]) -> None:
+        self.app = app
+
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not METRICS.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+
+        async def send_with_metrics(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                # Route template instead of URL path keeps the number of label values bounded
+                route = scope.get("route")
+                path = route.path if route is not None else "unmatched"
+                HTTP_REQUEST_DURATION.observe(time.perf_counter() - started_at, path, scope["method"])
+                HTTP_REQUESTS.inc(1, path, scope["method"], str(message["status"]))
+            await send(message)
+
+        await self.app(scope, receive, send_with_metrics)
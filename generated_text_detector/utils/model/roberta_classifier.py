@@ -1,6 +1,10 @@
-from transformers import RobertaModel
+import os
+
+from transformers import RobertaConfig, RobertaModel
 from transformers.modeling_outputs import SequenceClassifierOutput
+from transformers.modeling_utils import no_init_weights
 from huggingface_hub import PyTorchModelHubMixin
+import safetensors.torch
 import torch.nn as nn
 import torch
 
@@ -11,19 +15,53 @@ class RobertaClassifier(nn.Module, PyTorchModelHubMixin):
     """Roberta based text classifier.
 
     :param config: Configuration dictionary containing model parameters
-        should contain following keys: `pretrain_checkpoint`, `classifier_dropout`, `num_labels`, `label_smoothing`
+        should contain following keys: `pretrain_checkpoint`, `classifier_dropout`, `num_labels`, `label_smoothing`.
+        If `roberta_config` (keyword arguments of `RobertaConfig`) is given instead of `pretrain_checkpoint`,
+        the encoder is randomly initialized from it without downloading pretrained weights
     :type config: dict
     """
     def __init__(self, config: dict):
         super().__init__()
         
-        self.roberta  = RobertaModel.from_pretrained(config["pretrain_checkpoint"], add_pooling_layer = False)
+        if "roberta_config" in config:
+            self.roberta = RobertaModel(RobertaConfig(**config["roberta_config"]), add_pooling_layer = False)
+        else:
+            self.roberta  = RobertaModel.from_pretrained(config["pretrain_checkpoint"], add_pooling_layer = False)
 
         self.dropout = nn.Dropout(config["classifier_dropout"])
         self.dense = nn.Linear(self.roberta.config.hidden_size, config["num_labels"])
 
         self.loss_func = BCEWithLogitsLossSmoothed(config["label_smoothing"])
 
+    @classmethod
+    def _from_pretrained(cls, **kwargs):
+        """Build the classifier from its config and load checkpoint weights once.
+        Pretrained encoder weights are not loaded and random initialization is skipped,
+        as both would be overwritten by the checkpoint anyway.
+        Snapshots carry the encoder config in `roberta_config`, for other local checkpoints
+        the encoder config is only read from the local cache, the Hub is not reached.
+        """
+        config = kwargs.get("config")
+        if config is not None and "roberta_config" not in config:
+            local_files_only = kwargs.get("local_files_only") or os.path.isdir(str(kwargs["model_id"]))
+            roberta_config = RobertaConfig.from_pretrained(
+                config["pretrain_checkpoint"],
+                cache_dir=kwargs.get("cache_dir"),
+                local_files_only=local_files_only,
+            )
+            kwargs["config"] = {**config, "roberta_config": roberta_config.to_diff_dict()}
+
+        with no_init_weights():
+            return super()._from_pretrained(**kwargs)
+
+    @classmethod
+    def _load_as_safetensor(cls, model: "RobertaClassifier", model_file: str, map_location: str, strict: bool):
+        # Tensors of memory-mapped file replace parameters instead of being copied into them
+        state_dict = safetensors.torch.load_file(model_file, device=map_location)
+        model.load_state_dict(state_dict, strict=strict, assign=True)
+        model.eval()
+        return model
+
     def forward(
         self,
         input_ids: torch.LongTensor | None,
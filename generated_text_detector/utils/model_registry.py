@@ -0,0 +1,336 @@
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from generated_text_detector.utils.startup import ServiceNotReadyError
+
+
+# Name of the only model of a config without `models` section
+DEFAULT_MODEL = "default"
+
+# Sections merged key by key when a model overrides them
+MERGED_SECTIONS = ("detector_params", "text_detector_params")
+
+
+class UnknownModelError(ValueError):
+    """Raised when a request names a model missing from the `models` section of the detector config."""
+
+
+def model_names(detector_conf: dict) -> list[str]:
+    """List models of the detector config, the default model first.
+
+    :param detector_conf: Detector config
+    :type detector_conf: dict
+    :return: Model names
+    :rtype: list[str]
+    """
+    default = default_model(detector_conf)
+    return [default, *(name for name in detector_conf.get("models") or {} if name != default)]
+
+
+def default_model(detector_conf: dict) -> str:
+    """Name of the model serving requests without `model`.
+
+    :param detector_conf: Detector config
+    :type detector_conf: dict
+    :return: `default_model` of the config, the first of `models` or `DEFAULT_MODEL`
+    :rtype: str
+    """
+    models = detector_conf.get("models") or {}
+    return detector_conf.get("default_model") or next(iter(models), DEFAULT_MODEL)
+
+
+def model_config(detector_conf: dict, name: str | None = None) -> dict:
+    """Build single-model config of one model: its entry of `models` overrides top-level keys,
+    `detector_params` and `text_detector_params` are overridden key by key.
+
+    :param detector_conf: Detector config
+    :type detector_conf: dict
+    :param name: Model name, defaults to None (default model)
+    :type name: str, optional
+    :raises UnknownModelError: If the model is not in the config
+    :return: Config in the format of a single-model detector config
+    :rtype: dict
+    """
+    name = name or default_model(detector_conf)
+    models = detector_conf.get("models") or {}
+    if name not in models and not (name == DEFAULT_MODEL and not models):
+        raise UnknownModelError(f"Unknown model '{name}', expected one of {model_names(detector_conf)}")
+
+    overrides = models.get(name, {})
+    res = {key: value for key, value in detector_conf.items() if key not in ("models", "default_model")}
+    for key, value in overrides.items():
+        if key in MERGED_SECTIONS:
+            res[key] = {**res.get(key, {}), **value}
+        else:
+            res[key] = value
+
+    return res
+
+
+class _LoadedModel:
+    __slots__ = ("detector", "memory_bytes", "users", "evicted")
+
+    def __init__(self, detector: Any, memory_bytes: int) -> None:
+        self.detector = detector
+        self.memory_bytes = memory_bytes
+        self.users = 0
+        self.evicted = False
+
+
+class ModelRegistry:
+    """Detectors of several models served by one process.
+    A model is loaded on first use. Before loading, the least recently used models are evicted until
+    the expected size of the new model fits the budget, and once it is loaded, until its actual size does.
+    An evicted detector is closed once its last request finishes.
+
+    :param names: Names of models, the first one is the default model
+    :type names: list[str]
+    :param load: Function building the detector of a model by its name, e.g. `AggregatedDetector`
+    :type load: Callable[[str], Any]
+    :param memory_budget_mb: Memory budget for model weights in MiB (RAM or VRAM, where the models are),
+        the model in use is never evicted, defaults to None (no limit)
+    :type memory_budget_mb: float, optional
+    :param estimate: Function estimating memory of the weights of a model by its name before it is loaded,
+        None if unknown; a model loaded before is expected to take as much as the last time, defaults to None
+    :type estimate: Callable[[str], int | None], optional
+    """
+    def __init__(
+        self,
+        names: list[str],
+        load: Callable[[str], Any],
+        memory_budget_mb: float | None = None,
+        estimate: Callable[[str], int | None] | None = None
+    ) -> None:
+        self.names = list(names)
+        self.default_model = self.names[0]
+        self.memory_budget_bytes = None if memory_budget_mb is None else int(memory_budget_mb * 2 ** 20)
+
+        self.__load = load
+        self.__estimate = estimate
+        # Name -> memory of the model measured when it was loaded
+        self.__sizes = {}
+        self.__lock = threading.Lock()
+        # Loading one model does not block requests to other models
+        self.__load_locks = {name: threading.Lock() for name in self.names}
+        # Name -> loaded model, least recently used first
+        self.__loaded = OrderedDict()
+        self.__loads = 0
+        self.__evictions = 0
+
+
+    def resolve(self, name: str | None) -> str:
+        """Validate model name.
+
+        :param name: Model name, None for the default model
+        :type name: str, optional
+        :raises UnknownModelError: If there is no such model
+        :return: Model name
+        :rtype: str
+        """
+        if name is None:
+            return self.default_model
+        if name not in self.__load_locks:
+            raise UnknownModelError(f"Unknown model '{name}', expected one of {self.names}")
+
+        return name
+
+
+    @contextmanager
+    def use(self, name: str | None = None) -> Iterator[Any]:
+        """Get detector of a model loading it if needed, the model is not closed until the block exits.
+
+        :param name: Model name, defaults to None (default model)
+        :type name: str, optional
+        :raises UnknownModelError: If there is no such model
+        :raises ServiceNotReadyError: If the model failed to load
+        :return: Detector
+        :rtype: Iterator[Any]
+        """
+        model = self.__acquire(self.resolve(name))
+        try:
+            yield model.detector
+        finally:
+            self.__release(model)
+
+
+    def call(self, name: str | None, method: str, *args, **kwargs) -> Any:
+        """Call a method of the detector of a model, e.g. from an executor thread.
+
+        :param name: Model name, None for the default model
+        :type name: str, optional
+        :param method: Name of the detector method (e.g. `detect_report`)
+        :type method: str
+        :return: Result of the method
+        :rtype: Any
+        """
+        with self.use(name) as detector:
+            return getattr(detector, method)(*args, **kwargs)
+
+
+    def load(self, name: str | None = None) -> Any:
+        """Load a model ahead of its first request, e.g. the default model on startup.
+
+        :param name: Model name, defaults to None (default model)
+        :type name: str, optional
+        :return: Detector
+        :rtype: Any
+        """
+        with self.use(name) as detector:
+            return detector
+
+
+    def peek(self, name: str | None = None) -> Any | None:
+        """Get detector of a model only if it is loaded.
+
+        :param name: Model name, defaults to None (default model)
+        :type name: str, optional
+        :return: Detector or None
+        :rtype: Any | None
+        """
+        with self.__lock:
+            model = self.__loaded.get(self.resolve(name))
+
+        return model.detector if model is not None else None
+
+
+    def stats(self) -> dict:
+        """Collect statistics of the default model at the top level and of the registry under `registry`.
+
+        :return: Statistics
+        :rtype: dict
+        """
+        with self.__lock:
+            loaded = dict(self.__loaded)
+            registry = {
+                "loaded_models": len(loaded),
+                "memory_bytes": sum(model.memory_bytes for model in loaded.values()),
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "loads": self.__loads,
+                "evictions": self.__evictions,
+                "models": {
+                    name: {
+                        "loaded": name in loaded,
+                        "memory_bytes": loaded[name].memory_bytes if name in loaded else 0,
+                        "in_use": loaded[name].users if name in loaded else 0,
+                    }
+                    for name in self.names
+                },
+            }
+
+        res = {}
+        if self.default_model in loaded:
+            res.update(loaded[self.default_model].detector.stats())
+        for name, model in loaded.items():
+            if name != self.default_model:
+                registry["models"][name]["detector"] = model.detector.stats()
+
+        res["registry"] = registry
+        return res
+
+
+    def __acquire(self, name: str) -> _LoadedModel:
+        with self.__lock:
+            model = self.__acquire_loaded(name)
+        if model is not None:
+            return model
+
+        with self.__load_locks[name]:
+            # Loaded by a concurrent request while waiting for the lock
+            with self.__lock:
+                model = self.__acquire_loaded(name)
+            if model is not None:
+                return model
+
+            # Make room before loading, so that memory does not peak at all loaded models plus the new one
+            expected_bytes = self.__expected_bytes(name)
+            with self.__lock:
+                evicted = self.__evict(expected_bytes)
+            self.__close(evicted)
+
+            logging.info(f"Loading model '{name}'")
+            try:
+                detector = self.__load(name)
+            except Exception as exc:
+                logging.exception(f"Model '{name}' failed to load")
+                raise ServiceNotReadyError(f"Model '{name}' failed to load: {type(exc).__name__}: {exc}") from exc
+
+            model = _LoadedModel(detector, detector.text_detector.memory_bytes)
+            model.users += 1
+            with self.__lock:
+                self.__sizes[name] = model.memory_bytes
+                self.__loaded[name] = model
+                self.__loads += 1
+                # The estimate may be off, the just loaded model is the most recently used and stays
+                evicted = self.__evict(keep=1)
+
+        self.__close(evicted)
+
+        return model
+
+
+    def __expected_bytes(self, name: str) -> int:
+        if name in self.__sizes:
+            return self.__sizes[name]
+        if self.memory_budget_bytes is None or self.__estimate is None:
+            return 0
+
+        try:
+            return self.__estimate(name) or 0
+        except Exception:
+            logging.exception(f"Failed to estimate memory of model '{name}'")
+            return 0
+
+
+    @staticmethod
+    def __close(models: list[_LoadedModel]) -> None:
+        for model in models:
+            model.detector.close()
+
+
+    def __acquire_loaded(self, name: str) -> _LoadedModel | None:
+        model = self.__loaded.get(name)
+        if model is not None:
+            self.__loaded.move_to_end(name)
+            model.users += 1
+
+        return model
+
+
+    def __release(self, model: _LoadedModel) -> None:
+        with self.__lock:
+            model.users -= 1
+            close = model.evicted and model.users == 0
+
+        if close:
+            model.detector.close()
+
+
+    def __evict(self, reserved_bytes: int = 0, keep: int = 0) -> list[_LoadedModel]:
+        """Evict least recently used models until loaded models fit the budget, called under the lock.
+
+        :param reserved_bytes: Memory of a model about to be loaded, defaults to 0
+        :type reserved_bytes: int, optional
+        :param keep: Number of the most recently used models kept even if they exceed the budget, defaults to 0
+        :type keep: int, optional
+        :return: Evicted models without requests in progress, to be closed outside the lock
+        :rtype: list[_LoadedModel]
+        """
+        closable = []
+        if self.memory_budget_bytes is None:
+            return closable
+
+        while (
+            len(self.__loaded) > keep
+            and sum(model.memory_bytes for model in self.__loaded.values()) + reserved_bytes > self.memory_budget_bytes
+        ):
+            name, model = self.__loaded.popitem(last=False)
+            model.evicted = True
+            self.__evictions += 1
+            logging.info(f"Evicted model '{name}' to fit memory budget of {self.memory_budget_bytes / 2 ** 20:.1f} MiB")
+            if model.users == 0:
+                closable.append(model)
+
+        return closable
@@ -0,0 +1,120 @@
+import re
+from abc import ABC, abstractmethod
+
+
+SEGMENTERS = ("regex", "nltk")
+
+# Sentence end: terminal punctuation, closing quotes or brackets and whitespace; or a paragraph break
+SENTENCE_END_PATTERN = re.compile(r'([.!?…]+)["\'”’)\]]*\s+|\n[^\S\n]*\n\s*')
+LAST_WORD_PATTERN = re.compile(r'\w+\Z')
+
+# Words ending with a period that rarely end a sentence, lowercase without the period
+ABBREVIATIONS = frozenset((
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "ft", "vs", "etc", "al", "cf", "inc", "ltd",
+    "co", "corp", "dept", "univ", "gov", "gen", "col", "lt", "sgt", "capt", "rev", "hon", "fig", "figs", "eq", "eqs", "no", "nos", "vol", "vols", "pp", "ch", "sec", "approx",
+    "est", "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+))
+
+
+class SentenceSegmenter(ABC):
+    """Splitter of text into sentences, used by chunking to align chunk boundaries."""
+    @abstractmethod
+    def sentence_starts(self, text: str) -> list[int]:
+        """Find where sentences start.
+
+        :param text: Input text
+        :type text: str
+        :return: Sorted character offsets of sentence starts, the first sentence starts at 0
+        :rtype: list[int]
+        """
+
+
+class RegexSegmenter(SentenceSegmenter):
+    """Rule-based segmenter close to NLTK Punkt on English text without its dependency and start-up cost.
+    A sentence ends at `.`, `!`, `?` or an ellipsis followed by whitespace and at a paragraph break.
+    A period does not end a sentence after a common abbreviation or a single letter (initials, `U.S.`),
+    an ellipsis ends a sentence only before an uppercase letter.
+    """
+    def sentence_starts(self, text: str) -> list[int]:
+        starts = [0]
+        for match in SENTENCE_END_PATTERN.finditer(text):
+            end = match.end()
+            if end == len(text):
+                break
+
+            punctuation = match.group(1)
+            if punctuation is not None and not self.__is_sentence_end(text, match.start(), punctuation, text[end]):
+                continue
+
+            starts.append(end)
+
+        return starts
+
+
+    @staticmethod
+    def __is_sentence_end(text: str, position: int, punctuation: str, next_char: str) -> bool:
+        """Decide whether terminal punctuation at `position` ends a sentence.
+
+        :param text: Input text
+        :type text: str
+        :param position: Offset of the punctuation
+        :type position: int
+        :param punctuation: Terminal punctuation
+        :type punctuation: str
+        :param next_char: First character after the following whitespace
+        :type next_char: str
+        :return: Whether a new sentence starts after the punctuation
+        :rtype: bool
+        """
+        if punctuation != ".":
+            if "!" in punctuation or "?" in punctuation:
+                return True
+            # Ellipsis
+            return next_char.isupper()
+
+        word = LAST_WORD_PATTERN.search(text, max(position - 16, 0), position)
+        if word is None:
+            return True
+
+        word = word.group()
+        # Initials and the last letter of `U.S.` or `e.g.`
+        if len(word) == 1 and word.isalpha():
+            return False
+
+        return word.lower() not in ABBREVIATIONS
+
+
+class PunktSegmenter(SentenceSegmenter):
+    """NLTK Punkt sentence tokenizer for English, the default segmenter, requires downloaded `punkt` data."""
+    def __init__(self) -> None:
+        try:
+            import nltk
+        except ImportError as exc:
+            raise ImportError("NLTK segmenter requires `nltk`: pip install nltk && python -m nltk.downloader punkt") from exc
+
+        self.__tokenizer = nltk.data.load("tokenizers/punkt/english.pickle")
+
+
+    def sentence_starts(self, text: str) -> list[int]:
+        starts = [start for start, _ in self.__tokenizer.span_tokenize(text)]
+        if not starts or starts[0] != 0:
+            starts.insert(0, 0)
+
+        return starts
+
+
+def create_segmenter(segmenter: str) -> SentenceSegmenter:
+    """Create sentence segmenter by name.
+
+    :param segmenter: One of `regex` or `nltk`
+    :type segmenter: str
+    :return: Segmenter
+    :rtype: SentenceSegmenter
+    """
+    if segmenter == "regex":
+        return RegexSegmenter()
+
+    if segmenter == "nltk":
+        return PunktSegmenter()
+
+    raise ValueError(f"Unknown segmenter '{segmenter}', expected one of {SEGMENTERS}")
@@ -0,0 +1,140 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable
+
+
+class ServiceNotReadyError(RuntimeError):
+    """Raised when the detector is requested before it is loaded and warmed up."""
+
+
+def resolve_model_path(detector_conf: dict) -> str:
+    """Choose where to load the detector model from.
+    A local snapshot (see `generated-text-detector snapshot`) is preferred over the Hub model,
+    it is loaded without network access and without downloading the pretrained encoder.
+
+    :param detector_conf: Detector config
+    :type detector_conf: dict
+    :return: Path to snapshot directory if it exists, otherwise `text_detector_model`
+    :rtype: str
+    """
+    snapshot = detector_conf.get("text_detector_snapshot")
+    if snapshot and os.path.isdir(snapshot):
+        return snapshot
+
+    if snapshot:
+        logging.warning(f"Snapshot {snapshot} does not exist, {detector_conf['text_detector_model']} is loaded from the Hub")
+
+    return detector_conf["text_detector_model"]
+
+
+class BackgroundLoader:
+    """Builds an expensive object (the detector) in a background thread,
+    so the service answers liveness probes while the model is loading and warming up.
+
+    :param load: Function building the object, runs once
+    :type load: Callable[[], Any]
+    """
+    def __init__(self, load: Callable[[], Any]) -> None:
+        self.__load = load
+        self.__lock = threading.Lock()
+        self.__thread = None
+        self.__value = None
+        self.__state = "pending"
+        self.__error = None
+        self.__load_time = None
+
+
+    def start(self) -> None:
+        """Start loading in a daemon thread."""
+        self.__thread = threading.Thread(target=self.__run, name="detector-loader", daemon=True)
+        self.__thread.start()
+
+
+    def load(self) -> Any:
+        """Load in the calling thread.
+
+        :raises ServiceNotReadyError: If loading failed
+        :return: Loaded object
+        :rtype: Any
+        """
+        self.__run()
+        return self.get()
+
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait until the background load finishes.
+
+        :param timeout: Maximum time to wait in seconds, defaults to None (no limit)
+        :type timeout: float, optional
+        :return: Whether the object is ready
+        :rtype: bool
+        """
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+
+        return self.ready
+
+
+    @property
+    def ready(self) -> bool:
+        return self.__state == "ready"
+
+
+    @property
+    def failed(self) -> bool:
+        return self.__state == "failed"
+
+
+    def get(self) -> Any:
+        """Get loaded object.
+
+        :raises ServiceNotReadyError: If the object is still loading or loading failed
+        :return: Loaded object
+        :rtype: Any
+        """
+        with self.__lock:
+            if self.__state == "ready":
+                return self.__value
+            if self.__state == "failed":
+                raise ServiceNotReadyError(f"Detector failed to load: {self.__error}")
+
+        raise ServiceNotReadyError("Detector is loading")
+
+
+    def status(self) -> dict:
+        """Describe loading progress.
+
+        :return: `ready` flag, `state` (pending, loading, ready or failed), `load_time_s` and `error`
+        :rtype: dict
+        """
+        with self.__lock:
+            return {
+                "ready": self.__state == "ready",
+                "state": self.__state,
+                "load_time_s": self.__load_time,
+                "error": self.__error,
+            }
+
+
+    def __run(self) -> None:
+        with self.__lock:
+            self.__state = "loading"
+
+        started_at = time.monotonic()
+        try:
+            value = self.__load()
+        except Exception as exc:
+            logging.exception("Detector failed to load")
+            with self.__lock:
+                self.__state = "failed"
+                self.__error = f"{type(exc).__name__}: {exc}"
+            return
+
+        with self.__lock:
+            self.__value = value
+            self.__state = "ready"
+            self.__load_time = time.monotonic() - started_at
+
+        logging.info(f"Detector is ready in {self.__load_time:.1f} s")
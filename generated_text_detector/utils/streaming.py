@@ -0,0 +1,231 @@
+import asyncio
+import json
+from typing import AsyncIterator, Callable
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from generated_text_detector.utils.executor import DeadlineExceededError, ExecutorOverloadedError, InferenceExecutor
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """Streaming response whose content is produced while the request body is still being read.
+    Unlike `StreamingResponse` it does not listen for client disconnect on `receive`,
+    which would consume request body messages. Disconnect is reported by the body stream itself.
+    """
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[bytes | None]:
+    """Split a byte stream into lines keeping at most one line in memory.
+
+    :param chunks: Incoming body chunks
+    :type chunks: AsyncIterator[bytes]
+    :param max_line_bytes: Maximum size of one line, longer lines are skipped
+    :type max_line_bytes: int
+    :return: Lines without the trailing newline, `None` in place of every skipped line
+    :rtype: AsyncIterator[bytes | None]
+    """
+    buffer = bytearray()
+    skipping = False
+
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            if skipping:
+                skipping = False
+            else:
+                buffer += chunk[start:end]
+                yield bytes(buffer) if len(buffer) <= max_line_bytes else None
+            buffer.clear()
+            start = end + 1
+
+        if not skipping:
+            buffer += chunk[start:]
+            if len(buffer) > max_line_bytes:
+                yield None
+                buffer.clear()
+                skipping = True
+
+    if buffer and not skipping:
+        yield bytes(buffer)
+
+
+async def iter_items(
+    lines: AsyncIterator[bytes | None],
+    text_field: str,
+    id_field: str
+) -> AsyncIterator[dict]:
+    """Parse NDJSON lines into detection items.
+
+    :param lines: Lines of NDJSON body
+    :type lines: AsyncIterator[bytes | None]
+    :param text_field: Name of the field with the text to score
+    :type text_field: str
+    :param id_field: Name of the optional field with the client ID
+    :type id_field: str
+    :return: Items with keys 'line', 'id' and either 'text' or 'error'
+    :rtype: AsyncIterator[dict]
+    """
+    line_number = 0
+
+    async for line in lines:
+        line_number += 1
+
+        if line is None:
+            yield {"line": line_number, "id": None, "error": "Line exceeds maximum size"}
+            continue
+        if not line.strip():
+            continue
+
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield {"line": line_number, "id": None, "error": f"Invalid JSON: {exc}"}
+            continue
+
+        if not isinstance(record, dict) or not isinstance(record.get(text_field), str):
+            yield {"line": line_number, "id": None, "error": f"Field '{text_field}' with string value is required"}
+            continue
+
+        item_id = record.get(id_field)
+        yield {"line": line_number, "id": item_id, "text": record[text_field]}
+
+
+async def iter_batches(items: AsyncIterator[dict], batch_size: int) -> AsyncIterator[list[dict]]:
+    """Group items into lists of at most `batch_size` elements.
+
+    :param items: Detection items
+    :type items: AsyncIterator[dict]
+    :param batch_size: Maximum number of items in one group
+    :type batch_size: int
+    :return: Groups of items
+    :rtype: AsyncIterator[list[dict]]
+    """
+    batch = []
+
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+async def prefetch(source: AsyncIterator, maxsize: int) -> AsyncIterator:
+    """Run the source iterator in a background task through a bounded queue,
+    so that reading of the next elements overlaps with processing of the current one.
+
+    :param source: Source iterator
+    :type source: AsyncIterator
+    :param maxsize: Maximum number of elements read ahead
+    :type maxsize: int
+    :return: Elements of the source iterator
+    :rtype: AsyncIterator
+    """
+    queue = asyncio.Queue(maxsize=maxsize)
+    done = object()
+
+    async def produce():
+        try:
+            async for element in source:
+                await queue.put(element)
+        except Exception as exc:
+            await queue.put(exc)
+        await queue.put(done)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (element := await queue.get()) is not done:
+            if isinstance(element, Exception):
+                raise element
+            yield element
+    finally:
+        producer.cancel()
+
+
+async def stream_reports(
+    chunks: AsyncIterator[bytes],
+    detect_report_batch: Callable[[list[str]], list[dict]],
+    executor: InferenceExecutor,
+    text_field: str = "text",
+    id_field: str = "id",
+    batch_size: int = 16,
+    prefetch_batches: int = 2,
+    max_line_bytes: int = 10 * 1024 * 1024,
+    overload_retry_s: float = 0.05,
+    lane: str | None = None,
+    deadline_ms: float | None = None
+) -> AsyncIterator[bytes]:
+    """Score NDJSON body incrementally and serialize reports as NDJSON.
+    Memory usage is bounded by `batch_size * (prefetch_batches + 1)` items whatever the body size.
+    Items of a batch still queued at `deadline_ms` get an `error` each, the stream goes on with the next batch.
+    Any other failure ends the stream with a last line holding only `error`.
+
+    :param chunks: Incoming body chunks
+    :type chunks: AsyncIterator[bytes]
+    :param detect_report_batch: Function producing reports for a list of texts (e.g. `AggregatedDetector.detect_report_batch`)
+    :type detect_report_batch: Callable[[list[str]], list[dict]]
+    :param executor: Executor running detection off the event loop
+    :type executor: InferenceExecutor
+    :param text_field: Name of the field with the text to score, defaults to "text"
+    :type text_field: str, optional
+    :param id_field: Name of the optional field with the client ID, defaults to "id"
+    :type id_field: str, optional
+    :param batch_size: Number of items scored in one call, defaults to 16
+    :type batch_size: int, optional
+    :param prefetch_batches: Number of batches read ahead while the current one is scored, defaults to 2
+    :type prefetch_batches: int, optional
+    :param max_line_bytes: Maximum size of one input line, defaults to 10 MiB
+    :type max_line_bytes: int, optional
+    :param overload_retry_s: Pause before retrying when the executor is overloaded, defaults to 0.05
+    :type overload_retry_s: float, optional
+    :param lane: Executor lane of the stream, defaults to None (default lane)
+    :type lane: str, optional
+    :param deadline_ms: Time every batch may wait in the executor queue, defaults to None (`deadline_ms` of the lane)
+    :type deadline_ms: float, optional
+    :return: Serialized report lines
+    :rtype: AsyncIterator[bytes]
+    """
+    lines = iter_lines(chunks, max_line_bytes)
+    items = iter_items(lines, text_field, id_field)
+    batches = prefetch(iter_batches(items, batch_size), prefetch_batches)
+
+    try:
+        async for batch in batches:
+            valid = [item for item in batch if "text" in item]
+
+            # Stream applies backpressure to the client instead of rejecting the whole body
+            reports = []
+            while valid:
+                try:
+                    reports = await executor.run(
+                        detect_report_batch,
+                        [item["text"] for item in valid],
+                        lane=lane,
+                        deadline_ms=deadline_ms,
+                    )
+                    break
+                except ExecutorOverloadedError:
+                    await asyncio.sleep(overload_retry_s)
+                except DeadlineExceededError as exc:
+                    # The deadline of the client is final, a batch dropped at the deadline of the lane is retried
+                    if deadline_ms is not None:
+                        reports = [{"error": str(exc)}] * len(valid)
+                        break
+                    await asyncio.sleep(overload_retry_s)
+
+            for item, report in zip(valid, reports):
+                item.pop("text")
+                item.update(report)
+
+            yield b"".join(
+                json.dumps(item).encode("utf-8") + b"\n"
+                for item in batch
+            )
+    except Exception as exc:
+        # Status and headers are already sent, the client learns about the failure from the last line
+        yield json.dumps({"error": f"{type(exc).__name__}: {exc}"}).encode("utf-8") + b"\n"
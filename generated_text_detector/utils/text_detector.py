@@ -1,11 +1,53 @@
+import threading
+import time
+from array import array
+from functools import lru_cache
+from typing import Sequence
+
 import torch
 import torch.nn.functional as F
-from nltk.tokenize import sent_tokenize
-from transformers import RobertaTokenizer
+from transformers import RobertaTokenizerFast
 
 from generated_text_detector.controllers.schemas_type import Author
-from generated_text_detector.utils.preprocessing import preprocessing_text
-from generated_text_detector.utils.model.roberta_classifier import RobertaClassifier
+from generated_text_detector.utils.backends import InferenceBackend, create_backend
+from generated_text_detector.utils.batching import (
+    MicroBatcher,
+    PaddingStats,
+    bucket_by_length,
+    pad_input_ids,
+    round_up_to_bucket,
+)
+from generated_text_detector.utils.cache import ResultCache, make_cache_key
+from generated_text_detector.utils.cascade import DEFAULT_CASCADE_BAND, CascadeStats, check_band, uncertain
+from generated_text_detector.utils.chunking import TextChunk, merge_window_scores, split_by_chunks
+from generated_text_detector.utils.executor import current_priority
+from generated_text_detector.utils.inference_server import RemoteScorer
+from generated_text_detector.utils.metrics import (
+    BATCH_SIZE,
+    BATCH_TOKENS,
+    CHUNKS_PER_TEXT,
+    TOKENS_PER_TEXT,
+    observe,
+    stage_timer,
+)
+from generated_text_detector.utils.preprocessing import normalize_text, normalize_text_with_offsets
+from generated_text_detector.utils.segmentation import create_segmenter
+
+
+class DetailedReportError(ValueError):
+    """Raised when a detailed report is requested from a detector with full preprocessing."""
+
+
+@lru_cache(maxsize=None)
+def load_tokenizer(tokenizer_name_or_path: str) -> RobertaTokenizerFast:
+    """Load tokenizer once per process, detectors of models with the same tokenizer share one instance.
+
+    :param tokenizer_name_or_path: Model ID on the Hub or path to a directory with tokenizer files
+    :type tokenizer_name_or_path: str
+    :return: Fast tokenizer
+    :rtype: RobertaTokenizerFast
+    """
+    return RobertaTokenizerFast.from_pretrained(tokenizer_name_or_path, do_lower_case=True)
 
 
 class GeneratedTextDetector:
@@ -15,115 +57,586 @@ class GeneratedTextDetector:
     :type model_name_or_path: str
     :param device: The device identifier string (e.g. `cpu` or `cuda`) on which the model will be loaded.
     :type device: str
+    :param backend: Inference runtime, `torch` or `onnx` (CPU only), defaults to "torch"
+    :type backend: str, optional
+    :param onnx_path: Path to the ONNX model, exported from the checkpoint if it does not exist, defaults to None
+    :type onnx_path: str, optional
+    :param onnx_quantize: Whether to quantize the exported ONNX model to int8, defaults to False
+    :type onnx_quantize: bool, optional
+    :param num_threads: Number of intra-op threads of the ONNX backend, defaults to None
+    :type num_threads: int, optional
     :param max_len: Maximum length of input text sequences in model input, defaults to 512
     :type max_len: int, optional
+    :param preprocessing: Whether to clean markdown, URLs and homoglyphs before detection, defaults to False
+    :type preprocessing: bool, optional
+    :param micro_batching: Whether to group chunks of concurrent calls into shared model passes, defaults to False
+    :type micro_batching: bool, optional
+    :param max_batch_size: Maximum number of chunks in one model pass, defaults to 32
+    :type max_batch_size: int, optional
+    :param max_wait_ms: Maximum time a chunk waits for its micro-batch to fill, defaults to 5.0
+    :type max_wait_ms: float, optional
+    :param length_buckets: Upper bounds of chunk token lengths grouped into one model pass, defaults to (64, 128, 256)
+    :type length_buckets: Sequence[int], optional
+    :param max_batch_tokens: Maximum number of padded tokens in one model pass, caps peak memory whatever the input size, defaults to 16384
+    :type max_batch_tokens: int, optional
+    :param chunk_cache_size: Maximum number of chunk scores kept in memory, 0 disables the chunk cache, defaults to 0
+    :type chunk_cache_size: int, optional
+    :param chunk_cache_ttl_s: Lifetime of a cached chunk score in seconds, defaults to None (no expiration)
+    :type chunk_cache_ttl_s: float, optional
+    :param chunk_cache_path: Path to SQLite file persisting chunk scores across restarts, defaults to None
+    :type chunk_cache_path: str, optional
+    :param chunk_cache_disk_size: Maximum number of chunk scores persisted in SQLite, defaults to None (no limit)
+    :type chunk_cache_disk_size: int, optional
+    :param warmup_passes: Number of passes on synthetic text run on construction, so that the first request
+        does not pay for compilation and memory allocation, defaults to None (5 on CUDA, 1 otherwise).
+        With `pad_to_buckets` every input shape is run once instead, 0 disables warmup in both cases
+    :type warmup_passes: int, optional
+    :param compile: Whether to compile the PyTorch model with `torch.compile`, defaults to None (only on CUDA)
+    :type compile: bool, optional
+    :param compile_cache_dir: Directory persisting compiled artifacts between restarts, defaults to None
+    :type compile_cache_dir: str, optional
+    :param pad_to_buckets: Whether to pad model inputs to a fixed set of shapes: lengths to `length_buckets` and `max_len`,
+        batch sizes to `batch_size_buckets`, so that a compiled model never recompiles after warmup,
+        defaults to None (when the model is compiled)
+    :type pad_to_buckets: bool, optional
+    :param batch_size_buckets: Batch sizes model passes are padded to, `max_batch_size` is always added, defaults to (1, 2, 4, 8, 16, 32)
+    :type batch_size_buckets: Sequence[int], optional
+    :param document_store_size: Maximum number of documents whose chunk scores are kept for incremental
+        re-scoring (`detect_incremental`), 0 disables the store, defaults to 0
+    :type document_store_size: int, optional
+    :param document_store_ttl_s: Lifetime of stored document scores in seconds, defaults to None (no expiration)
+    :type document_store_ttl_s: float, optional
+    :param document_store_path: Path to SQLite file persisting document scores across restarts, defaults to None
+    :type document_store_path: str, optional
+    :param document_store_disk_size: Maximum number of documents persisted in SQLite, defaults to None (no limit)
+    :type document_store_disk_size: int, optional
+    :param inference_socket: Unix socket of a shared inference server (`generated-text-detector inference-server`).
+        If set, the model is not loaded: chunks are tokenized locally and scored by the server,
+        which also owns micro-batching and the chunk cache, defaults to None
+    :type inference_socket: str, optional
+    :param window_stride: Split texts longer than the model input into overlapping windows starting every `window_stride` tokens
+        instead of packing whole sentences, scores of windows are merged per token. Incremental re-scoring
+        always uses content-defined sentence chunks, defaults to None (sentence packing)
+    :type window_stride: int, optional
+    :param segmenter: Sentence segmenter aligning chunk boundaries, one of `nltk` (Punkt, requires its `punkt` data)
+        or `regex` (built-in rules), defaults to `nltk`
+    :type segmenter: str, optional
+    :param tokenizer_name_or_path: Model ID on the Hub or path to a directory with tokenizer files,
+        defaults to None (`model_name_or_path`)
+    :type tokenizer_name_or_path: str, optional
+    :param cascade_model: Smaller `RobertaClassifier` checkpoint with the same tokenizer scoring every chunk first,
+        only chunks with its score in `cascade_band` are scored by the model, defaults to None (no cascade)
+    :type cascade_model: str, optional
+    :param cascade_band: Lower and upper bound of first-stage scores escalated to the model, low < score <= high,
+        defaults to (0.3, 0.7) (`NOT_SURE` range of authors)
+    :type cascade_band: Sequence[float], optional
+    :param cascade_onnx_path: Path to the ONNX first-stage model for the `onnx` backend, defaults to None
+    :type cascade_onnx_path: str, optional
     """
     def __init__(
         self,
         model_name_or_path: str,
         device: str,
+        backend: str = "torch",
+        onnx_path: str | None = None,
+        onnx_quantize: bool = False,
+        num_threads: int | None = None,
         max_len: int = 512,
-        preprocessing: bool = False
+        preprocessing: bool = False,
+        micro_batching: bool = False,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        length_buckets: Sequence[int] = (64, 128, 256),
+        max_batch_tokens: int = 16384,
+        chunk_cache_size: int = 0,
+        chunk_cache_ttl_s: float | None = None,
+        chunk_cache_path: str | None = None,
+        chunk_cache_disk_size: int | None = None,
+        warmup_passes: int | None = None,
+        compile: bool | None = None,
+        compile_cache_dir: str | None = None,
+        pad_to_buckets: bool | None = None,
+        batch_size_buckets: Sequence[int] = (1, 2, 4, 8, 16, 32),
+        document_store_size: int = 0,
+        document_store_ttl_s: float | None = None,
+        document_store_path: str | None = None,
+        document_store_disk_size: int | None = None,
+        inference_socket: str | None = None,
+        window_stride: int | None = None,
+        segmenter: str = "nltk",
+        tokenizer_name_or_path: str | None = None,
+        cascade_model: str | None = None,
+        cascade_band: Sequence[float] = DEFAULT_CASCADE_BAND,
+        cascade_onnx_path: str | None = None
     ) -> None:
         
+        self.model_name_or_path = model_name_or_path
+        # Identifies scores in caches, quantized models produce slightly different scores
+        self.model_id = model_name_or_path if backend == "torch" else f"{model_name_or_path}@{backend}"
+        if backend == "onnx" and onnx_quantize:
+            self.model_id += "-int8"
+        self.cascade_band = check_band(cascade_band)
+        if cascade_model is not None:
+            self.model_id = f"{cascade_model}({self.cascade_band[0]},{self.cascade_band[1]})>{self.model_id}"
         self.device = torch.device(device)
-        self.tokenizer = RobertaTokenizer.from_pretrained(model_name_or_path, do_lower_case=True)
-        self.model = RobertaClassifier.from_pretrained(model_name_or_path)
-        self.model.to(self.device)
-        self.model.eval()
+        self.tokenizer = load_tokenizer(tokenizer_name_or_path or model_name_or_path)
+
+        self.remote = None
+        self.backend = None
+        if inference_socket is not None:
+            self.remote = RemoteScorer(inference_socket)
+        else:
+            self.backend = create_backend(
+                backend,
+                model_name_or_path,
+                device,
+                onnx_path=onnx_path,
+                onnx_quantize=onnx_quantize,
+                num_threads=num_threads,
+                compile=compile,
+                compile_cache_dir=compile_cache_dir
+            )
+
+        self.first_stage = None
+        self.cascade_stats = None
+        if cascade_model is not None and self.remote is None:
+            self.first_stage = create_backend(
+                backend,
+                cascade_model,
+                device,
+                onnx_path=cascade_onnx_path,
+                onnx_quantize=onnx_quantize,
+                num_threads=num_threads,
+                compile=compile,
+                compile_cache_dir=compile_cache_dir
+            )
+            self.cascade_stats = CascadeStats(self.cascade_band)
 
         self.__max_len = max_len
+        if window_stride is not None and not 0 < window_stride <= max_len - self.tokenizer.num_special_tokens_to_add():
+            raise ValueError(f"window_stride must be between 1 and the number of text tokens in model input, got {window_stride}")
+        self.window_stride = window_stride
+        self.segmenter = create_segmenter(segmenter)
         self.preprocessing = preprocessing
-
-        # Optimizing GPU inference
-        if self.device.type == 'cuda':
-            self.model = self.model.half()
-            self.model = torch.compile(self.model)
-
+        # Settings deciding how a text is normalized and split into chunks, part of report cache keys
+        self.chunking_id = f"max_len={max_len},window_stride={window_stride},segmenter={segmenter},preprocessing={preprocessing}"
+        self.max_batch_size = max_batch_size
+        self.length_buckets = sorted(length_buckets)
+        self.max_batch_tokens = max(max_batch_tokens, max_len)
+        self.padding_stats = PaddingStats()
+
+        if pad_to_buckets is None:
+            pad_to_buckets = getattr(self.backend, "compiled", False)
+        self.pad_to_buckets = pad_to_buckets
+        self.length_shapes = sorted({bucket for bucket in self.length_buckets if bucket < max_len} | {max_len})
+        self.batch_shapes = sorted({size for size in batch_size_buckets if size < max_batch_size} | {1, max_batch_size})
+
+        self.batcher = None
+        if micro_batching and self.remote is None:
+            self.batcher = MicroBatcher(self.score_chunks, max_batch_size, max_wait_ms)
+
+        self.chunk_cache = None
+        self.document_store = None
+
+        self.__incremental_lock = threading.Lock()
+        self.__incremental_documents = 0
+        self.__incremental_reused_chunks = 0
+        self.__incremental_scored_chunks = 0
+
+        if warmup_passes is None:
+            warmup_passes = 5 if self.device.type == 'cuda' else 1
+
+        if self.remote is not None:
+            # The server is warmed up on its own, wait until it answers
+            self.remote.wait()
+        elif self.pad_to_buckets:
+            if warmup_passes > 0:
+                self.__warmup_shapes()
+        else:
             # Running synthetic data for correct compilation
             sample = "Hello, world! " * 120
-            for _ in range(5):
+            for _ in range(warmup_passes):
                 self.detect(sample)
-
-
-    def __split_by_chunks(self, text: str) -> list[str]:
+                # The model is reached only by uncertain chunks, the sample may not escalate
+                if self.first_stage is not None:
+                    self.__score_batches(self.prepare(sample), self.backend)
+
+        # Created after warmup, so that every warmup pass reaches the model
+        if chunk_cache_size > 0 and self.remote is None:
+            self.chunk_cache = ResultCache(
+                chunk_cache_size,
+                chunk_cache_ttl_s,
+                chunk_cache_path,
+                table="chunk_scores",
+                disk_max_size=chunk_cache_disk_size,
+            )
+
+        if document_store_size > 0:
+            self.document_store = ResultCache(
+                document_store_size,
+                document_store_ttl_s,
+                document_store_path,
+                table="document_scores",
+                disk_max_size=document_store_disk_size,
+            )
+
+
+    @property
+    def max_len(self) -> int:
+        """Maximum length of input text sequences in model input."""
+        return self.__max_len
+
+
+    def __warmup_shapes(self) -> None:
+        """Run one model pass of every input shape a padded batch can have,
+        so that a compiled model is specialized for all of them before the first request."""
+        num_special_tokens = self.tokenizer.num_special_tokens_to_add()
+        for length in self.length_shapes:
+            for batch_size in self.batch_shapes:
+                if batch_size > 1 and batch_size * length > self.max_batch_tokens:
+                    break
+                input_ids = self.tokenizer.build_inputs_with_special_tokens([self.tokenizer.unk_token_id] * (length - num_special_tokens))
+                tokens = pad_input_ids([input_ids] * batch_size, self.tokenizer.pad_token_id)
+                self.backend(**tokens)
+                if self.first_stage is not None:
+                    self.first_stage(**tokens)
+
+
+    def __split_by_chunks(self, text: str, content_defined: bool = False) -> list[TextChunk]:
         """Split text into chunks to handle large inputs.
 
         :param text: Input text
         :type text: str
+        :param content_defined: Whether chunk boundaries depend only on nearby content, defaults to False
+        :type content_defined: bool, optional
         :return: List of text chunks
-        :rtype: list[str]
+        :rtype: list[TextChunk]
         """
-        if len(self.tokenizer.encode(text)) < self.__max_len:
-            return [text]
-
-        chunks = []
-        cur_chunk = ""
-        cur_count_tokens = 0
-
-        for sentence in sent_tokenize(text):
-            temp_count_tokens = len(self.tokenizer.encode(sentence))
-            if cur_count_tokens + temp_count_tokens > self.__max_len:
-                chunks.append(cur_chunk.strip())
-                cur_chunk = sentence
-                cur_count_tokens = temp_count_tokens
-            else:
-                cur_count_tokens += temp_count_tokens
-                cur_chunk += " " + sentence
-        
-        chunks.append(cur_chunk.strip())
+        return split_by_chunks(text, self.tokenizer, self.__max_len, content_defined, self.window_stride, self.segmenter)
 
-        return chunks
+
+    def merge(self, chunks: list[TextChunk], scores: list[float]) -> list[tuple[TextChunk, float]]:
+        """Pair chunks of one text with their scores, overlapping windows are merged into disjoint segments.
+
+        :param chunks: Chunks of one text built by `prepare`
+        :type chunks: list[TextChunk]
+        :param scores: Score of every chunk
+        :type scores: list[float]
+        :return: Non-overlapping chunks with their scores
+        :rtype: list[tuple[TextChunk, float]]
+        """
+        if self.window_stride is None or len(chunks) < 2:
+            return list(zip(chunks, scores))
+
+        with stage_timer("window_merge"):
+            return merge_window_scores(chunks, scores, self.window_stride)
 
 
-    def __model_pass(self, texts: list[str]) -> list[float]:
+    def __model_pass(self, chunks: list[TextChunk], backend: InferenceBackend) -> torch.Tensor:
         """Forward pass through the model to obtain scores.
+        Chunks are already tokenized, so only special tokens and padding are added.
+
+        :param chunks: List of text chunks
+        :type chunks: list[TextChunk]
+        :param backend: Model of the pass, the model or the first stage of the cascade
+        :type backend: InferenceBackend
+        :return: Scores
+        :rtype: torch.Tensor
+        """
+        input_ids = [
+            self.tokenizer.build_inputs_with_special_tokens(chunk.input_ids)
+            for chunk in chunks
+        ]
+        lengths = [len(ids) for ids in input_ids]
+
+        length, batch_size = max(lengths), len(lengths)
+        if self.pad_to_buckets:
+            length = round_up_to_bucket(length, self.length_shapes)
+            batch_size = round_up_to_bucket(batch_size, self.batch_shapes)
+
+        self.padding_stats.update(lengths, length * batch_size)
+        observe(BATCH_SIZE, len(lengths))
+        observe(BATCH_TOKENS, length * batch_size)
+
+        with stage_timer("forward"):
+            tokens = pad_input_ids(input_ids, self.tokenizer.pad_token_id, length, batch_size)
+            logits = backend(**tokens)
+
+            # Rows added to fill the batch shape are dropped
+            probas = F.sigmoid(logits[:len(lengths)]).squeeze(1)
+        
+        return probas
 
-        :param texts: List of text inputs
-        :type texts: list[str]
+
+    def score_chunks(self, chunks: list[TextChunk], cascade: bool = True) -> list[float]:
+        """Score chunks directly in model passes of at most `max_batch_size` chunks and `max_batch_tokens` padded tokens.
+        With a cascade the first stage scores all chunks and the model only those in `cascade_band`.
+
+        :param chunks: List of text chunks
+        :type chunks: list[TextChunk]
+        :param cascade: Whether to use the cascade if it is configured, False scores all chunks with the model, defaults to True
+        :type cascade: bool, optional
         :return: List of scores
         :rtype: list[float]
         """
-        tokens = self.tokenizer.batch_encode_plus(
-            texts,
-            add_special_tokens=True,
-            max_length=self.__max_len,
-            padding='longest',
-            truncation=True,
-            return_token_type_ids=True,
-            return_tensors="pt"
-        )
-
-        tokens.to(self.device)
-
-        with torch.inference_mode():
-            _, logits = self.model(**tokens)
-
-        probas = F.sigmoid(logits).squeeze(1)
-        
-        return probas
+        if self.first_stage is None or not cascade:
+            return self.__score_batches(chunks, self.backend)
 
+        started_at = time.perf_counter()
+        with stage_timer("cascade_first_stage"):
+            scores = self.__score_batches(chunks, self.first_stage)
+        escalated = uncertain(scores, self.cascade_band)
 
-    def detect(self, text: str) -> list[tuple[str, float]]:
+        escalated_at = time.perf_counter()
+        if escalated:
+            with stage_timer("cascade_second_stage"):
+                for i, score in zip(escalated, self.__score_batches([chunks[i] for i in escalated], self.backend)):
+                    scores[i] = score
+
+        finished_at = time.perf_counter()
+        self.cascade_stats.update(len(chunks), len(escalated), escalated_at - started_at, finished_at - escalated_at)
+
+        return scores
+
+
+    def __score_batches(self, chunks: list[TextChunk], backend: InferenceBackend) -> list[float]:
+        """Score chunks with one model. Chunks are grouped by token length into `length_buckets`, so short chunks
+        are not padded to the longest one, scores are returned in the original order.
+        With `pad_to_buckets` the token budget is checked against padded shapes.
+
+        :param chunks: List of text chunks
+        :type chunks: list[TextChunk]
+        :param backend: Model scoring the chunks
+        :type backend: InferenceBackend
+        :return: List of scores
+        :rtype: list[float]
+        """
+        num_special_tokens = self.tokenizer.num_special_tokens_to_add()
+        lengths = [len(chunk.input_ids) + num_special_tokens for chunk in chunks]
+        scores = [0.0] * len(chunks)
+
+        batch_sizes = None
+        if self.pad_to_buckets:
+            lengths = [round_up_to_bucket(length, self.length_shapes) for length in lengths]
+            batch_sizes = self.batch_shapes
+
+        batches = bucket_by_length(lengths, self.length_buckets, self.max_batch_size, self.max_batch_tokens, batch_sizes)
+        for batch in batches:
+            batch_scores = self.__model_pass([chunks[i] for i in batch], backend).tolist()
+            for i, score in zip(batch, batch_scores):
+                scores[i] = score
+
+        return scores
+
+
+    def score(self, chunks: list[TextChunk]) -> list[float]:
+        """Score chunks either through the shared micro-batcher or with a direct model pass.
+        Scores of chunks seen before are taken from the chunk cache, if it is enabled.
+
+        :param chunks: List of text chunks
+        :type chunks: list[TextChunk]
+        :return: List of scores
+        :rtype: list[float]
+        """
+        if self.chunk_cache is None:
+            return self.__score_uncached(chunks)
+
+        keys = [self.__chunk_key(chunk) for chunk in chunks]
+        scores = [self.chunk_cache.get(key) for key in keys]
+
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            for i, score in zip(missing, self.__score_uncached([chunks[i] for i in missing])):
+                scores[i] = score
+                self.chunk_cache.put(keys[i], score)
+
+        return scores
+
+
+    def __score_uncached(self, chunks: list[TextChunk]) -> list[float]:
+        if self.remote is not None:
+            return self.remote.score(chunks)
+
+        if self.batcher is not None:
+            return self.batcher.score(chunks, current_priority())
+
+        return self.score_chunks(chunks)
+
+
+    def __chunk_key(self, chunk: TextChunk) -> str:
+        """Cache key of chunk score: model and token IDs fully determine the model input."""
+        return make_cache_key(self.model_id, array("l", chunk.input_ids).tobytes())
+
+
+    def prepare(self, text: str, content_defined: bool = False, normalized: bool = False) -> list[TextChunk]:
+        """Normalize text and split it into model-sized chunks.
+
+        :param text: Input text
+        :type text: str
+        :param content_defined: Whether chunk boundaries depend only on nearby content, defaults to False
+        :type content_defined: bool, optional
+        :param normalized: Whether the text is already normalized with `normalize_text`, defaults to False
+        :type normalized: bool, optional
+        :return: List of text chunks
+        :rtype: list[TextChunk]
+        """
+        if not normalized:
+            with stage_timer("preprocessing"):
+                text = normalize_text(text, self.preprocessing)
+
+        return self.__prepare_normalized(text, content_defined)
+
+
+    def __prepare_normalized(self, text: str, content_defined: bool) -> list[TextChunk]:
+        chunks = self.__split_by_chunks(text, content_defined)
+
+        observe(CHUNKS_PER_TEXT, len(chunks))
+        observe(TOKENS_PER_TEXT, sum(len(chunk.input_ids) for chunk in chunks))
+
+        return chunks
+
+
+    def detect(self, text: str, normalized: bool = False) -> list[tuple[str, float]]:
         """Detects if text is generated and return chunks with scores.
 
         :param text: Input text
         :type text: str
+        :param normalized: Whether the text is already normalized with `normalize_text`, defaults to False
+        :type normalized: bool, optional
+        :return: Text chunks with generated scores
+        :rtype: list[tuple[str, float]]
+        """
+        text_chunks = self.prepare(text, normalized=normalized)
+
+        scores = self.score(text_chunks)
+
+        res = [(chunk.text, score) for chunk, score in self.merge(text_chunks, scores)]
+       
+        return res
+
+
+    def detect_incremental(self, text: str, document_id: str, normalized: bool = False) -> list[tuple[str, float]]:
+        """Detects if a new version of a document is generated re-scoring only changed chunks.
+        Chunk boundaries are content-defined, so an edit changes only the chunks around it.
+        Scores of chunks that did not change since the previous version are taken from the document store,
+        and the store keeps only chunks of the latest version.
+
+        :param text: Input text
+        :type text: str
+        :param document_id: ID of the document, stable across its versions
+        :type document_id: str
+        :param normalized: Whether the text is already normalized with `normalize_text`, defaults to False
+        :type normalized: bool, optional
         :return: Text chunks with generated scores
         :rtype: list[tuple[str, float]]
         """
-        # Preprocessing
+        text_chunks = self.prepare(text, content_defined=True, normalized=normalized)
+        scores = self.__score_document(text_chunks, document_id)
+
+        return [(chunk.text, score) for chunk, score in zip(text_chunks, scores)]
+
+
+    def detect_detailed(self, text: str, document_id: str | None = None) -> list[tuple[TextChunk, float]]:
+        """Detects if text is generated and return chunks with their positions in the input text.
+        Positions come from tokenizer offset mappings translated through normalization,
+        so text is not searched for chunks.
+
+        :param text: Input text
+        :type text: str
+        :param document_id: ID of the document for incremental re-scoring, see `detect_incremental`, defaults to None
+        :type document_id: str, optional
+        :raises DetailedReportError: If the detector applies full preprocessing
+        :return: Chunks with `start` and `end` in the input text and their generated scores
+        :rtype: list[tuple[TextChunk, float]]
+        """
         if self.preprocessing:
-            text = preprocessing_text(text)
+            raise DetailedReportError("Detailed reports are not available with text preprocessing, chunks have no exact offsets")
+
+        with stage_timer("preprocessing"):
+            normalized, positions = normalize_text_with_offsets(text)
+
+        text_chunks = self.__prepare_normalized(normalized, content_defined=document_id is not None)
+        if document_id is None:
+            scored_chunks = self.merge(text_chunks, self.score(text_chunks))
         else:
-            text = " ".join(text.split())
+            scored_chunks = list(zip(text_chunks, self.__score_document(text_chunks, document_id)))
 
-        text_chunks = self.__split_by_chunks(text)
+        res = []
+        for chunk, score in scored_chunks:
+            start = positions[chunk.start]
+            end = positions[chunk.end - 1] + 1 if chunk.end > chunk.start else start
+            res.append((TextChunk(chunk.text, chunk.input_ids, start, end), score))
 
-        scores = self.__model_pass(text_chunks).tolist()
+        return res
+
+
+    def __score_document(self, text_chunks: list[TextChunk], document_id: str) -> list[float]:
+        """Score chunks of a document version reusing scores of chunks of its previous version.
+
+        :param text_chunks: Chunks with content-defined boundaries
+        :type text_chunks: list[TextChunk]
+        :param document_id: ID of the document
+        :type document_id: str
+        :return: List of scores
+        :rtype: list[float]
+        """
+        keys = [self.__chunk_key(chunk) for chunk in text_chunks]
+
+        document_key = make_cache_key(self.model_id, document_id)
+        previous = {}
+        if self.document_store is not None:
+            previous = self.document_store.get(document_key) or {}
+
+        scores = [previous.get(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            for i, score in zip(missing, self.score([text_chunks[i] for i in missing])):
+                scores[i] = score
+
+        if self.document_store is not None:
+            self.document_store.put(document_key, dict(zip(keys, scores)))
+
+        with self.__incremental_lock:
+            self.__incremental_documents += 1
+            self.__incremental_reused_chunks += len(text_chunks) - len(missing)
+            self.__incremental_scored_chunks += len(missing)
+
+        return scores
+
+
+    def detect_batch(self, texts: list[str], normalized: bool = False) -> list[list[tuple[str, float]] | Exception]:
+        """Detects if texts are generated scoring chunks of all texts in shared model passes.
+        A text that fails preprocessing gets its exception in place of the result,
+        so one bad item does not fail the whole batch.
+
+        :param texts: Input texts
+        :type texts: list[str]
+        :param normalized: Whether the texts are already normalized with `normalize_text`, defaults to False
+        :type normalized: bool, optional
+        :return: Text chunks with generated scores or an exception for every input text
+        :rtype: list[list[tuple[str, float]] | Exception]
+        """
+        text_chunks = []
+        for text in texts:
+            try:
+                text_chunks.append(self.prepare(text, normalized=normalized))
+            except Exception as exc:
+                text_chunks.append(exc)
+
+        flat_chunks = [
+            chunk
+            for chunks in text_chunks if not isinstance(chunks, Exception)
+            for chunk in chunks
+        ]
+        scores = iter(self.score(flat_chunks))
+
+        res = []
+        for chunks in text_chunks:
+            if isinstance(chunks, Exception):
+                res.append(chunks)
+            else:
+                res.append([(chunk.text, score) for chunk, score in self.merge(chunks, [next(scores) for _ in chunks])])
 
-        res = list(zip(text_chunks, scores))
-       
         return res
     
 
@@ -135,18 +648,11 @@ class GeneratedTextDetector:
         :return: Text chunks with generated scores
         :rtype: list[tuple[str, float]]
         """
-        # Preprocessing
-        if self.preprocessing:
-            text = preprocessing_text(text)
-        else:
-            text = " ".join(text.split())
-
-        text_chunks = self.__split_by_chunks(text)
-        scores = self.__model_pass(text_chunks)
+        text_chunks = self.prepare(text)
+        scores = [score for _, score in self.merge(text_chunks, self.score(text_chunks))]
 
         # Average scores
         gen_score = sum(scores) / len(scores)
-        gen_score = gen_score.item() 
         author = self.__determine_author(gen_score).value
 
         res = {
@@ -182,6 +688,57 @@ class GeneratedTextDetector:
             return Author.HUMAN
 
 
+    @property
+    def memory_bytes(self) -> int:
+        """Estimated memory taken by model weights of both cascade stages, 0 if the model is served by an inference server."""
+        return sum(backend.memory_bytes for backend in (self.backend, self.first_stage) if backend is not None)
+
+
+    def close(self) -> None:
+        """Stop the micro-batching worker and release the model."""
+        if self.batcher is not None:
+            self.batcher.close()
+
+        self.backend = None
+        self.first_stage = None
+        if self.device.type == "cuda":
+            torch.cuda.empty_cache()
+
+
+    def stats(self) -> dict:
+        """Collect runtime statistics of the detector.
+
+        :return: Statistics grouped by component
+        :rtype: dict
+        """
+        res = {"padding": self.padding_stats.stats()}
+
+        if self.batcher is not None:
+            res["batching"] = self.batcher.stats()
+
+        if self.cascade_stats is not None:
+            res["cascade"] = self.cascade_stats.stats()
+
+        if self.chunk_cache is not None:
+            res["chunk_cache"] = self.chunk_cache.stats()
+
+        if self.document_store is not None:
+            res["document_store"] = self.document_store.stats()
+
+        with self.__incremental_lock:
+            if self.__incremental_documents:
+                res["incremental"] = {
+                    "documents": self.__incremental_documents,
+                    "reused_chunks": self.__incremental_reused_chunks,
+                    "scored_chunks": self.__incremental_scored_chunks,
+                }
+
+        if self.remote is not None:
+            res["inference_server"] = self.remote.stats()
+
+        return res
+
+
 if __name__ == "__main__":
     detector = GeneratedTextDetector(
         "SuperAnnotate/ai-detector",
@@ -14,5 +14,13 @@ setup(
     version=version,
     packages=find_packages(),
     include_package_data=True,
-    install_requires=install_requires
+    install_requires=install_requires,
+    extras_require={
+        'client': ['httpx', 'orjson'],
+    },
+    entry_points={
+        'console_scripts': [
+            'generated-text-detector=generated_text_detector.cli:main',
+        ],
+    },
 )
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# The offline model fixture is shared with the benchmark suite
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from fixtures import build_fixture  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def fixture_model(tmp_path_factory) -> str:
+    """Path to the offline tokenizer and randomly initialized classifier of `benchmarks/fixtures.py`."""
+    return build_fixture(str(tmp_path_factory.mktemp("detector-fixture")))
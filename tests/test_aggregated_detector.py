@@ -0,0 +1,70 @@
+import random
+
+import pytest
+from fixtures import make_text
+
+from generated_text_detector.utils.aggregated_detector import AggregatedDetector
+from generated_text_detector.utils.text_detector import DetailedReportError
+
+
+@pytest.fixture(scope="module")
+def document() -> str:
+    text = make_text(random.Random(0), 12000)
+    return f"{text}\n\n```python\n{'print(value)  # code is not scored' * 60}\n```\n"
+
+
+def make_detector(model: str, **kwargs) -> AggregatedDetector:
+    # Code scores far from the scores of the fixture model, so that a wrong weight of text shows in the report
+    return AggregatedDetector(
+        model, "cpu", **{"code_default_score": 1.0, "warmup_passes": 0, "max_len": 128, "max_batch_size": 4, **kwargs}
+    )
+
+
+def test_early_exit_estimate_of_windows_matches_full_report(fixture_model, document):
+    full = make_detector(fixture_model, window_stride=32).detect_report(document)
+    # Zero-width band stops scoring right after the first batch of windows
+    early = make_detector(
+        fixture_model, window_stride=32, early_exit=True, early_exit_z=0.0, early_exit_min_chunks=4
+    )
+    report = early.detect_report(document)
+
+    assert early.stats()["early_exit"]["skipped_chunks"] > 0
+    assert report["generated_score"] == pytest.approx(full["generated_score"], abs=2e-3)
+
+
+def test_early_exit_without_stop_equals_full_report(fixture_model, document):
+    full = make_detector(fixture_model, window_stride=32).detect_report(document)
+    early = make_detector(fixture_model, window_stride=32, early_exit=True, early_exit_min_chunks=10 ** 6)
+    report = early.detect_report(document)
+
+    assert report["generated_score"] == pytest.approx(full["generated_score"], abs=1e-6)
+
+
+def cached_lookups(model: str, path: str, text: str, **kwargs) -> dict:
+    """Detect text with a fresh detector on the persistent report cache, as after a restart, and count lookups."""
+    detector = make_detector(model, report_cache_size=16, report_cache_path=path, **kwargs)
+    detector.detect_report(text)
+    return detector.report_cache.stats()
+
+
+@pytest.mark.parametrize("changed", [{"window_stride": 32}, {"segmenter": "regex"}, {"max_len": 64}, {"early_exit": True}])
+def test_report_cache_misses_after_config_change(fixture_model, document, tmp_path, changed):
+    path = str(tmp_path / "reports.db")
+
+    assert cached_lookups(fixture_model, path, document)["misses"] == 1
+    assert cached_lookups(fixture_model, path, document)["disk_hits"] == 1
+    assert cached_lookups(fixture_model, path, document, **changed)["misses"] == 1
+
+
+def test_detailed_offsets_point_into_input_text(fixture_model, document):
+    text = document.replace(". ", ".  \n").replace(" ", "\t ", 50)
+    detected = make_detector(fixture_model).text_detector.detect_detailed(text)
+
+    assert detected
+    for chunk, _ in detected:
+        assert text[chunk.start:chunk.end].split() == chunk.text.split()
+
+
+def test_detailed_report_with_preprocessing_is_rejected(fixture_model, document):
+    with pytest.raises(DetailedReportError):
+        make_detector(fixture_model, preprocessing=True).detect_report(document, detailed=True)
@@ -0,0 +1,162 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from generated_text_detector import client as client_module
+from generated_text_detector.client import AsyncDetectorClient, DetectorClient, DetectorClientError
+
+
+def report(text: str) -> dict:
+    return {"generated_score": len(text) / 100, "author": "Probably human"}
+
+
+class Service:
+    """Handler of `httpx.MockTransport` answering `/detect` and `/detect/batch`.
+    The first batch calls get `batch_responses` instead, an exception is raised as a failed connection.
+    """
+    def __init__(self, batch_responses: list[httpx.Response | Exception] | None = None) -> None:
+        self.batch_responses = list(batch_responses or [])
+        self.calls = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.calls.append(path)
+        payload = json.loads(request.content)
+
+        if path == "/detect":
+            return httpx.Response(200, json=report(payload["text"]))
+
+        if self.batch_responses:
+            response = self.batch_responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        results = [
+            {"id": None, **report(item["text"])} if item["text"] else {"id": None, "error": "Text is empty"}
+            for item in payload["items"]
+        ]
+        return httpx.Response(200, json={"results": results})
+
+
+@pytest.fixture
+def sleeps(monkeypatch) -> list[float]:
+    pauses = []
+    monkeypatch.setattr(client_module.time, "sleep", pauses.append)
+    return pauses
+
+
+def make_client(service: Service, **kwargs) -> DetectorClient:
+    return DetectorClient("http://detector", transport=httpx.MockTransport(service), **kwargs)
+
+
+def test_retry_after(sleeps):
+    responses = [httpx.Response(503, headers={"Retry-After": "2"}, json={"detail": "Model is loading"})]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return responses.pop(0) if responses else httpx.Response(200, json=report("text"))
+
+    with DetectorClient("http://detector", transport=httpx.MockTransport(handler)) as client:
+        assert client.detect("text") == report("text")
+
+    assert sleeps == [2.0]
+
+
+def test_retries_exhausted(sleeps):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(429, json={"detail": "Too many requests"})
+
+    with DetectorClient("http://detector", retries=2, transport=httpx.MockTransport(handler)) as client:
+        with pytest.raises(DetectorClientError) as error:
+            client.detect("text")
+
+    assert error.value.status_code == 429
+    assert len(sleeps) == 2
+
+
+def test_batch_fallback_on_missing_route():
+    service = Service([httpx.Response(404, json={"detail": "Not Found"})])
+    texts = [f"text {i}" for i in range(5)]
+
+    with make_client(service, batch_size=2) as client:
+        assert client.detect_many(texts) == [report(text) for text in texts]
+        assert client.batch_supported is False
+
+    assert service.calls.count("/detect/batch") == 1
+    assert service.calls.count("/detect") == 5
+
+
+def test_proxy_not_found_keeps_batch_calls():
+    service = Service([httpx.Response(404, text="<html>Not Found</html>")])
+
+    with make_client(service) as client:
+        with pytest.raises(DetectorClientError) as error:
+            client.detect_batch(["text"])
+        assert error.value.status_code == 404
+        assert client.batch_supported is None
+
+        assert client.detect_batch(["text"]) == [report("text")]
+        assert client.batch_supported is True
+
+
+def test_failed_first_group_keeps_batch_calls():
+    service = Service([httpx.ConnectError("Connection refused")])
+    texts = [f"text {i}" for i in range(6)]
+
+    with make_client(service, batch_size=2, retries=0) as client:
+        reports = client.detect_many(texts)
+        assert client.batch_supported is True
+
+    assert [report.get("error") for report in reports[:2]] == ["ConnectError: Connection refused"] * 2
+    assert reports[2:] == [report(text) for text in texts[2:]]
+    assert "/detect" not in service.calls
+
+
+def test_failed_batch_call_keeps_support_unknown():
+    service = Service([httpx.Response(500, json={"detail": "Internal Server Error"})])
+
+    with make_client(service) as client:
+        with pytest.raises(DetectorClientError):
+            client.detect_batch(["text"])
+        assert client.batch_supported is None
+
+
+def test_per_item_errors():
+    with make_client(Service()) as client:
+        assert client.detect_batch(["text", "", "more text"]) == [
+            report("text"),
+            {"error": "Text is empty"},
+            report("more text"),
+        ]
+
+
+def test_async_client_in_process():
+    app = FastAPI()
+    batches = []
+
+    @app.post("/detect/batch")
+    async def detect_batch(payload: dict) -> dict:
+        batches.append(len(payload["items"]))
+        return {
+            "results": [
+                {"id": None, **report(item["text"])} if item["text"] else {"id": None, "error": "Text is empty"}
+                for item in payload["items"]
+            ]
+        }
+
+    async def run() -> list:
+        transport = httpx.ASGITransport(app)
+        async with AsyncDetectorClient("http://detector", batch_size=4, batch_wait_ms=50, transport=transport) as client:
+            return await asyncio.gather(
+                *(client.detect(text) for text in ("a", "bb", "", "ccc")),
+                return_exceptions=True
+            )
+
+    first, second, empty, third = asyncio.run(run())
+
+    assert [first, second, third] == [report("a"), report("bb"), report("ccc")]
+    assert isinstance(empty, DetectorClientError) and str(empty) == "Text is empty"
+    assert batches == [4]
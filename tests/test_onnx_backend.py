@@ -0,0 +1,42 @@
+import random
+
+import pytest
+from fixtures import make_text
+
+from generated_text_detector.utils.text_detector import GeneratedTextDetector
+
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+# Same tolerances as `benchmarks/onnx_backend.py`
+TOLERANCE = 1e-4
+INT8_TOLERANCE = 0.05
+
+
+@pytest.fixture(scope="module")
+def texts() -> list[str]:
+    rng = random.Random(0)
+    return [make_text(rng, rng.randint(50, 1500)) for _ in range(16)]
+
+
+def score(model: str, texts: list[str], **kwargs) -> list[float]:
+    detector = GeneratedTextDetector(model, "cpu", warmup_passes=0, max_len=128, **kwargs)
+    return detector.score_chunks([chunk for text in texts for chunk in detector.prepare(text)])
+
+
+@pytest.mark.parametrize("quantize, tolerance", [(False, TOLERANCE), (True, INT8_TOLERANCE)])
+def test_onnx_scores_match_torch(fixture_model, texts, tmp_path, quantize, tolerance):
+    reference = score(fixture_model, texts)
+    onnx_path = str(tmp_path / "model.onnx")
+    scores = score(fixture_model, texts, backend="onnx", onnx_path=onnx_path, onnx_quantize=quantize)
+
+    assert len(scores) == len(reference)
+    assert max(abs(a - b) for a, b in zip(scores, reference)) <= tolerance
+
+
+def test_onnx_model_must_match_quantization(fixture_model, texts, tmp_path):
+    onnx_path = str(tmp_path / "model.onnx")
+    score(fixture_model, texts[:1], backend="onnx", onnx_path=onnx_path, onnx_quantize=True)
+
+    with pytest.raises(ValueError, match="is quantized"):
+        score(fixture_model, texts[:1], backend="onnx", onnx_path=onnx_path, onnx_quantize=False)
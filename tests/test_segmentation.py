@@ -0,0 +1,74 @@
+import json
+import os
+import random
+
+import pytest
+from fixtures import make_text
+from segmentation import boundary_scores, make_prose
+from transformers import RobertaTokenizerFast
+
+from generated_text_detector.utils.chunking import split_by_chunks
+from generated_text_detector.utils.segmentation import PunktSegmenter, RegexSegmenter, create_segmenter
+
+nltk = pytest.importorskip("nltk")
+
+DETECTOR_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "etc", "configs", "detector_config.json")
+# Minimum share of chunks identical to chunks built with Punkt, for a segmenter to be the default
+MIN_AGREEMENT = 0.95
+MIN_F1 = 0.95
+
+
+@pytest.fixture(scope="module")
+def punkt() -> PunktSegmenter:
+    try:
+        nltk.data.find("tokenizers/punkt")
+    except LookupError:
+        pytest.skip("NLTK `punkt` data is not downloaded")
+
+    return PunktSegmenter()
+
+
+@pytest.fixture(scope="module")
+def tokenizer(fixture_model) -> RobertaTokenizerFast:
+    return RobertaTokenizerFast.from_pretrained(fixture_model)
+
+
+@pytest.fixture(scope="module")
+def corpora() -> dict[str, list[tuple[str, list[int] | None]]]:
+    rng = random.Random(0)
+    return {
+        "generated": [(make_text(rng, 20000), None) for _ in range(3)],
+        "prose": [make_prose(rng, 20000) for _ in range(3)],
+    }
+
+
+def chunk_agreement(texts: list[str], tokenizer, segmenter, reference) -> float:
+    same = total = 0
+    for text in texts:
+        chunks = {(chunk.start, chunk.end) for chunk in split_by_chunks(text, tokenizer, 128, segmenter=segmenter)}
+        reference_chunks = {(chunk.start, chunk.end) for chunk in split_by_chunks(text, tokenizer, 128, segmenter=reference)}
+        same += len(chunks & reference_chunks)
+        total += len(reference_chunks)
+
+    return same / total
+
+
+@pytest.mark.parametrize("corpus", ["generated", "prose"])
+def test_default_segmenter_agrees_with_punkt(corpora, tokenizer, punkt, corpus):
+    # Chunks of the shipped segmenter must stay the chunks the model was evaluated with
+    with open(DETECTOR_CONFIG_PATH) as f:
+        segmenter = json.load(f)["text_detector_params"]["segmenter"]
+    texts = [text for text, _ in corpora[corpus]]
+
+    assert chunk_agreement(texts, tokenizer, create_segmenter(segmenter), punkt) >= MIN_AGREEMENT
+    assert chunk_agreement(texts, tokenizer, None, punkt) >= MIN_AGREEMENT
+
+
+def test_regex_boundaries_match_annotations(corpora):
+    both = extra = missed = 0
+    for text, starts in corpora["prose"]:
+        counts = boundary_scores(starts, RegexSegmenter().sentence_starts(text))
+        both, extra, missed = both + counts[0], extra + counts[1], missed + counts[2]
+
+    precision, recall = both / (both + extra), both / (both + missed)
+    assert 2 * precision * recall / (precision + recall) >= MIN_F1
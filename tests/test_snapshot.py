@@ -0,0 +1,62 @@
+import json
+import os
+
+import pytest
+from transformers import RobertaConfig
+
+from generated_text_detector import cli
+from generated_text_detector.utils.model.roberta_classifier import RobertaClassifier
+
+
+@pytest.fixture
+def offline(monkeypatch) -> list[tuple[str, dict]]:
+    """Record lookups of the pretrained encoder config instead of reaching the Hub."""
+    lookups = []
+
+    def from_pretrained(name_or_path: str, **kwargs) -> RobertaConfig:
+        lookups.append((name_or_path, kwargs))
+        raise OSError(f"{name_or_path} is not available offline")
+
+    monkeypatch.setattr(RobertaConfig, "from_pretrained", from_pretrained)
+    return lookups
+
+
+def test_snapshot_every_configured_model(fixture_model, tmp_path, offline):
+    detector_conf = {
+        "text_detector_model": fixture_model,
+        "text_detector_snapshot": str(tmp_path / "default"),
+        "default_model": "default",
+        "models": {
+            "default": {},
+            "low-fpr": {"text_detector_snapshot": str(tmp_path / "low-fpr")},
+        },
+    }
+    config_path = tmp_path / "detector_config.json"
+    config_path.write_text(json.dumps(detector_conf))
+
+    cli.main(["snapshot", "-dc", str(config_path)])
+
+    for name in ("default", "low-fpr"):
+        snapshot = str(tmp_path / name)
+        with open(os.path.join(snapshot, "config.json")) as f:
+            assert "roberta_config" in json.load(f)
+        assert os.path.isfile(os.path.join(snapshot, "tokenizer.json"))
+        RobertaClassifier.from_pretrained(snapshot)
+
+    assert offline == []
+
+
+def test_local_checkpoint_does_not_reach_hub(fixture_model, tmp_path, offline):
+    checkpoint = str(tmp_path / "checkpoint")
+    RobertaClassifier.from_pretrained(fixture_model).save_pretrained(checkpoint)
+    with open(os.path.join(checkpoint, "config.json")) as f:
+        config = json.load(f)
+    config.pop("roberta_config")
+    config["pretrain_checkpoint"] = "FacebookAI/roberta-large"
+    with open(os.path.join(checkpoint, "config.json"), "w") as f:
+        json.dump(config, f)
+
+    with pytest.raises(OSError):
+        RobertaClassifier.from_pretrained(checkpoint)
+
+    assert [(name, kwargs["local_files_only"]) for name, kwargs in offline] == [("FacebookAI/roberta-large", True)]
@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+from generated_text_detector.utils.executor import DeadlineExceededError, ExecutorOverloadedError
+from generated_text_detector.utils.streaming import stream_reports
+
+
+class Executor:
+    """Stand-in for `InferenceExecutor` raising the given errors before running the function."""
+    def __init__(self, *errors: Exception) -> None:
+        self.errors = list(errors)
+        self.calls = []
+
+    async def run(self, func, *args, **kwargs):
+        self.calls.append(kwargs)
+        if self.errors:
+            raise self.errors.pop(0)
+        return func(*args)
+
+
+def detect_report_batch(texts: list[str]) -> list[dict]:
+    return [{"generated_score": 0.5, "author": "Not sure"} for _ in texts]
+
+
+async def body(lines: list[str]):
+    for line in lines:
+        yield line.encode("utf-8") + b"\n"
+
+
+def collect(executor: Executor, lines: list[str], **kwargs) -> list[dict]:
+    async def run() -> list[bytes]:
+        stream = stream_reports(body(lines), detect_report_batch, executor, batch_size=2, overload_retry_s=0, **kwargs)
+        return [chunk async for chunk in stream]
+
+    return [json.loads(line) for chunk in asyncio.run(run()) for line in chunk.splitlines()]
+
+
+def test_lane_and_deadline_reach_executor():
+    executor = Executor()
+    reports = collect(executor, ['{"text": "a", "id": 1}', '{"text": "b"}'], lane="bulk", deadline_ms=100.0)
+
+    assert executor.calls == [{"lane": "bulk", "deadline_ms": 100.0}]
+    assert [report["generated_score"] for report in reports] == [0.5, 0.5]
+
+
+def test_expired_batch_gets_errors_and_stream_goes_on():
+    executor = Executor(DeadlineExceededError("Request waited past its deadline"))
+    lines = ['{"text": "a"}', '{"text": "b"}', '{"text": "c"}']
+    reports = collect(executor, lines, deadline_ms=10.0)
+
+    assert [report.get("error") for report in reports] == ["Request waited past its deadline"] * 2 + [None]
+    assert [report["line"] for report in reports] == [1, 2, 3]
+
+
+def test_lane_deadline_and_overload_are_retried():
+    executor = Executor(ExecutorOverloadedError("busy"), DeadlineExceededError("expired"))
+    reports = collect(executor, ['{"text": "a"}'])
+
+    assert len(executor.calls) == 3
+    assert reports == [{"line": 1, "id": None, "generated_score": 0.5, "author": "Not sure"}]
+
+
+def test_failure_ends_stream_with_error_line():
+    executor = Executor(RuntimeError("model crashed"))
+    reports = collect(executor, ['{"text": "a"}', '{"text": "b"}', '{"text": "c"}'])
+
+    assert reports == [{"error": "RuntimeError: model crashed"}]